@@ -1,4 +1,8 @@
-from fastapi import UploadFile, HTTPException
+from io import BytesIO
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from PIL import Image
 
 # Allowed image types
 ALLOWED_TYPES = {
@@ -10,34 +14,109 @@ ALLOWED_TYPES = {
 # Max file size (20MB)
 MAX_FILE_SIZE = 20 * 1024 * 1024
 
+# Max decoded image size (guards against decompression bombs)
+MAX_IMAGE_PIXELS = 50_000_000
+
+# How many leading bytes to buffer while looking for the image header
+MAX_HEADER_SIZE = 256 * 1024
+
+
+def sniff_image_type(header: bytes) -> Optional[str]:
+    """Detect the image type from its magic bytes."""
+    if header.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+class ImageValidator:
+    """
+    Validate an uploaded image chunk by chunk while it is being saved.
+
+    Enforces MAX_FILE_SIZE as bytes arrive, checks the magic bytes of the
+    first chunk and reads the dimensions from the header (without decoding
+    pixels), so bad uploads fail before the rest of the body is processed.
+    """
+
+    def __init__(self, content_type: Optional[str]):
+        # Check content type
+        if content_type not in ALLOWED_TYPES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid file type: {content_type}. Allowed: JPG, PNG, WebP"
+            )
+
+        self.size = 0
+        self.image_type: Optional[str] = None
+        self.dimensions: Optional[Tuple[int, int]] = None
+        self._header = bytearray()
+
+    @property
+    def extension(self) -> str:
+        """File extension for the detected image type."""
+        return ALLOWED_TYPES.get(self.image_type, ".jpg")
+
+    def feed(self, chunk: bytes):
+        """Check the next chunk of the upload."""
+        if not chunk:
+            return
+
+        # Check file size
+        self.size += len(chunk)
+        if self.size > MAX_FILE_SIZE:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File too large. Max: {MAX_FILE_SIZE // 1024 // 1024}MB"
+            )
+
+        if self.dimensions is not None:
+            return
+
+        self._header += chunk[:MAX_HEADER_SIZE - len(self._header)]
+
+        # Check magic bytes
+        if self.image_type is None:
+            self.image_type = sniff_image_type(bytes(self._header[:12]))
+            if self.image_type is None:
+                raise HTTPException(
+                    status_code=400,
+                    detail="File content is not a JPG, PNG or WebP image"
+                )
+
+        self._read_dimensions()
+
+    def _read_dimensions(self):
+        """Parse the image header once enough bytes have arrived."""
+        try:
+            with Image.open(BytesIO(self._header)) as image:
+                width, height = image.size
+        except Image.DecompressionBombError:
+            raise HTTPException(status_code=413, detail="Image too large")
+        except Exception:
+            # Header not complete yet
+            if len(self._header) >= MAX_HEADER_SIZE:
+                raise HTTPException(status_code=400, detail="Could not read image header")
+            return
+
+        if width * height > MAX_IMAGE_PIXELS:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Image too large: {width}x{height} pixels"
+            )
+
+        self.dimensions = (width, height)
+        self._header = bytearray()
+
+    def finish(self):
+        """Final checks once the whole upload has been read."""
+        if self.size == 0:
+            raise HTTPException(
+                status_code=400,
+                detail="Empty file uploaded"
+            )
 
-async def validate_image(file: UploadFile) -> UploadFile:
-    """Validate uploaded image file."""
-    
-    # Check content type
-    if file.content_type not in ALLOWED_TYPES:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid file type: {file.content_type}. Allowed: JPG, PNG, WebP"
-        )
-    
-    # Check file size
-    content = await file.read()
-    size = len(content)
-    
-    if size > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large: {size / 1024 / 1024:.1f}MB. Max: 20MB"
-        )
-    
-    if size == 0:
-        raise HTTPException(
-            status_code=400,
-            detail="Empty file uploaded"
-        )
-    
-    # Reset file position for later reading
-    await file.seek(0)
-    
-    return file
+        if self.dimensions is None:
+            raise HTTPException(status_code=400, detail="Could not read image header")
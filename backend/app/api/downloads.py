@@ -0,0 +1,192 @@
+"""
+Model downloads: conditional requests, byte ranges and precompressed variants
+
+A job's models only change on remesh, which also changes its ETag, so
+repeat requests are answered with 304 from the ETag alone. Ranged
+requests get just the bytes asked for, and the gzip / brotli copies
+written at completion are sent as-is to clients that accept them.
+"""
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import anyio
+from fastapi import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from app.services.storage import DOWNLOAD_ENCODINGS, storage
+
+# URLs pinned to a version (?v=<etag>) never change; the plain URL does on
+# remesh, so caches revalidate it (a 304 when nothing changed)
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Read size when streaming a file
+CHUNK_SIZE = 64 * 1024
+
+
+class FileSliceResponse(Response):
+    """Stream ``length`` bytes of a file starting at ``start``."""
+
+    def __init__(
+        self,
+        path: Path,
+        start: int,
+        length: int,
+        status_code: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+        media_type: Optional[str] = None
+    ):
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+        self.path = path
+        self.start = start
+        self.length = length
+        self.headers["content-length"] = str(length)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+
+        if scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            remaining = self.length
+            while True:
+                chunk = await file.read(min(CHUNK_SIZE, remaining))
+                remaining -= len(chunk)
+                more_body = remaining > 0 and bool(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+                if not more_body:
+                    break
+
+
+def _accepted_encodings(header: str) -> set:
+    """Content codings an Accept-Encoding header allows (q > 0)."""
+    accepted = set()
+    for item in header.split(","):
+        name, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if name and quality > 0:
+            accepted.add(name.lower())
+    return accepted
+
+
+def _match_etag(header: str, etags: list) -> Optional[str]:
+    """The first of ``etags`` listed in an If-None-Match header (weak comparison)."""
+    if header.strip() == "*":
+        return etags[0]
+    listed = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return next((etag for etag in etags if etag in listed), None)
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    First and last byte of a single ``bytes=`` range.
+
+    Returns None for headers to ignore (malformed, other units, several
+    ranges), which means sending the whole file.
+
+    Raises:
+        ValueError: if the range lies outside the file (416)
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    first, sep, last = (part.strip() for part in spec.partition("-"))
+    if not sep or not (first or last) or not all(part.isdigit() for part in (first, last) if part):
+        return None
+
+    if not first:
+        # Suffix range: the last N bytes
+        if int(last) == 0:
+            raise ValueError("Empty suffix range")
+        return max(0, size - int(last)), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if last and end < start:
+        return None
+    if start >= size:
+        raise ValueError("Range starts beyond the end of the file")
+    return start, min(end, size - 1)
+
+
+def model_response(
+    request: Request,
+    path: Path,
+    etag: Optional[str],
+    filename: str,
+    immutable: bool = False
+) -> Response:
+    """
+    Respond with a model file, honouring If-None-Match, Range / If-Range and
+    Accept-Encoding.
+
+    ``etag`` identifies the file's content (None for jobs finished before
+    ETags existed: no conditional requests then). Each precompressed
+    variant gets its own ETag; ranges are always served from the
+    uncompressed file.
+    """
+    variants = [(None, path)] + [
+        (encoding, storage.get_encoded_path(path, encoding)) for encoding in DOWNLOAD_ENCODINGS
+    ]
+    tags = {encoding: f'"{etag}-{encoding}"' if encoding else f'"{etag}"' for encoding, _ in variants}
+
+    headers = {
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f'attachment; filename="{filename}"',
+    }
+
+    if etag is not None and "if-none-match" in request.headers:
+        matched = _match_etag(request.headers["if-none-match"], list(tags.values()))
+        if matched is not None:
+            return Response(status_code=304, headers={**headers, "ETag": matched})
+
+    range_header = request.headers.get("range")
+
+    # Best precompressed variant the client accepts (identity for ranges)
+    encoding, file_path = None, path
+    if range_header is None:
+        accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+        for candidate, candidate_path in variants[1:]:
+            if (candidate in accepted or "*" in accepted) and candidate_path.exists():
+                encoding, file_path = candidate, candidate_path
+                break
+
+    if etag is not None:
+        headers["ETag"] = tags[encoding]
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+
+    size = os.stat(file_path).st_size
+
+    if range_header is not None:
+        # A stale If-Range validator means the client's bytes are outdated
+        if_range = request.headers.get("if-range")
+        if if_range is None or (etag is not None and if_range.strip() == tags[None]):
+            try:
+                byte_range = _parse_range(range_header, size)
+            except ValueError:
+                return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+            if byte_range is not None:
+                start, end = byte_range
+                headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+                return FileSliceResponse(
+                    file_path, start, end - start + 1, status_code=206,
+                    headers=headers, media_type="model/gltf-binary"
+                )
+
+    return FileSliceResponse(file_path, 0, size, headers=headers, media_type="model/gltf-binary")
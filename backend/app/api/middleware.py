@@ -0,0 +1,101 @@
+from typing import Optional
+
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+def too_large_detail(max_body_size: int) -> str:
+    """Error message for a body over the limit."""
+    return f"Request body too large. Max: {max_body_size // 1024 // 1024}MB"
+
+
+class BodyTooLarge(HTTPException):
+    """
+    Raised when a request body goes over the limit.
+
+    An HTTPException, so it still becomes a 413 when raised while FastAPI
+    parses a form (which turns any other error into a 400).
+    """
+
+    def __init__(self, max_body_size: int):
+        super().__init__(
+            status_code=413,
+            detail=too_large_detail(max_body_size),
+            headers={"Connection": "close"}
+        )
+
+
+def parse_content_length(value: bytes) -> Optional[int]:
+    """Content-Length as a non-negative int, or None if malformed."""
+    if not value.strip().isdigit():
+        return None
+    return int(value)
+
+
+class BodySizeLimitMiddleware:
+    """
+    Reject request bodies over a size limit before they are fully received.
+
+    Starlette spools a multipart upload completely before the route runs, so
+    oversized uploads are stopped here: up front from Content-Length, or as
+    soon as a chunked body crosses the limit.
+    """
+
+    def __init__(self, app: ASGIApp, max_body_size: int):
+        self.app = app
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length")
+
+        if content_length is not None:
+            length = parse_content_length(content_length)
+            if length is None:
+                response = JSONResponse(status_code=400, content={"detail": "Invalid Content-Length header"})
+                await response(scope, receive, send)
+                return
+            if length > self.max_body_size:
+                await self._reject(scope, receive, send)
+                return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    raise BodyTooLarge(self.max_body_size)
+            return message
+
+        async def tracked_send(message: Message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        # Inside a route the exception handler answers 413; this catches it
+        # when raised anywhere else
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except BodyTooLarge:
+            if response_started:
+                raise
+            await self._reject(scope, receive, send)
+
+    async def _reject(self, scope: Scope, receive: Receive, send: Send):
+        """Send a 413 response."""
+        response = JSONResponse(
+            status_code=413,
+            content={"detail": too_large_detail(self.max_body_size)},
+            headers={"Connection": "close"}
+        )
+        await response(scope, receive, send)
@@ -1,18 +1,86 @@
-from typing import List
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import FileResponse
+import asyncio
+import json
+import time
+from typing import AsyncIterator, List, Optional
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 
-from app.models import JobResponse, ProcessingMode
-from app.services import storage, job_service, job_queue
-from app.api.dependencies import validate_image
+from app.config import settings
+from app.models import (
+    DepthDetail, Job, JobPriority, JobResponse, JobStatus, ModelLOD, OutputProfile, ProcessingMode, RemeshRequest
+)
+from app.services import storage, async_job_service, job_queue, result_cache, progress_bus
+from app.services.metrics import UPLOAD_SECONDS
+from app.services.progress_bus import job_event
+from app.services.queue import QueueFullError
+from app.api.dependencies import ImageValidator
+from app.api.downloads import model_response
 
 router = APIRouter(prefix="/api", tags=["jobs"])
 
+# Seconds between keep-alives on idle event streams
+HEARTBEAT_INTERVAL = 15
+
+FINISHED_STATUSES = {JobStatus.COMPLETED.value, JobStatus.FAILED.value}
+
+
+async def job_updates(job: Job, queue: asyncio.Queue) -> AsyncIterator[Optional[dict]]:
+    """
+    Yield a job's current state, then each published update until it finishes.
+    
+    Updates may carry only the changed fields; each yielded event is the
+    full merged state. Yields None as a keep-alive when nothing happened for
+    HEARTBEAT_INTERVAL. The caller must have subscribed ``queue`` before
+    loading ``job``.
+    """
+    # Standalone workers run in other processes and never reach the bus,
+    # so poll the database instead
+    poll_interval = HEARTBEAT_INTERVAL if job_queue.run_locally else settings.worker_poll_interval
+    idle = 0.0
+    
+    try:
+        state = job_event(job)
+        yield state
+        
+        while state["status"] not in FINISHED_STATUSES:
+            try:
+                update = await asyncio.wait_for(queue.get(), timeout=poll_interval)
+            except asyncio.TimeoutError:
+                update = None
+                if not job_queue.run_locally:
+                    current = await async_job_service.get_job(job.id)
+                    if current is not None and job_event(current) != state:
+                        update = job_event(current)
+                
+                if update is None:
+                    idle += poll_interval
+                    if idle >= HEARTBEAT_INTERVAL:
+                        idle = 0.0
+                        yield None
+                    continue
+            idle = 0.0
+            state = {**state, **update}
+            yield state
+    finally:
+        progress_bus.unsubscribe(job.id, queue)
+
+
+def queue_full_error(retry_after: int) -> HTTPException:
+    """429 for a full job queue."""
+    return HTTPException(
+        status_code=429,
+        detail="Too many jobs queued, please retry later",
+        headers={"Retry-After": str(retry_after)}
+    )
+
 
 @router.post("/jobs", response_model=JobResponse)
 async def create_job(
     file: UploadFile = File(...),
-    mode: ProcessingMode = ProcessingMode.SINGLE
+    mode: ProcessingMode = ProcessingMode.SINGLE,
+    priority: JobPriority = JobPriority.INTERACTIVE,
+    profile: Optional[OutputProfile] = None,
+    detail: DepthDetail = DepthDetail.STANDARD
 ):
     """
     Create a new 3D generation job.
@@ -20,42 +88,62 @@ async def create_job(
     - Upload an image file (JPG, PNG, WebP)
     - Returns job ID to track progress
     - Processing starts automatically in background
+    - Identical uploads reuse the previous result
+    - Returns 429 with Retry-After when the queue is full
+    - ``profile`` picks the GLB encoding (default from settings)
+    - ``detail=high`` estimates depth from overlapping tiles and meshes at a
+      higher resolution (slower, memory bounded by depth_tile_memory_mb)
     """
-    # Validate file
-    await validate_image(file)
+    profile = profile or OutputProfile(settings.glb_profile)
+    
+    # Refuse before storing anything (enqueue re-checks, for races)
+    if job_queue.full:
+        raise queue_full_error(await job_queue.retry_after())
+    
+    # Validate file type (content is validated while it is saved)
+    validator = ImageValidator(file.content_type)
     
     # Generate job ID
     job_id = storage.generate_job_id()
     
-    # Save uploaded file
-    input_path = await storage.save_upload(file, job_id)
-    file_size = storage.get_file_size(input_path)
+    # Save uploaded file (only accepted uploads are timed)
+    start = time.perf_counter()
+    input_path, content_hash = await storage.save_upload(file, job_id, validator)
+    UPLOAD_SECONDS.observe(time.perf_counter() - start)
+    file_size = validator.size
     
     # Create job in database
-    job = job_service.create_job(
+    job = await async_job_service.create_job(
         job_id=job_id,
         mode=mode,
         input_file=input_path,
-        file_size=file_size
+        file_size=file_size,
+        output_profile=profile,
+        depth_detail=detail
     )
     
-    # Start processing in background
-    job_queue.enqueue(job_id)
+    # Start processing in background (or reuse a cached/running result)
+    cache_key = job_queue.cache_key(content_hash, mode, profile, detail)
     
-    return job
+    try:
+        return await job_queue.enqueue(job_id, cache_key=cache_key, priority=priority) or job
+    except QueueFullError as e:
+        storage.delete_job_files(job_id)
+        await async_job_service.delete_job(job_id)
+        raise queue_full_error(e.retry_after)
 
 
 @router.get("/jobs", response_model=List[JobResponse])
-async def list_jobs(limit: int = 20):
-    """List all jobs."""
-    jobs = job_service.get_all_jobs(limit=limit)
+async def list_jobs(limit: int = 20, status: Optional[JobStatus] = None):
+    """List all jobs, optionally filtered by status."""
+    jobs = await async_job_service.get_all_jobs(limit=limit, status=status)
     return jobs
 
 
 @router.get("/jobs/{job_id}", response_model=JobResponse)
 async def get_job(job_id: str):
     """Get job status by ID."""
-    job = job_service.get_job(job_id)
+    job = await async_job_service.get_job(job_id)
     
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
@@ -63,10 +151,70 @@ async def get_job(job_id: str):
     return job
 
 
-@router.get("/jobs/{job_id}/model.glb")
-async def download_model(job_id: str):
-    """Download the generated 3D model."""
-    job = job_service.get_job(job_id)
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Stream job updates as Server-Sent Events until the job finishes."""
+    queue = progress_bus.subscribe(job_id)
+    job = await async_job_service.get_job(job_id)
+    
+    if not job:
+        progress_bus.unsubscribe(job_id, queue)
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def stream():
+        async for event in job_updates(job, queue):
+            if event is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"data: {json.dumps(event)}\n\n"
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/jobs/{job_id}/ws")
+async def job_websocket(websocket: WebSocket, job_id: str):
+    """Send job updates over a WebSocket until the job finishes."""
+    await websocket.accept()
+    queue = progress_bus.subscribe(job_id)
+    job = await async_job_service.get_job(job_id)
+    
+    if not job:
+        progress_bus.unsubscribe(job_id, queue)
+        await websocket.close(code=4404, reason="Job not found")
+        return
+    
+    try:
+        async for event in job_updates(job, queue):
+            if event is None:
+                await websocket.send_json({"type": "ping"})
+            else:
+                await websocket.send_json(event)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+
+@router.api_route("/jobs/{job_id}/model.glb", methods=["GET", "HEAD"])
+async def download_model(
+    request: Request,
+    job_id: str,
+    lod: ModelLOD = ModelLOD.HIGH,
+    v: Optional[str] = None
+):
+    """
+    Download the generated 3D model.
+    
+    - ``lod`` picks a level of detail: low, medium or high (the full model)
+    - Levels that were not built (budget not below the job's max faces)
+      serve the full model
+    - ``v`` pins the job's ``etag``: such URLs are cached as immutable
+    - Supports If-None-Match (304), byte ranges and gzip / brotli
+    """
+    job = await async_job_service.get_job(job_id)
     
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
@@ -78,21 +226,88 @@ async def download_model(job_id: str):
         )
     
     output_path = storage.get_output_path(job_id)
+    filename = f"{job_id}.glb"
+    etag = job.etag
+    
+    if lod != ModelLOD.HIGH:
+        lod_path = storage.get_output_path(job_id, lod.value)
+        if lod_path.exists():
+            output_path, filename = lod_path, f"{job_id}_{lod.value}.glb"
+            etag = f"{etag}-{lod.value}" if etag else None
     
     if not output_path.exists():
         raise HTTPException(status_code=404, detail="Model file not found")
     
-    return FileResponse(
-        path=str(output_path),
-        filename=f"{job_id}.glb",
-        media_type="model/gltf-binary"
+    return model_response(
+        request,
+        output_path,
+        etag,
+        filename,
+        immutable=etag is not None and v == job.etag
+    )
+
+
+@router.post("/jobs/{job_id}/remesh", response_model=JobResponse)
+async def remesh_job(job_id: str, params: RemeshRequest):
+    """
+    Rebuild a completed job's model with new mesh parameters.
+    
+    - Reuses the stored depth map (no depth inference)
+    - Replaces the job's GLB and its levels of detail in place
+    """
+    job = await async_job_service.get_job(job_id)
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    if job.status != "completed":
+        raise HTTPException(
+            status_code=400,
+            detail=f"Job not completed. Status: {job.status}"
+        )
+    
+    depth_path = storage.get_depth_path(job_id)
+    
+    if not depth_path.exists():
+        raise HTTPException(status_code=404, detail="Depth map not found")
+    
+    from app.services.inference_pool import get_inference_pool
+    await get_inference_pool().remesh(
+        str(storage.resolve_upload(job.input_file)),
+        depth_path,
+        storage.get_output_path(job_id),
+        depth_scale=params.depth_scale,
+        max_faces=params.max_faces,
+        profile=job.output_profile.value
     )
+    
+    # New content, new ETag (and precompressed variants)
+    loop = asyncio.get_running_loop()
+    etag = await loop.run_in_executor(None, storage.finalize_outputs, job_id)
+    job = await async_job_service.set_etag(job_id, etag) or job
+    
+    # The GLB no longer matches the parameters it was cached under
+    result_cache.discard_job(job_id)
+    
+    return job
+
+
+@router.get("/queue/stats")
+async def queue_stats():
+    """Job scheduler counters."""
+    return job_queue.stats()
+
+
+@router.get("/cache/stats")
+async def cache_stats():
+    """Result cache counters."""
+    return result_cache.stats()
 
 
 @router.delete("/jobs/{job_id}")
 async def delete_job(job_id: str):
     """Delete a job and its files."""
-    job = job_service.get_job(job_id)
+    job = await async_job_service.get_job(job_id)
     
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
@@ -101,6 +316,6 @@ async def delete_job(job_id: str):
     storage.delete_job_files(job_id)
     
     # Delete from database
-    job_service.delete_job(job_id)
+    await async_job_service.delete_job(job_id)
     
     return {"message": "Job deleted", "job_id": job_id}
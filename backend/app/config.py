@@ -10,12 +10,85 @@ class Settings(BaseSettings):
     
     # DB
     database_url: str = "sqlite:///./data/jobs.db"
+    # Threads for DB writes made from async code (always 1 on SQLite, which
+    # runs one writer at a time), and separate ones for reads, so status
+    # reads never queue behind progress commits
+    db_threads: int = 4
+    db_read_threads: int = 4
+    # How long a connection waits on a locked SQLite database
+    db_busy_timeout_ms: int = 5000
     
     replicate_api_token: str = ""
     
     # Processor type: dummy, depth, replicate
     processor_type: str = "depth"
     
+    # Depth inference micro-batching
+    depth_batch_size: int = 4
+    depth_batch_wait_ms: int = 20
+    
+    # Inference worker processes (0 = run in the API process)
+    inference_workers: int = 0
+    # Inference threads per worker (0 = split CPU cores evenly)
+    inference_threads: int = 0
+    
+    # Depth model runtime: torch (fp32), torch-int8 (dynamic int8 linear layers)
+    # or onnxruntime (export first with scripts/export_depth_onnx.py)
+    depth_backend: str = "torch"
+    depth_onnx_path: str = "./data/models/dpt-hybrid-midas.onnx"
+    
+    # Load and warm up the depth model at startup (/ready reports 503 until done)
+    depth_preload: bool = False
+    # Free the depth model after this many idle seconds (0 = keep it loaded)
+    depth_idle_unload_seconds: int = 0
+    
+    # High detail jobs (?detail=high): longest side of the tiled depth map and
+    # mesh grid, and memory budget per job for tiled inference and meshing in
+    # MB (the side is lowered to fit it; too small a budget fails at startup)
+    high_detail_max_size: int = 1536
+    depth_tile_memory_mb: int = 1024
+    
+    # Number of finished results kept for identical uploads
+    result_cache_size: int = 256
+    
+    # Seconds between batched writes of job progress
+    progress_flush_interval: float = 2.0
+    
+    # Job scheduler: concurrent jobs and max jobs waiting (429 beyond that)
+    job_workers: int = 2
+    max_queued_jobs: int = 50
+    
+    # Meshing: "adaptive" (quadtree within max_faces) or "grid" (full grid + decimation)
+    mesh_tessellation: str = "adaptive"
+    
+    # Reduced levels of detail written next to each GLB, in max faces (0 = off);
+    # "high" is the full model at max_faces
+    mesh_lod_low_faces: int = 10000
+    mesh_lod_medium_faces: int = 50000
+    
+    # Default GLB output profile: standard, quantized or compressed (per-job override)
+    glb_profile: str = "standard"
+    
+    # GLB texture: codec (jpeg, webp, png), quality, max side (the 512 px mesh
+    # resolution by default; raise it for sharper textures), power-of-two sizes
+    texture_codec: str = "jpeg"
+    texture_quality: int = 85
+    texture_max_size: int = 512
+    texture_power_of_two: bool = False
+    
+    # Write gzip (and brotli, if installed) copies of each model at completion
+    precompress_downloads: bool = True
+    
+    # Run jobs inside the API process; set false when using `python -m app.worker`
+    run_jobs_in_api: bool = True
+    # Standalone worker leases
+    worker_lease_seconds: int = 60
+    worker_heartbeat_seconds: int = 15
+    worker_poll_interval: float = 1.0
+    worker_max_attempts: int = 3
+    # Port for a standalone worker's own /metrics (0 = off)
+    worker_metrics_port: int = 0
+    
     class Config:
         env_file = ".env"
         extra = "ignore"
@@ -1,5 +1,5 @@
 """Database module."""
 
-from app.db.database import engine, init_db, get_session
+from app.db.database import engine, init_db, get_session, run_db_read, run_in_db_thread
 
-__all__ = ["engine", "init_db", "get_session"]
+__all__ = ["engine", "init_db", "get_session", "run_in_db_thread", "run_db_read"]
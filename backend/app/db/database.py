@@ -1,20 +1,104 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import event, inspect, text
 from sqlmodel import SQLModel, Session, create_engine
 from app.config import settings
 
-# Create engine
+is_sqlite = settings.database_url.startswith("sqlite")
+
+# SQLite allows one writer at a time: more write threads would only wait on
+# its lock while competing with reads for the CPU
+db_write_threads = 1 if is_sqlite else settings.db_threads
+
+# Create engine (one pooled connection per DB thread, plus headroom)
 engine = create_engine(
     settings.database_url,
     echo=False,
-    connect_args={"check_same_thread": False}
+    pool_size=db_write_threads + settings.db_read_threads + 1,
+    max_overflow=settings.db_threads,
+    pool_pre_ping=not is_sqlite,
+    connect_args={"check_same_thread": False} if is_sqlite else {}
 )
 
 
+if is_sqlite:
+    @event.listens_for(engine, "connect")
+    def _configure_sqlite(dbapi_connection, connection_record):
+        """
+        Production profile for every new SQLite connection.
+        
+        WAL lets readers run alongside the single writer; with it,
+        synchronous=NORMAL is still crash-safe and avoids an fsync per commit.
+        """
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={settings.db_busy_timeout_ms}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA cache_size=-16000")  # 16MB
+        cursor.close()
+
+
+# Dedicated threads for blocking DB calls made from async code, so they
+# neither stall the event loop nor queue behind work in the default executor.
+# Reads get their own: a write can wait up to busy_timeout for SQLite's lock,
+# while WAL readers never do, so sharing threads would stall status reads
+db_executor = ThreadPoolExecutor(max_workers=db_write_threads, thread_name_prefix="db")
+db_read_executor = ThreadPoolExecutor(max_workers=settings.db_read_threads, thread_name_prefix="db-read")
+
+
 def init_db():
-    """Create all database tables."""
+    """Create all database tables and bring existing ones up to date."""
     SQLModel.metadata.create_all(engine)
+    migrate_db()
+
+
+def migrate_db():
+    """
+    Lightweight schema migration for existing databases.
+    
+    create_all() leaves existing tables alone, so add any model columns
+    they are missing (nullable or with a server default) and any indexes.
+    """
+    inspector = inspect(engine)
+    
+    with engine.begin() as connection:
+        for table in SQLModel.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                default = ""
+                if column.server_default is not None:
+                    arg = column.server_default.arg
+                    # Plain strings are literals, as in CREATE TABLE
+                    default = f" DEFAULT '{arg}'" if isinstance(arg, str) else f" DEFAULT {arg}"
+                connection.execute(text(
+                    f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}{default}'
+                ))
+                print(f"✓ Added column {table.name}.{column.name}")
+            
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
 
 
 def get_session():
     """Get a database session."""
     with Session(engine) as session:
         yield session
+
+
+async def run_in_db_thread(fn, *args, **kwargs):
+    """Run a blocking DB call (one that may write) on the DB thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, functools.partial(fn, *args, **kwargs))
+
+
+async def run_db_read(fn, *args, **kwargs):
+    """Run a read-only DB call on the read thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_read_executor, functools.partial(fn, *args, **kwargs))
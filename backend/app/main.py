@@ -1,11 +1,17 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
 from app.db import init_db
-from app.models import Job 
+from app.models import Job, JobStatus
 from app.api import router as api_router
+from app.api.dependencies import MAX_FILE_SIZE
+from app.api.middleware import BodySizeLimitMiddleware
+from app.services import async_job_service, job_queue, metrics
+from app.services.inference_pool import MODEL_FAILED, MODEL_READY, get_inference_pool
 
 
 @asynccontextmanager
@@ -13,8 +19,38 @@ async def lifespan(app: FastAPI):
     """Startup and shutdown events."""
     init_db()
     print("✓ Database initialized")
+    model_tasks = start_model_tasks()
     yield
     print("Shutting down...")
+    for task in model_tasks:
+        task.cancel()
+    await async_job_service.flush_progress()
+    get_inference_pool().shutdown()
+
+
+def uses_depth_model() -> bool:
+    """Whether this process runs depth inference."""
+    return settings.run_jobs_in_api and settings.processor_type != "dummy"
+
+
+def start_model_tasks() -> list:
+    """Start the depth model preload and idle unloader, as configured."""
+    if not uses_depth_model():
+        return []
+
+    # Raises (and stops startup) if the tile memory budget is too small
+    from app.services.mesh_generator import detail_mesh_size
+    print(f"✓ High detail depth up to {detail_mesh_size('high')}px per side")
+
+    pool = get_inference_pool()
+    tasks = []
+    if settings.depth_preload:
+        # In the background, so the server starts answering /health meanwhile
+        pool.warming_up = True
+        tasks.append(asyncio.create_task(pool.warm_up()))
+    if settings.depth_idle_unload_seconds > 0:
+        tasks.append(asyncio.create_task(pool.run_idle_unloader(settings.depth_idle_unload_seconds)))
+    return tasks
 
 
 # FastAPI app
@@ -34,6 +70,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Reject oversized uploads before the body is spooled (allows multipart overhead)
+app.add_middleware(BodySizeLimitMiddleware, max_body_size=MAX_FILE_SIZE + 64 * 1024)
+
 app.include_router(api_router)
 
 
@@ -46,11 +85,59 @@ async def health_check():
     }
 
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness check: 503 while the startup preload runs or after it failed.
+    
+    An idle-unloaded model still counts as ready (the next job reloads it).
+    """
+    if not uses_depth_model():
+        return {"status": "ready", "processor": settings.processor_type, "model": None}
+    
+    pool = get_inference_pool()
+    ready = not pool.warming_up and pool.state != MODEL_FAILED
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not ready",
+            "processor": settings.processor_type,
+            "model": pool.status(),
+        }
+    )
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """
+    Prometheus metrics: per-stage timings, queue and model gauges, job counters.
+    
+    Gauges are read at scrape time; with standalone workers the queue
+    gauges come from the database, and the timings and job counters of
+    their jobs are served by each worker (WORKER_METRICS_PORT).
+    """
+    if job_queue.run_locally:
+        metrics.QUEUED_JOBS.set(job_queue.queued)
+        metrics.RUNNING_JOBS.set(job_queue.running)
+    else:
+        metrics.QUEUED_JOBS.set(await async_job_service.count_jobs(JobStatus.QUEUED))
+        metrics.RUNNING_JOBS.set(await async_job_service.count_jobs(JobStatus.PROCESSING))
+    
+    model_loaded = False
+    if uses_depth_model():
+        model_loaded = get_inference_pool().state == MODEL_READY
+    metrics.MODEL_LOADED.set(1 if model_loaded else 0)
+    
+    return Response(metrics.render(), headers={"Content-Type": metrics.CONTENT_TYPE})
+
+
 @app.get("/")
 async def root():
     """Root endpoint."""
     return {
         "message": "Image to 3D API",
         "docs": "/docs",
-        "health": "/health"
+        "health": "/health",
+        "ready": "/ready",
+        "metrics": "/metrics"
     }
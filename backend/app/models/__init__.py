@@ -1,12 +1,17 @@
 """Data models for the application."""
 
-from app.models.enums import JobStatus, ProcessingMode
-from app.models.job import Job, JobCreate, JobResponse
+from app.models.enums import JobStatus, ProcessingMode, JobPriority, OutputProfile, DepthDetail, ModelLOD
+from app.models.job import Job, JobCreate, JobResponse, RemeshRequest
 
 __all__ = [
     "JobStatus",
     "ProcessingMode", 
+    "JobPriority",
+    "OutputProfile",
+    "DepthDetail",
+    "ModelLOD",
     "Job",
     "JobCreate",
     "JobResponse",
+    "RemeshRequest",
 ]
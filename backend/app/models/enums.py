@@ -14,3 +14,29 @@ class ProcessingMode(str, Enum):
     """Type of 3D processing."""
     SINGLE = "single"   # Single image to 3D
     MULTI = "multi"     # Multi-view photogrammetry
+
+
+class OutputProfile(str, Enum):
+    """Encoding of the generated GLB."""
+    STANDARD = "standard"      # float32 vertex data
+    QUANTIZED = "quantized"    # KHR_mesh_quantization
+    COMPRESSED = "compressed"  # quantized + EXT_meshopt_compression
+
+
+class DepthDetail(str, Enum):
+    """Resolution of depth estimation and meshing."""
+    STANDARD = "standard"  # One pass at the model's input size, mesh up to 512 px
+    HIGH = "high"          # Overlapping tiles blended at up to high_detail_max_size
+
+
+class ModelLOD(str, Enum):
+    """Level of detail of a downloaded model."""
+    LOW = "low"
+    MEDIUM = "medium"
+    HIGH = "high"  # The full model (max_faces)
+
+
+class JobPriority(str, Enum):
+    """Scheduling lane of a job."""
+    INTERACTIVE = "interactive"  # A user is waiting on the result
+    BULK = "bulk"                # Batch submissions
@@ -1,8 +1,9 @@
 from datetime import datetime
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field
 
-from app.models.enums import JobStatus, ProcessingMode
+from app.models.enums import DepthDetail, JobStatus, OutputProfile, ProcessingMode
 
 
 class JobBase(SQLModel):
@@ -16,6 +17,10 @@ class JobBase(SQLModel):
 class Job(JobBase, table=True):
     """Job database model."""
     __tablename__ = "jobs"
+    __table_args__ = (
+        # Status queries ordered by age (e.g. next queued job)
+        Index("ix_jobs_status_created_at", "status", "created_at"),
+    )
     
     id: Optional[str] = Field(default=None, primary_key=True)
     mode: ProcessingMode = Field(default=ProcessingMode.SINGLE)
@@ -26,15 +31,31 @@ class Job(JobBase, table=True):
     # File paths
     input_file: Optional[str] = Field(default=None)
     output_file: Optional[str] = Field(default=None)
+    output_profile: OutputProfile = Field(
+        default=OutputProfile.STANDARD,
+        sa_column_kwargs={"server_default": OutputProfile.STANDARD.name}
+    )
+    depth_detail: DepthDetail = Field(
+        default=DepthDetail.STANDARD,
+        sa_column_kwargs={"server_default": DepthDetail.STANDARD.name}
+    )
+    # Fingerprint of the finished models (download ETag, changes on remesh)
+    etag: Optional[str] = Field(default=None)
     
     # Timestamps
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     completed_at: Optional[datetime] = Field(default=None)
     
     # Metadata
     file_size: Optional[int] = Field(default=None)
     processing_time: Optional[float] = Field(default=None)
+    
+    # Worker lease (standalone workers only)
+    lease_owner: Optional[str] = Field(default=None)
+    lease_expires_at: Optional[datetime] = Field(default=None)
+    heartbeat_at: Optional[datetime] = Field(default=None)
+    attempts: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
 
 
 class JobCreate(SQLModel):
@@ -42,6 +63,12 @@ class JobCreate(SQLModel):
     mode: ProcessingMode = Field(default=ProcessingMode.SINGLE)
 
 
+class RemeshRequest(SQLModel):
+    """Request model for re-meshing a completed job."""
+    depth_scale: float = Field(default=0.3, gt=0, le=2)
+    max_faces: int = Field(default=100000, ge=1000, le=2000000)
+
+
 class JobResponse(SQLModel):
     """Response model for job data."""
     id: str
@@ -49,6 +76,9 @@ class JobResponse(SQLModel):
     status: JobStatus
     progress: int
     error_message: Optional[str]
+    output_profile: OutputProfile
+    depth_detail: DepthDetail = DepthDetail.STANDARD
+    etag: Optional[str] = None
     created_at: datetime
     updated_at: datetime
     completed_at: Optional[datetime]
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Callable
+from typing import Any, Callable, Dict
 
 
 class BaseProcessor(ABC):
@@ -10,7 +10,9 @@ class BaseProcessor(ABC):
         self, 
         input_path: str, 
         output_path: str,
-        progress_callback: Callable[[int], None] = None
+        progress_callback: Callable[[int], None] = None,
+        output_profile: str = "standard",
+        depth_detail: str = "standard"
     ) -> bool:
         """
         Process an image to generate a 3D model.
@@ -19,6 +21,8 @@ class BaseProcessor(ABC):
             input_path: Path to input image
             output_path: Path to save output GLB
             progress_callback: Function to report progress (0-100)
+            output_profile: GLB encoding (standard, quantized, compressed)
+            depth_detail: Depth resolution (standard, high)
             
         Returns:
             True if successful, False otherwise
@@ -30,3 +34,8 @@ class BaseProcessor(ABC):
     def name(self) -> str:
         """Return processor name."""
         pass
+    
+    @property
+    def params(self) -> Dict[str, Any]:
+        """Parameters that affect the output (part of the result cache key)."""
+        return {}
@@ -1,18 +1,20 @@
 """
 Real AI Processor using Depth Estimation + Mesh Generation
 """
-import asyncio
 from pathlib import Path
-from typing import Callable, Optional
+from typing import Any, Callable, Dict, Optional
 
+from app.config import settings
 from app.processors.base import BaseProcessor
 
 
 class DepthProcessor(BaseProcessor):
     """Process images to 3D using depth estimation."""
     
-    def __init__(self):
-        self._depth_estimator = None
+    def __init__(self, depth_scale: float = 0.3, max_faces: int = 100000):
+        self.depth_scale = depth_scale
+        self.max_faces = max_faces
+        self._depth_batcher = None
         self._loaded = False
     
     @property
@@ -20,25 +22,48 @@ class DepthProcessor(BaseProcessor):
         """Return processor name."""
         return "depth"
     
+    @property
+    def params(self) -> Dict[str, Any]:
+        """Mesh parameters (part of the result cache key)."""
+        return {
+            "backend": settings.depth_backend,
+            "depth_scale": self.depth_scale,
+            "max_faces": self.max_faces,
+            "tessellation": settings.mesh_tessellation,
+            "lods": [settings.mesh_lod_low_faces, settings.mesh_lod_medium_faces],
+            # The budget can lower the high detail size (see working_size)
+            "high_detail_max_size": settings.high_detail_max_size,
+            "depth_tile_memory_mb": settings.depth_tile_memory_mb,
+            "texture": [
+                settings.texture_codec,
+                settings.texture_quality,
+                settings.texture_max_size,
+                settings.texture_power_of_two
+            ]
+        }
+    
     def _lazy_load(self):
         """Lazy load the depth estimator (heavy imports)."""
         if self._loaded:
             return
         
-        from app.services.depth_estimator import get_depth_estimator
-        self._depth_estimator = get_depth_estimator()
+        from app.services.depth_estimator import get_depth_batcher
+        self._depth_batcher = get_depth_batcher()
         self._loaded = True
     
     async def process(
         self,
         input_path: str,
         output_path: str,
-        progress_callback: Optional[Callable[[int], None]] = None
+        progress_callback: Optional[Callable[[int], None]] = None,
+        output_profile: str = "standard",
+        depth_detail: str = "standard"
     ) -> bool:
         """
         Process an image to 3D model.
         """
-        from app.services.mesh_generator import create_mesh_generator
+        from app.services.inference_pool import get_inference_pool
+        from app.services.mesh_generator import detail_mesh_size
         
         try:
             input_path = Path(input_path)
@@ -54,6 +79,10 @@ class DepthProcessor(BaseProcessor):
             print("Loading depth estimation model...")
             self._lazy_load()
             
+            # Decode once, at mesh resolution for depth and texture size for the texture
+            mesh_size = detail_mesh_size(depth_detail)
+            prepared = await get_inference_pool().prepare_image(input_path, mesh_size)
+            
             if progress_callback:
                 progress_callback(10)
             
@@ -62,13 +91,14 @@ class DepthProcessor(BaseProcessor):
             if progress_callback:
                 progress_callback(15)
             
-            # Run depth estimation in thread pool
-            loop = asyncio.get_event_loop()
-            depth_map = await loop.run_in_executor(
-                None,
-                self._depth_estimator.estimate,
-                input_path
-            )
+            if depth_detail == "high":
+                # Tiled, within the memory budget (not batched with other jobs)
+                depth_map = await get_inference_pool().estimate_tiled(
+                    prepared.pixels, settings.depth_tile_memory_mb
+                )
+            else:
+                # Run depth estimation (batched with concurrent jobs)
+                depth_map = await self._depth_batcher.estimate(prepared.pixels)
             
             print(f"Depth map shape: {depth_map.shape}")
             if progress_callback:
@@ -79,14 +109,17 @@ class DepthProcessor(BaseProcessor):
             if progress_callback:
                 progress_callback(55)
             
-            mesh_generator = create_mesh_generator(depth_scale=0.3)
-            
-            await loop.run_in_executor(
-                None,
-                mesh_generator.generate,
+            # Run mesh generation off the event loop
+            await get_inference_pool().generate_mesh(
                 input_path,
                 depth_map,
-                output_path
+                output_path,
+                depth_scale=self.depth_scale,
+                max_faces=self.max_faces,
+                depth_path=output_path.with_suffix(".npy"),
+                profile=output_profile,
+                texture=prepared.texture,
+                mesh_size=mesh_size
             )
             
             if progress_callback:
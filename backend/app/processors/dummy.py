@@ -21,9 +21,11 @@ class DummyProcessor(BaseProcessor):
         self, 
         input_path: str, 
         output_path: str,
-        progress_callback: Callable[[int], None] = None
+        progress_callback: Callable[[int], None] = None,
+        output_profile: str = "standard",
+        depth_detail: str = "standard"
     ) -> bool:
-        """Simulate processing by waiting and copying sample file."""
+        """Simulate processing by waiting and copying sample file (any profile or detail)."""
         try:
             # Simulate processing with progress updates
             steps = [10, 25, 40, 55, 70, 85, 95, 100]
@@ -1,17 +1,43 @@
+"""Services module."""
+import importlib
+
 from app.services.storage import storage
-from app.services.job_service import job_service
+from app.services.job_service import job_service, async_job_service
 from app.services.queue import job_queue
+from app.services.result_cache import result_cache
+from app.services.progress_bus import progress_bus
 from app.services.processor import process_job
-from app.services.depth_estimator import get_depth_estimator, DepthEstimator
-from app.services.mesh_generator import create_mesh_generator, MeshGenerator
+
+# Imported on first access, so the API starts without numpy-heavy meshing
+# code and without torch / transformers (loaded by the depth backends)
+_LAZY = {
+    "get_depth_estimator": "app.services.depth_estimator",
+    "get_depth_batcher": "app.services.depth_estimator",
+    "DepthEstimator": "app.services.depth_estimator",
+    "DepthBatcher": "app.services.depth_estimator",
+    "create_mesh_generator": "app.services.mesh_generator",
+    "MeshGenerator": "app.services.mesh_generator",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY:
+        return getattr(importlib.import_module(_LAZY[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "storage",
     "job_service",
+    "async_job_service",
     "job_queue",
+    "result_cache",
+    "progress_bus",
     "process_job",
     "get_depth_estimator",
     "DepthEstimator",
+    "get_depth_batcher",
+    "DepthBatcher",
     "create_mesh_generator",
     "MeshGenerator",
 ]
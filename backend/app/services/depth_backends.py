@@ -0,0 +1,147 @@
+"""
+Depth Backends: run the DPT forward pass on different CPU runtimes
+
+- torch:       eager PyTorch in fp32 (mps when available)
+- torch-int8:  PyTorch with dynamic int8 quantization of the linear layers
+               (the transformer blocks), quantized at load time
+- onnxruntime: the graph exported by scripts/export_depth_onnx.py, run with
+               all graph optimizations and IO binding
+
+Every backend takes the preprocessed ``pixel_values`` (B, 3, H, W) float32
+array and returns the raw ``predicted_depth`` (B, H, W) float32 array, so
+preprocessing and postprocessing stay in DepthEstimator.
+"""
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+import numpy as np
+
+DEPTH_BACKENDS = ("torch", "torch-int8", "onnxruntime")
+
+# ONNX graph input / output names (see scripts/export_depth_onnx.py)
+ONNX_INPUT = "pixel_values"
+ONNX_OUTPUT = "predicted_depth"
+
+
+class DepthBackend(ABC):
+    """Runs the depth model forward pass."""
+
+    name = "base"
+
+    @abstractmethod
+    def load(self, num_threads: int = 0):
+        """Load the model (num_threads > 0 pins the runtime's intra-op threads)."""
+        pass
+
+    @abstractmethod
+    def predict(self, pixel_values: np.ndarray) -> np.ndarray:
+        """Predicted depth (B, H, W) for a preprocessed batch (B, 3, H, W)."""
+        pass
+
+
+class TorchBackend(DepthBackend):
+    """Eager PyTorch, fp32."""
+
+    name = "torch"
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.model = None
+        self.device = "cpu"
+
+    def load(self, num_threads: int = 0):
+        import torch
+        from transformers import DPTForDepthEstimation
+
+        if num_threads:
+            torch.set_num_threads(num_threads)
+            try:
+                torch.set_num_interop_threads(1)
+            except RuntimeError:
+                pass  # Fixed once parallel work has started in this process
+
+        self.device = "mps" if torch.backends.mps.is_available() else "cpu"
+        self.model = DPTForDepthEstimation.from_pretrained(self.model_name)
+        self.model.eval()
+        self.model = self._prepare(self.model)
+        self.model.to(self.device)
+
+    def _prepare(self, model):
+        """Hook for subclasses to transform the loaded model."""
+        return model
+
+    def predict(self, pixel_values: np.ndarray) -> np.ndarray:
+        import torch
+
+        with torch.inference_mode():
+            inputs = torch.from_numpy(pixel_values).to(self.device)
+            return self.model(pixel_values=inputs).predicted_depth.float().cpu().numpy()
+
+
+class TorchInt8Backend(TorchBackend):
+    """
+    PyTorch with dynamic int8 quantization.
+
+    Weights of every nn.Linear are stored as int8 and activations are
+    quantized on the fly, so no calibration data is needed. The convolutional
+    backbone and head stay fp32. CPU only.
+    """
+
+    name = "torch-int8"
+
+    def _prepare(self, model):
+        import torch
+
+        self.device = "cpu"
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class OnnxRuntimeBackend(DepthBackend):
+    """ONNX Runtime on the CPU execution provider."""
+
+    name = "onnxruntime"
+
+    def __init__(self, model_path: Path):
+        self.model_path = Path(model_path)
+        self.session = None
+
+    def load(self, num_threads: int = 0):
+        import onnxruntime as ort
+
+        if not self.model_path.exists():
+            raise FileNotFoundError(
+                f"ONNX depth model not found at {self.model_path}; "
+                "run scripts/export_depth_onnx.py first"
+            )
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.inter_op_num_threads = 1
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+            # Several workers share the cores: don't busy-wait between ops
+            options.add_session_config_entry("session.intra_op.allow_spinning", "0")
+
+        self.session = ort.InferenceSession(
+            str(self.model_path), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+
+    def predict(self, pixel_values: np.ndarray) -> np.ndarray:
+        # Bind the numpy buffer directly instead of copying it into the run
+        binding = self.session.io_binding()
+        binding.bind_cpu_input(ONNX_INPUT, np.ascontiguousarray(pixel_values, dtype=np.float32))
+        binding.bind_output(ONNX_OUTPUT)
+        self.session.run_with_iobinding(binding)
+        return binding.copy_outputs_to_cpu()[0]
+
+
+def create_depth_backend(name: str, model_name: str, onnx_path: Path) -> DepthBackend:
+    """Backend for a DEPTH_BACKENDS name."""
+    if name == "torch":
+        return TorchBackend(model_name)
+    if name == "torch-int8":
+        return TorchInt8Backend(model_name)
+    if name == "onnxruntime":
+        return OnnxRuntimeBackend(onnx_path)
+    raise ValueError(f"Unknown depth backend: {name} (expected one of {', '.join(DEPTH_BACKENDS)})")
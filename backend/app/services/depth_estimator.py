@@ -2,36 +2,122 @@
 Depth Estimation using DPT (Dense Prediction Transformer)
 Uses Hugging Face transformers with Intel DPT model
 """
+import asyncio
+import ctypes
+import gc
+import threading
+import time
+from typing import Awaitable, Callable, List, Optional, Tuple
+
 import numpy as np
 from PIL import Image
 from pathlib import Path
-import torch
-from transformers import DPTImageProcessor, DPTForDepthEstimation
+
+from app.config import settings
+from app.services.metrics import DEPTH_INFERENCE_SECONDS, MODEL_LOAD_SECONDS
+from app.services.depth_backends import create_depth_backend
+from app.services.depth_preprocess import DptInputSpec, DptPreprocessor
+from app.services.depth_tiling import TileBlender, align_to_reference, plan_tiles
+
+DEPTH_MODEL = "Intel/dpt-hybrid-midas"
+
+# Side of the blank image used for the warm-up pass
+WARMUP_SIZE = 384
+
+
+def _release_free_memory():
+    """Hand freed heap pages back to the OS (glibc only; no-op elsewhere)."""
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
 
 class DepthEstimator:
     """Estimates depth maps from single images using DPT model"""
     
-    def __init__(self):
-        self.device = "mps" if torch.backends.mps.is_available() else "cpu"
-        self.model = None
+    def __init__(self, backend: str = "torch", onnx_path: Optional[Path] = None):
+        self.backend_name = backend
+        self.onnx_path = onnx_path
+        self.backend = None
         self.processor = None
+        self.preprocessor = None
         self._loaded = False
+        # Guards load / unload; callers keep their own references while running
+        self._lock = threading.Lock()
     
-    def load_model(self):
+    @property
+    def loaded(self) -> bool:
+        """Whether the model is in memory."""
+        return self._loaded
+    
+    def load_model(self, num_threads: int = 0):
         """Lazy load the model (only when first needed)"""
-        if self._loaded:
-            return
+        self._ensure_loaded(num_threads)
+    
+    def _ensure_loaded(self, num_threads: int = 0):
+        """Load if needed and return (preprocessor, backend) for one run."""
+        with self._lock:
+            if not self._loaded:
+                print(f"Loading depth estimation model ({self.backend_name})...")
+                start = time.perf_counter()
+                from transformers import DPTImageProcessor
+                
+                # The HF processor only supplies the input contract; inputs
+                # are built by the vectorized DptPreprocessor
+                self.processor = DPTImageProcessor.from_pretrained(DEPTH_MODEL)
+                self.preprocessor = DptPreprocessor(DptInputSpec.from_processor(self.processor))
+                self.backend = create_depth_backend(self.backend_name, DEPTH_MODEL, self.onnx_path)
+                self.backend.load(num_threads)
+                
+                self._loaded = True
+                MODEL_LOAD_SECONDS.observe(time.perf_counter() - start)
+                print(f"✓ Depth model loaded ({self.backend_name})")
+            
+            return self.preprocessor, self.backend
+    
+    def unload(self, on_unload: Optional[Callable[[], None]] = None) -> bool:
+        """
+        Drop the model to free its memory (reloaded on next use).
+        
+        ``on_unload`` runs under the load lock once the model is dropped, so
+        a load that starts meanwhile always comes after it.
         
-        print("Loading depth estimation model...")
-        model_name = "Intel/dpt-hybrid-midas"
+        Returns:
+            True if a loaded model was dropped
+        """
+        with self._lock:
+            if not self._loaded:
+                return False
+            
+            # A batch already running keeps its own reference until it ends
+            self.processor = None
+            self.preprocessor = None
+            self.backend = None
+            self._loaded = False
+            if on_unload is not None:
+                on_unload()
         
-        self.processor = DPTImageProcessor.from_pretrained(model_name)
-        self.model = DPTForDepthEstimation.from_pretrained(model_name)
-        self.model.to(self.device)
-        self.model.eval()
+        gc.collect()
+        _release_free_memory()
+        print(f"✓ Depth model unloaded ({self.backend_name})")
+        return True
+    
+    def warm_up(self) -> dict:
+        """
+        Load the model and run one throwaway forward pass, so the first real
+        request doesn't pay for one-time allocations and kernel selection.
         
-        self._loaded = True
-        print(f"✓ Depth model loaded on {self.device}")
+        Returns:
+            Seconds spent loading (0 if already loaded) and on the warm-up pass
+        """
+        start = time.perf_counter()
+        self.load_model()
+        loaded = time.perf_counter()
+        self.estimate_images([Image.new("RGB", (WARMUP_SIZE, WARMUP_SIZE), (128, 128, 128))])
+        done = time.perf_counter()
+        print(f"✓ Depth model warmed up in {done - loaded:.2f}s")
+        return {"load_seconds": loaded - start, "warmup_seconds": done - loaded}
     
     def estimate(self, image_path: str | Path) -> np.ndarray:
         """
@@ -43,39 +129,208 @@ class DepthEstimator:
         Returns:
             Depth map as numpy array (H, W) with values 0-1
         """
-        self.load_model()
+        return self.estimate_batch([image_path])[0]
+    
+    def estimate_batch(self, image_paths: List[str | Path]) -> List[np.ndarray]:
+        """
+        Estimate depth for several images in one forward pass
         
-        # Load and prepare image
-        image = Image.open(image_path).convert("RGB")
-        original_size = image.size  # (W, H)
+        The processor resizes every image to the fixed DPT input size, so
+        images of different sizes can share a batch.
         
-        # Process image for model
-        inputs = self.processor(images=image, return_tensors="pt")
-        inputs = {k: v.to(self.device) for k, v in inputs.items()}
+        Args:
+            image_paths: Paths to input images
+            
+        Returns:
+            One depth map per image, each (H, W) at its original size with values 0-1
+        """
+        # Load and prepare images
+        images = [Image.open(path).convert("RGB") for path in image_paths]
+        return self.estimate_images(images)
+    
+    def estimate_images(self, images: List[Image.Image | np.ndarray]) -> List[np.ndarray]:
+        """
+        Estimate depth for decoded RGB images in one forward pass
         
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-            predicted_depth = outputs.predicted_depth
+        Each depth map comes back at its image's size, so images decoded at
+        mesh resolution (see prepare_image) get mesh resolution maps without
+        any full-size intermediate.
         
-        # Interpolate to original size
-        prediction = torch.nn.functional.interpolate(
-            predicted_depth.unsqueeze(1),
-            size=(original_size[1], original_size[0]),  # (H, W)
-            mode="bicubic",
-            align_corners=False,
-        ).squeeze()
+        Args:
+            images: PIL images or (H, W, 3) uint8 arrays
+            
+        Returns:
+            One depth map per image, each (H, W) with values 0-1
+        """
+        images = [Image.fromarray(image) if isinstance(image, np.ndarray) else image for image in images]
+        preprocessor, backend = self._ensure_loaded()
         
-        # Convert to numpy and normalize to 0-1
-        depth_map = prediction.cpu().numpy()
+        with DEPTH_INFERENCE_SECONDS.time():
+            # One forward pass per input size (a single one unless the model
+            # keeps the aspect ratio)
+            predicted_depth = [None] * len(images)
+            for indices in preprocessor.group_by_input_size(images):
+                pixel_values = preprocessor([images[i] for i in indices])
+                for i, prediction in zip(indices, backend.predict(pixel_values)):
+                    predicted_depth[i] = prediction
+            
+            # Interpolate each to its image size (W, H)
+            return [
+                self._normalize(self._resize_prediction(prediction, image.size))
+                for image, prediction in zip(images, predicted_depth)
+            ]
+    
+    def estimate_tiled(self, image: Image.Image | np.ndarray, memory_budget_mb: float) -> np.ndarray:
+        """
+        Estimate high detail depth from overlapping tiles
+        
+        Tiles of the model's input size are inferred at native resolution,
+        fitted to a global pass and blended (see depth_tiling). Tiles run
+        in batches sized to the memory budget; an image no larger than one
+        tile gets a single pass.
+        
+        Args:
+            image: PIL image or (H, W, 3) uint8 array, at the working resolution
+            memory_budget_mb: Memory for inference in MB (sets tiles per pass)
+            
+        Returns:
+            Depth map (H, W) with values 0-1
+        """
+        if isinstance(image, np.ndarray):
+            image = Image.fromarray(image)
+        preprocessor, backend = self._ensure_loaded()
+        
+        tw, th = min(preprocessor.spec.width, image.width), min(preprocessor.spec.height, image.height)
+        plan = plan_tiles(image.size, (tw, th), memory_budget_mb)
+        if len(plan.origins) == 1:
+            return self.estimate_images([image])[0]
+        
+        print(
+            f"Tiled depth: {image.width}x{image.height}, {len(plan.origins)} tiles of "
+            f"{tw}x{th}, {plan.batch_size} per pass"
+        )
+        
+        with DEPTH_INFERENCE_SECONDS.time():
+            # Coarse layout from one pass over the whole image
+            reference = self._resize_prediction(backend.predict(preprocessor([image]))[0], image.size)
+            
+            blender = TileBlender(plan)
+            for start in range(0, len(plan.origins), plan.batch_size):
+                origins = plan.origins[start:start + plan.batch_size]
+                tiles = [image.crop((x, y, x + tw, y + th)) for x, y in origins]
+                for (x, y), prediction in zip(origins, backend.predict(preprocessor(tiles))):
+                    prediction = self._resize_prediction(prediction, (tw, th))
+                    blender.add((x, y), align_to_reference(prediction, reference[y:y + th, x:x + tw]))
+            
+            return self._normalize(blender.result())
+    
+    @staticmethod
+    def _resize_prediction(prediction: np.ndarray, size: Tuple[int, int]) -> np.ndarray:
+        """Bicubic resize of a raw prediction to (W, H)."""
+        prediction = np.asarray(prediction, dtype=np.float32)
+        if prediction.shape == (size[1], size[0]):
+            return prediction
+        return np.asarray(Image.fromarray(prediction).resize(size, Image.BICUBIC))
+    
+    @staticmethod
+    def _normalize(depth_map: np.ndarray) -> np.ndarray:
+        """Normalize a depth map to 0-1"""
         depth_min = depth_map.min()
         depth_max = depth_map.max()
         
         if depth_max - depth_min > 0:
-            depth_map = (depth_map - depth_min) / (depth_max - depth_min)
-        else:
-            depth_map = np.zeros_like(depth_map)
+            return (depth_map - depth_min) / (depth_max - depth_min)
+        return np.zeros_like(depth_map)
+
+
+class DepthBatcher:
+    """
+    Collects concurrent depth requests into micro-batches
+    
+    The first pending request opens a window of ``max_wait_ms``; everything
+    that arrives before it closes (up to ``max_batch_size``) runs in one
+    forward pass. Up to ``concurrency`` batches run at once; requests arriving
+    meanwhile form the next batch.
+    """
+    
+    def __init__(
+        self,
+        run_batch: Callable[[List[np.ndarray]], Awaitable[List[np.ndarray]]],
+        max_batch_size: int = 4,
+        max_wait_ms: int = 20,
+        concurrency: int = 1
+    ):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0, max_wait_ms)
+        self.concurrency = max(1, concurrency)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+    
+    async def estimate(self, image: np.ndarray) -> np.ndarray:
+        """Queue a decoded (H, W, 3) image and wait for its (H, W) depth map"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((image, future))
+        return await future
+    
+    async def _collect(self) -> list:
+        """Wait for one request, then gather more until the window closes"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait_ms / 1000
+        
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        
+        return batch
+    
+    async def _run(self):
+        """Batch loop (runs for the lifetime of the event loop)"""
+        slots = asyncio.Semaphore(self.concurrency)
+        
+        while True:
+            await slots.acquire()
+            batch = await self._collect()
+            task = asyncio.create_task(self._dispatch(batch))
+            task.add_done_callback(lambda _: slots.release())
+    
+    async def _dispatch(self, batch: list):
+        """Run one batch and resolve its futures"""
+        images = [image for image, _ in batch]
+        
+        try:
+            depth_maps = await self.run_batch(images)
+            results = list(zip(batch, depth_maps))
+        except Exception as e:
+            if len(batch) == 1:
+                if not batch[0][1].done():
+                    batch[0][1].set_exception(e)
+                return
+            
+            # Retry one by one so a single bad image fails only its own job
+            print(f"Depth batch of {len(batch)} failed ({e}), retrying individually")
+            results = []
+            for item in batch:
+                try:
+                    depth_map = (await self.run_batch([item[0]]))[0]
+                    results.append((item, depth_map))
+                except Exception as item_error:
+                    if not item[1].done():
+                        item[1].set_exception(item_error)
         
-        return depth_map
+        for (_, future), depth_map in results:
+            if not future.done():
+                future.set_result(depth_map)
 
 
 _depth_estimator = None
@@ -84,5 +339,25 @@ def get_depth_estimator() -> DepthEstimator:
     """Get or create the global depth estimator instance"""
     global _depth_estimator
     if _depth_estimator is None:
-        _depth_estimator = DepthEstimator()
+        _depth_estimator = DepthEstimator(
+            backend=settings.depth_backend,
+            onnx_path=Path(settings.depth_onnx_path)
+        )
     return _depth_estimator
+
+
+_depth_batcher = None
+
+def get_depth_batcher() -> DepthBatcher:
+    """Get or create the global depth batching front-end"""
+    global _depth_batcher
+    if _depth_batcher is None:
+        from app.services.inference_pool import get_inference_pool
+        pool = get_inference_pool()
+        _depth_batcher = DepthBatcher(
+            pool.estimate_batch,
+            max_batch_size=settings.depth_batch_size,
+            max_wait_ms=settings.depth_batch_wait_ms,
+            concurrency=pool.workers,
+        )
+    return _depth_batcher
@@ -0,0 +1,117 @@
+"""
+Depth Preprocessing: build the DPT model input directly as a float32 batch
+
+Does what the Hugging Face DPTImageProcessor does for depth inference
+(resize, rescale, mean / std normalize, channels first), without its
+per-call validation, format inference and float64 intermediates. Each
+image is resized as uint8 with the same PIL filter, then each channel
+is scaled and shifted in float32 straight into its plane of a
+preallocated (B, 3, H, W) array.
+
+The input contract (size, aspect handling, multiple, mean / std) is read
+from the model's processor config once, so both stay in step;
+scripts/check_depth_preprocess.py compares the two.
+"""
+import math
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+
+@dataclass(frozen=True)
+class DptInputSpec:
+    """The DPT input contract (defaults: Intel/dpt-hybrid-midas)."""
+    height: int = 384
+    width: int = 384
+    keep_aspect_ratio: bool = False
+    ensure_multiple_of: int = 1
+    resample: int = Image.BICUBIC
+    rescale_factor: float = 1 / 255
+    image_mean: Tuple[float, ...] = (0.5, 0.5, 0.5)
+    image_std: Tuple[float, ...] = (0.5, 0.5, 0.5)
+
+    @classmethod
+    def from_processor(cls, processor) -> "DptInputSpec":
+        """Contract of a loaded DPTImageProcessor."""
+        size = processor.size
+        height, width = (size["height"], size["width"]) if isinstance(size, dict) else (size.height, size.width)
+        return cls(
+            height=height,
+            width=width,
+            keep_aspect_ratio=bool(processor.keep_aspect_ratio),
+            ensure_multiple_of=int(processor.ensure_multiple_of or 1),
+            resample=int(processor.resample),
+            rescale_factor=float(processor.rescale_factor) if processor.do_rescale else 1.0,
+            image_mean=tuple(processor.image_mean) if processor.do_normalize else (0.0, 0.0, 0.0),
+            image_std=tuple(processor.image_std) if processor.do_normalize else (1.0, 1.0, 1.0),
+        )
+
+
+def _constrain_to_multiple_of(value: float, multiple: int) -> int:
+    """Round to a multiple, as DPT does (never below zero)."""
+    rounded = round(value / multiple) * multiple
+    if rounded < 0:
+        rounded = math.ceil(value / multiple) * multiple
+    return int(rounded)
+
+
+class DptPreprocessor:
+    """Turns RGB images into the DPT ``pixel_values`` batch."""
+
+    def __init__(self, spec: DptInputSpec = DptInputSpec()):
+        self.spec = spec
+        std = np.asarray(spec.image_std, dtype=np.float64)
+        # (x * rescale - mean) / std  ==  x * scale + offset, per channel
+        self._scale = (spec.rescale_factor / std).astype(np.float32)
+        self._offset = (-np.asarray(spec.image_mean, dtype=np.float64) / std).astype(np.float32)
+
+    def input_size(self, size: Tuple[int, int]) -> Tuple[int, int]:
+        """Model input (w, h) for an image of the given (w, h)."""
+        w, h = size
+        scale_w, scale_h = self.spec.width / w, self.spec.height / h
+
+        if self.spec.keep_aspect_ratio:
+            # Scale as little as possible
+            if abs(1 - scale_w) < abs(1 - scale_h):
+                scale_h = scale_w
+            else:
+                scale_w = scale_h
+
+        multiple = self.spec.ensure_multiple_of
+        return (
+            _constrain_to_multiple_of(scale_w * w, multiple),
+            _constrain_to_multiple_of(scale_h * h, multiple),
+        )
+
+    def __call__(self, images: Sequence[Image.Image]) -> np.ndarray:
+        """
+        ``pixel_values`` (B, 3, H, W) float32 for RGB images.
+
+        Raises:
+            ValueError: if the images map to different input sizes (only
+                possible with keep_aspect_ratio; see group_by_input_size)
+        """
+        sizes = {self.input_size(image.size) for image in images}
+        if len(sizes) != 1:
+            raise ValueError(f"Images map to different input sizes: {sorted(sizes)}")
+        w, h = sizes.pop()
+
+        batch = np.empty((len(images), 3, h, w), dtype=np.float32)
+        for slot, image in zip(batch, images):
+            if image.size != (w, h):
+                image = image.resize((w, h), self.spec.resample)
+            pixels = np.asarray(image)
+            # Channel planes straight into the slot (no HWC float copy)
+            for channel in range(3):
+                np.multiply(pixels[:, :, channel], self._scale[channel], out=slot[channel])
+                slot[channel] += self._offset[channel]
+        return batch
+
+    def group_by_input_size(self, images: Sequence[Image.Image]) -> List[List[int]]:
+        """Indices of images that can share a batch, in order of first appearance."""
+        groups = {}
+        for index, image in enumerate(images):
+            groups.setdefault(self.input_size(image.size), []).append(index)
+        return list(groups.values())
@@ -0,0 +1,194 @@
+"""
+Depth Tiling: high detail depth maps from overlapping tiles
+
+DPT sees every image at its fixed input size (384 px), so fine structure
+in a large photo is lost. For high detail jobs the image is instead cut
+into overlapping tiles of the model's input size, each inferred at
+native resolution:
+
+1. A global pass over the whole image gives the coarse layout.
+2. Tiles are inferred in batches sized to the memory budget.
+3. Each tile's prediction is only defined up to scale and shift, so it
+   is fitted (least squares) to the global prediction over the same
+   pixels.
+4. Tiles are blended with weights that ramp down across the overlaps, so
+   no seams show.
+
+Memory depends only on the working resolution and the number of tiles per
+batch, never on the upload size. The working resolution is capped so that
+one tile per pass, and meshing the result, fit the budget (working_size).
+"""
+import math
+from dataclasses import dataclass
+from typing import List, Tuple
+
+import numpy as np
+
+# Share of the tile size that neighbouring tiles overlap
+TILE_OVERLAP = 0.25
+
+# Side of the model input (DPT), which is the tile size
+TILE_SIZE = 384
+
+# Forward pass memory in MB at the 384x384 input: fixed, and per tile in
+# the batch (fp32 torch; the DPT head's full resolution features dominate)
+FORWARD_BASE_MB = 100
+TILE_MEMORY_MB = 160
+TILE_MEMORY_AREA = TILE_SIZE * TILE_SIZE
+
+# Float32 planes kept at the working resolution (global reference, blended
+# depth, blend weights) plus the RGB image itself
+WORKING_BYTES_PER_PIXEL = 3 * 4 + 3
+
+# Peak memory per grid pixel while meshing the depth map, for the costlier
+# full grid tessellation (float64 vertices, int64 faces and the decimated
+# copies: about 290MB for a 1536x1536 grid; adaptive needs under half)
+MESH_BYTES_PER_PIXEL = 128
+
+
+@dataclass(frozen=True)
+class TilePlan:
+    """Where the tiles go and how many run per forward pass."""
+    size: Tuple[int, int]          # Image (w, h)
+    tile: Tuple[int, int]          # Tile (w, h), the model input size
+    origins: List[Tuple[int, int]]  # Top-left (x, y) of each tile
+    overlap: Tuple[int, int]       # Nominal overlap (x, y) in pixels
+    batch_size: int
+
+
+def tile_origins(length: int, tile: int, overlap: int) -> List[int]:
+    """Tile starts along one axis, spread evenly so the last tile ends at the edge."""
+    if length <= tile:
+        return [0]
+    count = math.ceil((length - tile) / max(1, tile - overlap)) + 1
+    return [round(i * (length - tile) / (count - 1)) for i in range(count)]
+
+
+def _tile_mb(tile: Tuple[int, int]) -> float:
+    """Forward pass memory per tile in the batch."""
+    return TILE_MEMORY_MB * tile[0] * tile[1] / TILE_MEMORY_AREA
+
+
+def min_memory_mb(size: Tuple[int, int], tile: Tuple[int, int]) -> float:
+    """Smallest budget for an image: one tile per pass, then meshing the result."""
+    pixels = size[0] * size[1]
+    inference_mb = pixels * WORKING_BYTES_PER_PIXEL / 2 ** 20 + FORWARD_BASE_MB + _tile_mb(tile)
+    return max(inference_mb, pixels * MESH_BYTES_PER_PIXEL / 2 ** 20)
+
+
+def working_size(max_size: int, memory_budget_mb: float) -> int:
+    """
+    Longest side, at most ``max_size``, at which an image fits the budget.
+
+    Sized for a square image, the most pixels a side allows. Raises
+    ValueError if the budget does not fit even one tile.
+    """
+    tile_mb = _tile_mb((TILE_SIZE, TILE_SIZE))
+    pixels = min(
+        (memory_budget_mb - FORWARD_BASE_MB - tile_mb) / WORKING_BYTES_PER_PIXEL,
+        memory_budget_mb / MESH_BYTES_PER_PIXEL,
+    ) * 2 ** 20
+    side = min(max_size, math.isqrt(max(0, int(pixels))))
+
+    smallest = min(max_size, TILE_SIZE)
+    if side < smallest:
+        needed = min_memory_mb((smallest, smallest), (smallest, smallest))
+        raise ValueError(
+            f"Tile memory budget of {memory_budget_mb:.0f}MB is too small for high detail "
+            f"depth (needs at least {math.ceil(needed)}MB)"
+        )
+    return side
+
+
+def plan_tiles(size: Tuple[int, int], tile: Tuple[int, int], memory_budget_mb: float) -> TilePlan:
+    """
+    Tile layout for an image, with batches as large as the budget allows.
+
+    Raises ValueError if one tile per pass (and meshing) would not fit; see
+    working_size for the largest image that does.
+    """
+    w, h = size
+    needed = min_memory_mb(size, tile)
+    if needed > memory_budget_mb:
+        raise ValueError(
+            f"{w}x{h} needs at least {math.ceil(needed)}MB for tiled depth, "
+            f"over the {memory_budget_mb:.0f}MB budget"
+        )
+
+    overlap = (round(tile[0] * TILE_OVERLAP), round(tile[1] * TILE_OVERLAP))
+    origins = [
+        (x, y)
+        for y in tile_origins(h, tile[1], overlap[1])
+        for x in tile_origins(w, tile[0], overlap[0])
+    ]
+
+    working_mb = w * h * WORKING_BYTES_PER_PIXEL / 2 ** 20
+    batch_size = int((memory_budget_mb - working_mb - FORWARD_BASE_MB) // _tile_mb(tile))
+
+    return TilePlan(
+        size=size,
+        tile=tile,
+        origins=origins,
+        overlap=overlap,
+        batch_size=min(len(origins), batch_size),
+    )
+
+
+def _ramp(length: int, overlap: int, start: bool, end: bool) -> np.ndarray:
+    """1-D blend weights: rising over the overlap at each inner edge."""
+    weights = np.ones(length, dtype=np.float32)
+    if overlap > 0:
+        rise = np.arange(1, overlap + 1, dtype=np.float32) / (overlap + 1)
+        if start:
+            weights[:overlap] = np.minimum(weights[:overlap], rise)
+        if end:
+            weights[-overlap:] = np.minimum(weights[-overlap:], rise[::-1])
+    return weights
+
+
+def align_to_reference(prediction: np.ndarray, reference: np.ndarray) -> np.ndarray:
+    """
+    Scale and shift a tile prediction to best match the reference (least
+    squares). Tiles with no usable fit (flat, or inverted) take the
+    reference as-is.
+    """
+    p = prediction.astype(np.float64).ravel()
+    r = reference.astype(np.float64).ravel()
+    p_mean, r_mean = p.mean(), r.mean()
+    variance = np.dot(p - p_mean, p - p_mean)
+    if variance <= 1e-12:
+        return reference.astype(np.float32)
+
+    scale = np.dot(p - p_mean, r - r_mean) / variance
+    if scale <= 0:
+        return reference.astype(np.float32)
+    return (prediction * np.float32(scale) + np.float32(r_mean - scale * p_mean)).astype(np.float32)
+
+
+class TileBlender:
+    """Accumulates aligned tiles into one depth map."""
+
+    def __init__(self, plan: TilePlan):
+        self.plan = plan
+        w, h = plan.size
+        self.depth = np.zeros((h, w), dtype=np.float32)
+        self.weight = np.zeros((h, w), dtype=np.float32)
+
+    def add(self, origin: Tuple[int, int], tile_depth: np.ndarray):
+        """Blend in one aligned tile at its origin."""
+        x, y = origin
+        th, tw = tile_depth.shape
+        w, h = self.plan.size
+        overlap_x, overlap_y = self.plan.overlap
+
+        window = (
+            _ramp(th, overlap_y, y > 0, y + th < h)[:, None]
+            * _ramp(tw, overlap_x, x > 0, x + tw < w)[None, :]
+        )
+        self.depth[y:y + th, x:x + tw] += tile_depth * window
+        self.weight[y:y + th, x:x + tw] += window
+
+    def result(self) -> np.ndarray:
+        """The blended depth map (tiles cover every pixel)."""
+        np.divide(self.depth, self.weight, out=self.depth, where=self.weight > 0)
+        return self.depth
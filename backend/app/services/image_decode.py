@@ -0,0 +1,54 @@
+"""
+Image Decoding: decode uploads at the resolution that is actually needed
+
+Nothing in the pipeline uses a large photo at full size (the mesh is at most
+512 px per side, the texture at most ``texture_max_size``), so uploads are
+decoded straight to a reduced size: JPEG with DCT scaling (``Image.draft``,
+1/2 to 1/8 of the size at a fraction of the cost) and other formats with a
+box reduction (``Image.reduce``) right after decoding. A 6000x4000 JPEG then
+never exists in memory as 72MB of pixels.
+"""
+from pathlib import Path
+from typing import Tuple
+
+from PIL import Image
+
+# Modes Image.reduce works on directly (others are converted first)
+REDUCIBLE_MODES = ("RGB", "RGBA", "L", "LA", "CMYK", "YCbCr")
+
+
+def fit_size(size: Tuple[int, int], max_size: int) -> Tuple[int, int]:
+    """Size scaled down (never up) so that its longer side is at most max_size."""
+    w, h = size
+    if max(w, h) <= max_size:
+        return w, h
+    scale = max_size / max(w, h)
+    return max(1, int(w * scale)), max(1, int(h * scale))
+
+
+def decode_image(image_path: str | Path, min_size: Tuple[int, int]) -> Image.Image:
+    """
+    Decode an image as RGB at a reduced size of at least ``min_size`` (w, h).
+
+    The result keeps the aspect ratio and is between ``min_size`` and twice
+    that (or the full size, if smaller); callers resize it the rest of the
+    way with a proper filter.
+    """
+    image = Image.open(image_path)
+    w, h = image.size
+    need_w, need_h = min(min_size[0], w), min(min_size[1], h)
+
+    if image.format == "JPEG":
+        # Scale is picked so the result still covers the requested size
+        image.draft("RGB", (need_w, need_h))
+
+    factor = min(image.size[0] // max(1, need_w), image.size[1] // max(1, need_h))
+    if factor >= 2:
+        if image.mode not in REDUCIBLE_MODES:
+            image = image.convert("RGB")
+        image = image.reduce(factor)
+
+    if image.mode != "RGB":
+        return image.convert("RGB")
+    image.load()
+    return image
@@ -0,0 +1,536 @@
+"""
+Inference Pool: runs depth inference and meshing off the event loop
+
+With ``inference_workers = 0`` work runs in the default thread pool of the
+API process. Otherwise a pool of spawned worker processes is used; each one
+loads the DPT model once at startup and sizes the inference runtime's
+intra-op threads so the workers together use all cores without
+oversubscribing them.
+
+Each upload is decoded once (``prepare_image``): the mesh resolution pixels
+feed the depth model and the encoded texture goes to meshing. Images and
+depth maps cross the process boundary through ``multiprocessing.shared_memory``
+blocks rather than pickled arrays. Meshes never come back at all: the worker
+writes the GLB straight to its output path. Re-meshing reads the stored depth
+map memory-mapped from disk, so no shared memory is needed there. Stage
+timings recorded in a worker (see metrics) come back with each task's result.
+
+The pool also tracks the model's state: it can be preloaded and warmed up
+at startup (``depth_preload``) and freed after ``depth_idle_unload_seconds``
+without work, then loaded again by the next job.
+"""
+import asyncio
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.services import metrics
+from app.services.texture import EncodedTexture
+
+
+@dataclass(frozen=True)
+class SharedArray:
+    """Handle to a numpy array stored in a shared memory block."""
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+def _to_shared(array: np.ndarray) -> SharedArray:
+    """Copy an array into a new shared memory block (left linked)."""
+    array = np.ascontiguousarray(array)
+    shm = SharedMemory(create=True, size=max(array.nbytes, 1))
+    try:
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    finally:
+        shm.close()
+    return SharedArray(name=shm.name, shape=array.shape, dtype=array.dtype.str)
+
+
+def _from_shared(ref: SharedArray, unlink: bool = False) -> np.ndarray:
+    """Copy an array out of a shared memory block, optionally freeing it."""
+    shm = SharedMemory(name=ref.name)
+    try:
+        view = np.ndarray(ref.shape, dtype=np.dtype(ref.dtype), buffer=shm.buf)
+        array = view.copy()
+        del view
+    finally:
+        shm.close()
+        if unlink:
+            shm.unlink()
+    return array
+
+
+def _unlink_shared(ref: SharedArray):
+    """Free a shared memory block."""
+    try:
+        shm = SharedMemory(name=ref.name)
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()
+
+
+# --- Worker process side ---
+
+def _init_worker(num_threads: int):
+    """Pool initializer: load the model once, with the worker's thread share."""
+    from app.services.depth_estimator import get_depth_estimator
+    metrics.forward_to_parent()
+    get_depth_estimator().load_model(num_threads)
+    print(f"✓ Inference worker {os.getpid()} ready ({num_threads} threads)")
+
+
+def _run_task(fn, *args):
+    """Run a pool task and return its result with the metrics it recorded."""
+    return fn(*args), metrics.drain()
+
+
+def _warm_up_worker() -> dict:
+    """Run the warm-up pass in a worker (the initializer already loaded the model)."""
+    from app.services.depth_estimator import get_depth_estimator
+    return get_depth_estimator().warm_up()
+
+
+def _prepare_image_worker(image_path: str, mesh_size: Optional[int]) -> Tuple[SharedArray, EncodedTexture]:
+    """Decode an upload and publish its mesh resolution pixels to shared memory."""
+    prepared = _prepare_image_local(image_path, mesh_size)
+    return _to_shared(prepared.pixels), prepared.texture
+
+
+def _estimate_batch_worker(image_refs: List[SharedArray]) -> List[SharedArray]:
+    """Run a depth batch on images in shared memory and publish each map."""
+    from app.services.depth_estimator import get_depth_estimator
+    images = [_from_shared(ref) for ref in image_refs]
+    depth_maps = get_depth_estimator().estimate_images(images)
+    return [_to_shared(depth_map) for depth_map in depth_maps]
+
+
+def _estimate_tiled_worker(image_ref: SharedArray, memory_budget_mb: float) -> SharedArray:
+    """Run tiled depth on an image in shared memory and publish the map."""
+    return _to_shared(_estimate_tiled_local(_from_shared(image_ref), memory_budget_mb))
+
+
+def _generate_mesh_worker(
+    image_path: str,
+    depth_ref: SharedArray,
+    output_path: str,
+    depth_scale: float,
+    max_faces: int,
+    depth_path: Optional[str],
+    profile: Optional[str],
+    texture: Optional[EncodedTexture] = None,
+    mesh_size: Optional[int] = None
+) -> str:
+    """Build and export a mesh from a depth map in shared memory."""
+    depth_map = _from_shared(depth_ref)
+    return _generate_mesh_local(
+        image_path, depth_map, output_path, depth_scale, max_faces, depth_path, profile, texture, mesh_size
+    )
+
+
+def _prepare_image_local(image_path: str, mesh_size: Optional[int] = None):
+    """Decode an upload once for depth estimation and the texture, in this process."""
+    from app.services.mesh_generator import MESH_MAX_SIZE, prepare_image, texture_options
+    return prepare_image(Path(image_path), texture_options(), mesh_size or MESH_MAX_SIZE)
+
+
+def _estimate_batch_local(images: List[np.ndarray]) -> List[np.ndarray]:
+    """Run a depth batch in this process."""
+    from app.services.depth_estimator import get_depth_estimator
+    return get_depth_estimator().estimate_images(images)
+
+
+def _estimate_tiled_local(image: np.ndarray, memory_budget_mb: float) -> np.ndarray:
+    """Run tiled depth in this process."""
+    from app.services.depth_estimator import get_depth_estimator
+    return get_depth_estimator().estimate_tiled(image, memory_budget_mb)
+
+
+def _warm_up_local() -> dict:
+    """Load the model and run the warm-up pass in this process."""
+    from app.services.depth_estimator import get_depth_estimator
+    return get_depth_estimator().warm_up()
+
+
+def _unload_local(on_unload: Callable[[], None]) -> bool:
+    """Free the model in this process (True if it was loaded)."""
+    from app.services.depth_estimator import get_depth_estimator
+    return get_depth_estimator().unload(on_unload)
+
+
+def _generate_mesh_local(
+    image_path: str,
+    depth_map: np.ndarray,
+    output_path: str,
+    depth_scale: float,
+    max_faces: int,
+    depth_path: Optional[str],
+    profile: Optional[str],
+    texture: Optional[EncodedTexture] = None,
+    mesh_size: Optional[int] = None
+) -> str:
+    """Build and export a mesh in this process."""
+    from app.services.mesh_generator import create_mesh_generator
+    mesh_generator = create_mesh_generator(
+        depth_scale=depth_scale, max_faces=max_faces, profile=profile, mesh_size=mesh_size
+    )
+    return str(mesh_generator.generate(
+        Path(image_path),
+        depth_map,
+        Path(output_path),
+        depth_path=Path(depth_path) if depth_path else None,
+        texture=texture
+    ))
+
+
+def _remesh(
+    image_path: str,
+    depth_path: str,
+    output_path: str,
+    depth_scale: float,
+    max_faces: int,
+    profile: Optional[str]
+) -> str:
+    """Rebuild a GLB from a stored depth map (runs in either process)."""
+    from app.services.mesh_generator import create_mesh_generator, lod_path
+    depth_map = np.load(depth_path, mmap_mode="r")
+    # The stored map is already at the job's mesh resolution
+    mesh_generator = create_mesh_generator(
+        depth_scale=depth_scale, max_faces=max_faces, profile=profile, mesh_size=max(depth_map.shape)
+    )
+
+    # Write next to the targets and swap in, so readers (and hard links to
+    # the old files from cached jobs) never see a partial GLB; the name is
+    # unique so concurrent re-meshes of a job never share temp files
+    output_path = Path(output_path)
+    tmp_path = output_path.with_name(f".{output_path.stem}.{uuid.uuid4().hex}.tmp")
+    levels = list(mesh_generator.lods)
+    try:
+        mesh_generator.generate(Path(image_path), depth_map, tmp_path)
+        for lod in levels:
+            # Levels not built this time fall back to the full model
+            if lod_path(tmp_path, lod).exists():
+                os.replace(lod_path(tmp_path, lod), lod_path(output_path, lod))
+            else:
+                lod_path(output_path, lod).unlink(missing_ok=True)
+        os.replace(tmp_path, output_path)
+    finally:
+        for lod in [None] + levels:
+            lod_path(tmp_path, lod).unlink(missing_ok=True)
+    return str(output_path)
+
+
+# --- API process side ---
+
+# Model states reported by /ready
+MODEL_UNLOADED = "unloaded"
+MODEL_LOADING = "loading"
+MODEL_READY = "ready"
+MODEL_FAILED = "failed"
+
+class InferencePool:
+    """Dispatch depth inference and meshing to worker processes."""
+
+    def __init__(self, workers: int = 0, threads_per_worker: int = 0):
+        self.workers = max(0, workers)
+        cpu_count = os.cpu_count() or 1
+        self.threads_per_worker = threads_per_worker or max(1, cpu_count // max(1, self.workers))
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Model state, for readiness checks and idle unloading
+        self.state = MODEL_UNLOADED
+        self.warming_up = False
+        self.last_error: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+        self.last_used = time.monotonic()
+        self._inflight = 0
+
+    @property
+    def executor(self) -> Optional[ProcessPoolExecutor]:
+        """Process pool, started on first use (None when running in-process)."""
+        if self.workers and self._executor is None:
+            print(f"Starting {self.workers} inference workers...")
+            # The initializer loads the model in every new worker
+            self.state = MODEL_LOADING
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.threads_per_worker,),
+            )
+        return self._executor
+
+    async def _run(self, fn, *args):
+        """Run a task in the pool (or the thread pool) and record its metrics here."""
+        result, observations = await asyncio.get_running_loop().run_in_executor(
+            self.executor, _run_task, fn, *args
+        )
+        metrics.replay(observations)
+        return result
+
+    @property
+    def idle_seconds(self) -> float:
+        """Seconds since the last inference or meshing call finished (0 while busy)."""
+        return 0.0 if self._inflight else time.monotonic() - self.last_used
+
+    @contextmanager
+    def _busy(self):
+        """Track a running call, so the model is never unloaded under it."""
+        self._inflight += 1
+        try:
+            yield
+        finally:
+            self._inflight -= 1
+            self.last_used = time.monotonic()
+
+    async def warm_up(self) -> bool:
+        """
+        Load the model and run a warm-up pass ahead of the first job.
+
+        With worker processes, every worker loads the model in its
+        initializer; one warm-up pass per worker is queued so they all start.
+
+        Returns:
+            True if the model is ready, False if loading failed
+        """
+        loop = asyncio.get_running_loop()
+        self.warming_up = True
+        self.state = MODEL_LOADING
+        start = time.perf_counter()
+
+        try:
+            with self._busy():
+                if not self.workers:
+                    timings = [await loop.run_in_executor(None, _warm_up_local)]
+                else:
+                    timings = await asyncio.gather(*(
+                        self._run(_warm_up_worker) for _ in range(self.workers)
+                    ))
+        except Exception as e:
+            self.state = MODEL_FAILED
+            self.last_error = str(e)
+            print(f"✗ Depth model preload failed: {e}")
+            # A failed initializer breaks the pool; start afresh on next use
+            self.shutdown()
+            return False
+        finally:
+            self.warming_up = False
+
+        self.state = MODEL_READY
+        self.last_error = None
+        # Worker processes load in their initializer, so loading (including
+        # process startup) is whatever the warm-up passes don't account for
+        total = time.perf_counter() - start
+        warmup = max(t["warmup_seconds"] for t in timings)
+        self.timings = {
+            "load_seconds": round(total - warmup, 3),
+            "warmup_seconds": round(warmup, 3),
+            "total_seconds": round(total, 3),
+        }
+        print(f"✓ Depth model ready in {self.timings['total_seconds']:.1f}s")
+        return True
+
+    async def unload_if_idle(self, idle_seconds: float) -> bool:
+        """
+        Free the model if nothing has used it for ``idle_seconds``.
+
+        In-process, the model is dropped and reloaded by the next batch.
+        Worker processes are stopped instead (that returns all of their
+        memory); the pool restarts them on next use and their initializer
+        loads the model again.
+
+        Returns:
+            True if the model was unloaded
+        """
+        if self.state != MODEL_READY or self._inflight or self.idle_seconds < idle_seconds:
+            return False
+
+        print(f"Depth model idle for {self.idle_seconds:.0f}s, unloading")
+        if not self.workers:
+            # The state changes under the estimator's load lock, so a batch
+            # that reloads the model meanwhile always sets it back afterwards
+            return await asyncio.get_running_loop().run_in_executor(
+                None, _unload_local, self._mark_unloaded
+            )
+
+        self.shutdown()
+        self._mark_unloaded()
+        return True
+
+    def _mark_unloaded(self):
+        """Record that the model is no longer loaded."""
+        self.state = MODEL_UNLOADED
+
+    async def run_idle_unloader(self, idle_seconds: float):
+        """Unload the model whenever it sits idle (runs until cancelled)."""
+        interval = max(1.0, idle_seconds / 4)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.unload_if_idle(idle_seconds)
+            except Exception as e:
+                print(f"✗ Depth model unload error: {e}")
+
+    async def prepare_image(self, image_path: str | Path, mesh_size: Optional[int] = None):
+        """Decode an upload once: mesh resolution pixels and the encoded texture."""
+        loop = asyncio.get_running_loop()
+
+        with self._busy():
+            if not self.workers:
+                return await loop.run_in_executor(None, _prepare_image_local, str(image_path), mesh_size)
+
+            from app.services.mesh_generator import PreparedImage
+            pixels_ref, texture = await self._run(_prepare_image_worker, str(image_path), mesh_size)
+        return PreparedImage(pixels=_from_shared(pixels_ref, unlink=True), texture=texture)
+
+    async def estimate_batch(self, images: List[np.ndarray]) -> List[np.ndarray]:
+        """Estimate depth maps (at each image's size) for a batch of decoded images."""
+        loop = asyncio.get_running_loop()
+
+        with self._busy():
+            if self.state != MODEL_READY:
+                self.state = MODEL_LOADING
+
+            if not self.workers:
+                depth_maps = await loop.run_in_executor(None, _estimate_batch_local, images)
+            else:
+                image_refs = [_to_shared(image) for image in images]
+                try:
+                    refs = await self._run(_estimate_batch_worker, image_refs)
+                finally:
+                    for ref in image_refs:
+                        _unlink_shared(ref)
+                depth_maps = [_from_shared(ref, unlink=True) for ref in refs]
+
+        self.state = MODEL_READY
+        return depth_maps
+
+    async def estimate_tiled(self, image: np.ndarray, memory_budget_mb: float) -> np.ndarray:
+        """Estimate a high detail depth map from overlapping tiles (not batched with other jobs)."""
+        loop = asyncio.get_running_loop()
+
+        with self._busy():
+            if self.state != MODEL_READY:
+                self.state = MODEL_LOADING
+
+            if not self.workers:
+                depth_map = await loop.run_in_executor(None, _estimate_tiled_local, image, memory_budget_mb)
+            else:
+                image_ref = _to_shared(image)
+                try:
+                    ref = await self._run(_estimate_tiled_worker, image_ref, memory_budget_mb)
+                finally:
+                    _unlink_shared(image_ref)
+                depth_map = _from_shared(ref, unlink=True)
+
+        self.state = MODEL_READY
+        return depth_map
+
+    async def generate_mesh(
+        self,
+        image_path: str | Path,
+        depth_map: np.ndarray,
+        output_path: str | Path,
+        depth_scale: float = 0.3,
+        max_faces: int = 100000,
+        depth_path: Optional[str | Path] = None,
+        profile: Optional[str] = None,
+        texture: Optional[EncodedTexture] = None,
+        mesh_size: Optional[int] = None
+    ) -> Path:
+        """
+        Generate a GLB from an image and its depth map (optionally storing the map).
+
+        ``texture`` is the encoded texture from prepare_image; without it the
+        image is decoded again for the texture. ``mesh_size`` caps the mesh
+        grid (default MESH_MAX_SIZE).
+        """
+        loop = asyncio.get_running_loop()
+        args = (
+            str(image_path),
+            depth_map,
+            str(output_path),
+            depth_scale,
+            max_faces,
+            str(depth_path) if depth_path else None,
+            profile,
+            texture,
+            mesh_size,
+        )
+
+        with self._busy():
+            if not self.workers:
+                result = await loop.run_in_executor(None, _generate_mesh_local, *args)
+                return Path(result)
+
+            depth_ref = _to_shared(depth_map)
+            try:
+                result = await self._run(_generate_mesh_worker, args[0], depth_ref, *args[2:])
+            finally:
+                _unlink_shared(depth_ref)
+        return Path(result)
+
+    async def remesh(
+        self,
+        image_path: str | Path,
+        depth_path: str | Path,
+        output_path: str | Path,
+        depth_scale: float = 0.3,
+        max_faces: int = 100000,
+        profile: Optional[str] = None
+    ) -> Path:
+        """Rebuild a GLB from a stored depth map, skipping depth inference."""
+        with self._busy():
+            result = await self._run(
+                _remesh,
+                str(image_path),
+                str(depth_path),
+                str(output_path),
+                depth_scale,
+                max_faces,
+                profile,
+            )
+        if self.workers:
+            # Workers started for this call have loaded the model too
+            self.state = MODEL_READY
+        return Path(result)
+
+    def status(self) -> dict:
+        """Model state for /ready."""
+        return {
+            "state": self.state,
+            "backend": settings.depth_backend,
+            "workers": self.workers,
+            "idle_seconds": round(self.idle_seconds, 1),
+            "timings": self.timings,
+            "error": self.last_error,
+        }
+
+    def shutdown(self):
+        """Stop worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_inference_pool = None
+
+def get_inference_pool() -> InferencePool:
+    """Get or create the global inference pool."""
+    global _inference_pool
+    if _inference_pool is None:
+        _inference_pool = InferencePool(
+            workers=settings.inference_workers,
+            threads_per_worker=settings.inference_threads,
+        )
+    return _inference_pool
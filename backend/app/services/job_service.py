@@ -1,19 +1,42 @@
-from datetime import datetime
-from typing import Optional, List
-from sqlmodel import Session, select
+import asyncio
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional, List, Tuple
+from sqlmodel import Session, and_, func, or_, select, update
 
-from app.models import Job, JobStatus, ProcessingMode
-from app.db.database import engine
+from app.config import settings
+from app.models import DepthDetail, Job, JobStatus, OutputProfile, ProcessingMode
+from app.db.database import engine, run_db_read, run_in_db_thread
+from app.services.progress_bus import progress_bus
+
+FINISHED_STATUSES = [JobStatus.COMPLETED, JobStatus.FAILED]
 
 
 class JobService:
     """Handle job CRUD operations."""
     
-    def create_job(self, job_id: str, mode: ProcessingMode, input_file: str, file_size: int) -> Job:
+    def __init__(self, flush_interval: float = 2.0):
+        # Write-behind progress: job_id -> (status, progress, updated_at)
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, Tuple[JobStatus, int, datetime]] = {}
+        self._lock = threading.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+    
+    def create_job(
+        self,
+        job_id: str,
+        mode: ProcessingMode,
+        input_file: str,
+        file_size: int,
+        output_profile: OutputProfile = OutputProfile.STANDARD,
+        depth_detail: DepthDetail = DepthDetail.STANDARD
+    ) -> Job:
         """Create a new job."""
         job = Job(
             id=job_id,
             mode=mode,
+            output_profile=output_profile,
+            depth_detail=depth_detail,
             status=JobStatus.PENDING,
             progress=0,
             input_file=input_file,
@@ -33,14 +56,197 @@ class JobService:
         with Session(engine) as session:
             statement = select(Job).where(Job.id == job_id)
             job = session.exec(statement).first()
-            return job
+            return self._with_pending(job) if job else None
     
-    def get_all_jobs(self, limit: int = 100) -> List[Job]:
-        """Get all jobs."""
+    def get_all_jobs(self, limit: int = 100, status: Optional[JobStatus] = None) -> List[Job]:
+        """Get all jobs (newest first), optionally only those with a status."""
         with Session(engine) as session:
-            statement = select(Job).order_by(Job.created_at.desc()).limit(limit)
+            statement = select(Job)
+            if status is not None:
+                statement = statement.where(Job.status == status)
+            statement = statement.order_by(Job.created_at.desc()).limit(limit)
             jobs = session.exec(statement).all()
-            return list(jobs)
+            return [self._with_pending(job) for job in jobs]
+    
+    def count_jobs(self, status: JobStatus) -> int:
+        """Number of jobs with a status."""
+        with Session(engine) as session:
+            statement = select(func.count()).select_from(Job).where(Job.status == status)
+            return session.exec(statement).one()
+    
+    def get_next_queued_job(self) -> Optional[Job]:
+        """Get the oldest queued job (served by the status/created_at index)."""
+        with Session(engine) as session:
+            statement = (
+                select(Job)
+                .where(Job.status == JobStatus.QUEUED)
+                .order_by(Job.created_at)
+                .limit(1)
+            )
+            return session.exec(statement).first()
+    
+    def get_mean_processing_time(self, limit: int = 50) -> Optional[float]:
+        """Mean processing time of the most recent completed jobs."""
+        with Session(engine) as session:
+            statement = (
+                select(Job.processing_time)
+                .where(Job.status == JobStatus.COMPLETED, Job.processing_time.is_not(None))
+                .order_by(Job.completed_at.desc())
+                .limit(limit)
+            )
+            times = session.exec(statement).all()
+            return sum(times) / len(times) if times else None
+    
+    def claim_next_job(self, owner: str, lease_seconds: int) -> Optional[Job]:
+        """
+        Lease the oldest queued job, or one whose lease has expired.
+        
+        The claim is a compare-and-set UPDATE, so concurrent workers (in any
+        process or on any machine sharing the DB) never get the same lease.
+        """
+        claimable = or_(
+            Job.status == JobStatus.QUEUED,
+            and_(Job.status == JobStatus.PROCESSING, Job.lease_expires_at < datetime.utcnow())
+        )
+        
+        # Retry a few times if another worker wins the race for a candidate
+        for _ in range(5):
+            now = datetime.utcnow()
+            
+            with Session(engine) as session:
+                job_id = session.exec(
+                    select(Job.id)
+                    .where(Job.status == JobStatus.QUEUED)
+                    .order_by(Job.created_at)
+                    .limit(1)
+                ).first()
+                
+                if job_id is None:
+                    job_id = session.exec(
+                        select(Job.id)
+                        .where(Job.status == JobStatus.PROCESSING, Job.lease_expires_at < now)
+                        .order_by(Job.created_at)
+                        .limit(1)
+                    ).first()
+                
+                if job_id is None:
+                    return None
+                
+                result = session.exec(
+                    update(Job)
+                    .where(Job.id == job_id, claimable)
+                    .values(
+                        status=JobStatus.PROCESSING,
+                        progress=0,
+                        lease_owner=owner,
+                        lease_expires_at=now + timedelta(seconds=lease_seconds),
+                        heartbeat_at=now,
+                        attempts=Job.attempts + 1,
+                        updated_at=now
+                    )
+                )
+                session.commit()
+                
+                if result.rowcount == 1:
+                    job = session.get(Job, job_id)
+                    progress_bus.publish_job(job)
+                    return job
+        
+        return None
+    
+    def renew_lease(self, job_id: str, owner: str, lease_seconds: int) -> bool:
+        """Extend a job's lease; False if the lease was lost to another worker."""
+        now = datetime.utcnow()
+        
+        with Session(engine) as session:
+            result = session.exec(
+                update(Job)
+                .where(
+                    Job.id == job_id,
+                    Job.lease_owner == owner,
+                    Job.status == JobStatus.PROCESSING
+                )
+                .values(
+                    lease_expires_at=now + timedelta(seconds=lease_seconds),
+                    heartbeat_at=now
+                )
+            )
+            session.commit()
+            return result.rowcount == 1
+    
+    def _with_pending(self, job: Job) -> Job:
+        """Apply progress that has not been flushed yet."""
+        with self._lock:
+            pending = self._pending.get(job.id)
+        
+        if pending and job.status not in FINISHED_STATUSES:
+            job.status, job.progress, job.updated_at = pending
+        return job
+    
+    def report_progress(
+        self,
+        job_id: str,
+        progress: int,
+        status: JobStatus = JobStatus.PROCESSING
+    ):
+        """
+        Record non-terminal progress in memory and publish it.
+        
+        Pending progress is written in one batch every flush_interval seconds;
+        completing or failing a job is always written immediately.
+        """
+        now = datetime.utcnow()
+        with self._lock:
+            self._pending[job_id] = (status, progress, now)
+        
+        progress_bus.publish(job_id, {
+            "id": job_id,
+            "status": status.value,
+            "progress": progress,
+            "updated_at": now.isoformat(),
+        })
+        
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # Not on the event loop: no flusher to hand off to
+            self.flush_progress()
+            return
+        
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop())
+    
+    async def _flush_loop(self):
+        """Flush pending progress periodically while there is any."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await run_in_db_thread(self.flush_progress)
+            if not self._pending:
+                return
+    
+    def flush_progress(self) -> int:
+        """Write all pending progress in a single transaction."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        
+        if not pending:
+            return 0
+        
+        with Session(engine) as session:
+            for job_id, (status, progress, updated_at) in pending.items():
+                session.exec(
+                    update(Job)
+                    .where(Job.id == job_id, Job.status.not_in(FINISHED_STATUSES))
+                    .values(status=status, progress=progress, updated_at=updated_at)
+                )
+            session.commit()
+        
+        return len(pending)
+    
+    def _discard_pending(self, job_id: str):
+        """Drop pending progress superseded by a direct write."""
+        with self._lock:
+            self._pending.pop(job_id, None)
     
     def update_job_status(
         self, 
@@ -50,6 +256,8 @@ class JobService:
         error_message: str = None
     ) -> Optional[Job]:
         """Update job status."""
+        self._discard_pending(job_id)
+        
         with Session(engine) as session:
             statement = select(Job).where(Job.id == job_id)
             job = session.exec(statement).first()
@@ -72,10 +280,19 @@ class JobService:
             session.add(job)
             session.commit()
             session.refresh(job)
+            progress_bus.publish_job(job)
             return job
     
-    def complete_job(self, job_id: str, output_file: str, processing_time: float) -> Optional[Job]:
+    def complete_job(
+        self,
+        job_id: str,
+        output_file: str,
+        processing_time: float,
+        etag: Optional[str] = None
+    ) -> Optional[Job]:
         """Mark job as completed."""
+        self._discard_pending(job_id)
+        
         with Session(engine) as session:
             statement = select(Job).where(Job.id == job_id)
             job = session.exec(statement).first()
@@ -87,9 +304,27 @@ class JobService:
             job.progress = 100
             job.output_file = output_file
             job.processing_time = processing_time
+            job.etag = etag
             job.completed_at = datetime.utcnow()
             job.updated_at = datetime.utcnow()
             
+            session.add(job)
+            session.commit()
+            session.refresh(job)
+            progress_bus.publish_job(job)
+            return job
+    
+    def set_etag(self, job_id: str, etag: Optional[str]) -> Optional[Job]:
+        """Record a new fingerprint for a job's models (after a remesh)."""
+        with Session(engine) as session:
+            job = session.get(Job, job_id)
+            
+            if not job:
+                return None
+            
+            job.etag = etag
+            job.updated_at = datetime.utcnow()
+            
             session.add(job)
             session.commit()
             session.refresh(job)
@@ -105,6 +340,8 @@ class JobService:
     
     def delete_job(self, job_id: str) -> bool:
         """Delete a job."""
+        self._discard_pending(job_id)
+        
         with Session(engine) as session:
             statement = select(Job).where(Job.id == job_id)
             job = session.exec(statement).first()
@@ -117,4 +354,89 @@ class JobService:
             return True
 
 
-job_service = JobService()
+class AsyncJobService:
+    """
+    Awaitable JobService for async code.
+    
+    Reads run on the DB read threads and writes on the DB write threads, so
+    SQLite I/O never blocks the event loop and status reads never queue
+    behind a commit. In-memory progress reporting stays synchronous.
+    """
+    
+    def __init__(self, service: JobService):
+        self._service = service
+    
+    async def create_job(
+        self,
+        job_id: str,
+        mode: ProcessingMode,
+        input_file: str,
+        file_size: int,
+        output_profile: OutputProfile = OutputProfile.STANDARD,
+        depth_detail: DepthDetail = DepthDetail.STANDARD
+    ) -> Job:
+        return await run_in_db_thread(
+            self._service.create_job, job_id, mode, input_file, file_size, output_profile, depth_detail
+        )
+    
+    async def get_job(self, job_id: str) -> Optional[Job]:
+        return await run_db_read(self._service.get_job, job_id)
+    
+    async def get_all_jobs(self, limit: int = 100, status: Optional[JobStatus] = None) -> List[Job]:
+        return await run_db_read(self._service.get_all_jobs, limit, status)
+    
+    async def count_jobs(self, status: JobStatus) -> int:
+        return await run_db_read(self._service.count_jobs, status)
+    
+    async def get_next_queued_job(self) -> Optional[Job]:
+        return await run_db_read(self._service.get_next_queued_job)
+    
+    async def get_mean_processing_time(self, limit: int = 50) -> Optional[float]:
+        return await run_db_read(self._service.get_mean_processing_time, limit)
+    
+    async def claim_next_job(self, owner: str, lease_seconds: int) -> Optional[Job]:
+        return await run_in_db_thread(self._service.claim_next_job, owner, lease_seconds)
+    
+    async def renew_lease(self, job_id: str, owner: str, lease_seconds: int) -> bool:
+        return await run_in_db_thread(self._service.renew_lease, job_id, owner, lease_seconds)
+    
+    def report_progress(self, job_id: str, progress: int, status: JobStatus = JobStatus.PROCESSING):
+        self._service.report_progress(job_id, progress, status)
+    
+    async def flush_progress(self) -> int:
+        return await run_in_db_thread(self._service.flush_progress)
+    
+    async def update_job_status(
+        self,
+        job_id: str,
+        status: JobStatus,
+        progress: int = None,
+        error_message: str = None
+    ) -> Optional[Job]:
+        return await run_in_db_thread(
+            self._service.update_job_status, job_id, status, progress, error_message
+        )
+    
+    async def complete_job(
+        self,
+        job_id: str,
+        output_file: str,
+        processing_time: float,
+        etag: Optional[str] = None
+    ) -> Optional[Job]:
+        return await run_in_db_thread(
+            self._service.complete_job, job_id, output_file, processing_time, etag
+        )
+    
+    async def set_etag(self, job_id: str, etag: Optional[str]) -> Optional[Job]:
+        return await run_in_db_thread(self._service.set_etag, job_id, etag)
+    
+    async def fail_job(self, job_id: str, error_message: str) -> Optional[Job]:
+        return await run_in_db_thread(self._service.fail_job, job_id, error_message)
+    
+    async def delete_job(self, job_id: str) -> bool:
+        return await run_in_db_thread(self._service.delete_job, job_id)
+
+
+job_service = JobService(flush_interval=settings.progress_flush_interval)
+async_job_service = AsyncJobService(job_service)
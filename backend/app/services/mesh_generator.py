@@ -1,44 +1,541 @@
 """
 Mesh Generator: Convert depth map + image to 3D GLB
 """
+import json
+import struct
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
 import numpy as np
 from pathlib import Path
 from PIL import Image
-import trimesh
+
+from app.config import settings
+from app.services.depth_tiling import working_size
+from app.services.image_decode import decode_image, fit_size
+from app.services.meshopt import encode_index_sequence, encode_vertex_buffer
+from app.services.metrics import GLB_EXPORT_SECONDS, MESH_BUILD_SECONDS, MESH_SIMPLIFY_SECONDS
+from app.services.texture import EncodedTexture, TextureOptions, encode_texture, texture_size
+
+# Longest side of the mesh grid (and of the depth map it is built from);
+# high detail jobs use detail_mesh_size("high") instead
+MESH_MAX_SIZE = 512
+
+# Number of (h, w) grid resolutions whose topology is kept in memory
+TOPOLOGY_CACHE_SIZE = 8
+
+# Adaptive tessellation: quads per side of a root cell, and depth error
+# (in normalized depth) below which a cell is never split
+ADAPTIVE_ROOT_SIZE = 32
+ADAPTIVE_MIN_ERROR = 0.002
+
+# glTF 2.0 binary container constants
+GLB_MAGIC = 0x46546C67  # "glTF"
+GLB_CHUNK_JSON = 0x4E4F534A  # "JSON"
+GLB_CHUNK_BIN = 0x004E4942  # "BIN\0"
+GLTF_SHORT = 5122
+GLTF_FLOAT = 5126
+GLTF_UNSIGNED_SHORT = 5123
+GLTF_UNSIGNED_INT = 5125
+GLTF_ARRAY_BUFFER = 34962
+GLTF_ELEMENT_ARRAY_BUFFER = 34963
+
+# GLB output profiles (see write_glb)
+GLB_PROFILES = ("standard", "quantized", "compressed")
+
+
+
+@lru_cache(maxsize=TOPOLOGY_CACHE_SIZE)
+def grid_topology(h: int, w: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build the faces and UVs of an h x w vertex grid.
+
+    Faces are two triangles per quad, (v0, v2, v1) then (v1, v2, v3), in
+    row-major quad order. Results are cached per resolution and returned
+    read-only, so callers must copy before modifying them.
+
+    Returns:
+        faces as uint32 array (2 * (h-1) * (w-1), 3) and UVs as float32 (h*w, 2)
+    """
+    idx = np.arange(h * w, dtype=np.uint32).reshape(h, w)
+    v0 = idx[:-1, :-1].ravel()
+    v1 = v0 + 1
+    v2 = v0 + w
+    v3 = v2 + 1
+
+    quads = np.empty((v0.size, 2, 3), dtype=np.uint32)
+    quads[:, 0, 0] = v0
+    quads[:, 0, 1] = v2
+    quads[:, 0, 2] = v1
+    quads[:, 1, 0] = v1
+    quads[:, 1, 1] = v2
+    quads[:, 1, 2] = v3
+    faces = quads.reshape(-1, 3)
+
+    uu, vv = np.meshgrid(
+        np.linspace(0, 1, w, dtype=np.float32),
+        np.linspace(0, 1, h, dtype=np.float32),
+    )
+    uv = np.stack([uu.ravel(), 1 - vv.ravel()], axis=1)
+
+    faces.setflags(write=False)
+    uv.setflags(write=False)
+    return faces, uv
+
+
+def _pad4(length: int) -> int:
+    """Padding needed to align a length to 4 bytes."""
+    return -length % 4
+
+
+def _quantize_positions(positions: np.ndarray) -> Tuple[np.ndarray, List[float], List[float]]:
+    """
+    Quantize positions to int16 over their bounding box (KHR_mesh_quantization).
+
+    Returns (count, 4) int16 rows (the 4th component pads each vertex to
+    8 bytes) plus the node translation and scale that restore the
+    original coordinates.
+    """
+    low, high = positions.min(axis=0), positions.max(axis=0)
+    center = (low + high) / 2
+    half = np.where(high > low, (high - low) / 2, 1).astype(np.float32)
+
+    quantized = np.zeros((len(positions), 4), dtype=np.int16)
+    quantized[:, :3] = np.round((positions - center) / half * 32767)
+    return quantized, center.tolist(), (half / 32767).tolist()
+
+
+def write_glb(
+    output: BinaryIO,
+    positions: np.ndarray,
+    uv: np.ndarray,
+    faces: np.ndarray,
+    texture: bytes,
+    texture_mime: str,
+    profile: str = "standard",
+    metallic: float = 0.0,
+    roughness: float = 0.8
+) -> int:
+    """
+    Write a textured triangle mesh as a glTF 2.0 binary (GLB).
+
+    Buffers are streamed from the arrays' memory straight to ``output``;
+    the texture is embedded as already-encoded image bytes. UVs use the
+    mesh convention (origin bottom-left) and are flipped for glTF.
+    Indices are stored as uint16 when the vertex count allows.
+
+    Profiles:
+        standard: float32 positions and UVs
+        quantized: int16 positions, normalized uint16 UVs (KHR_mesh_quantization)
+        compressed: quantized, then meshopt-encoded (EXT_meshopt_compression)
+
+    Returns:
+        number of bytes written
+    """
+    if profile not in GLB_PROFILES:
+        raise ValueError(f"Unknown GLB profile: {profile}")
+
+    positions = np.ascontiguousarray(positions, dtype=np.float32)
+    index_type = np.uint16 if len(positions) <= 0xFFFF else np.uint32
+    indices = np.ascontiguousarray(faces, dtype=index_type)
+    node = {"mesh": 0}
+    extensions = []
+
+    if profile == "standard":
+        texcoords = np.empty((len(uv), 2), dtype=np.float32)
+        texcoords[:, 0] = uv[:, 0]
+        texcoords[:, 1] = 1 - uv[:, 1]
+        position_accessor = {"componentType": GLTF_FLOAT}
+        texcoord_accessor = {"componentType": GLTF_FLOAT}
+        position_stride = None
+    else:
+        vertices, node["translation"], node["scale"] = _quantize_positions(positions)
+        positions = vertices[:, :3]
+        texcoords = np.empty((len(uv), 2), dtype=np.uint16)
+        texcoords[:, 0] = np.round(np.clip(uv[:, 0], 0, 1) * 65535)
+        texcoords[:, 1] = np.round(np.clip(1 - uv[:, 1], 0, 1) * 65535)
+        position_accessor = {"componentType": GLTF_SHORT}
+        texcoord_accessor = {"componentType": GLTF_UNSIGNED_SHORT, "normalized": True}
+        position_stride = 8
+        extensions.append("KHR_mesh_quantization")
+
+    if len(positions):
+        position_accessor["min"] = positions.min(axis=0).tolist()
+        position_accessor["max"] = positions.max(axis=0).tolist()
+    else:
+        position_accessor["min"] = position_accessor["max"] = [0, 0, 0]
+
+    # (data, target, byteStride); quantized positions include padding
+    position_data = vertices if profile != "standard" else positions
+    views = [
+        (position_data, GLTF_ARRAY_BUFFER, position_stride),
+        (texcoords, GLTF_ARRAY_BUFFER, None),
+        (indices.ravel(), GLTF_ELEMENT_ARRAY_BUFFER, None),
+    ]
+
+    # Binary chunk layout: each view starts 4-byte aligned
+    blobs, buffer_views = [], []
+    offset = fallback_offset = 0
+    for data, target, stride in views:
+        raw = memoryview(data).cast("B")
+        view = {"buffer": 0, "byteOffset": offset, "byteLength": raw.nbytes, "target": target}
+        if stride is not None:
+            view["byteStride"] = stride
+
+        if profile == "compressed":
+            # The view describes the decoded data in a virtual fallback
+            # buffer; the extension points at the encoded bytes
+            element_size = data.itemsize * (data.shape[1] if data.ndim > 1 else 1)
+            if target == GLTF_ARRAY_BUFFER:
+                mode = "ATTRIBUTES"
+                encoded = encode_vertex_buffer(data.view(np.uint8).reshape(len(data), element_size))
+            else:
+                mode = "INDICES"
+                encoded = encode_index_sequence(data)
+            view.update(buffer=1, byteOffset=fallback_offset)
+            view["extensions"] = {"EXT_meshopt_compression": {
+                "buffer": 0,
+                "byteOffset": offset,
+                "byteLength": len(encoded),
+                "byteStride": element_size,
+                "count": len(data),
+                "mode": mode
+            }}
+            fallback_offset += raw.nbytes + _pad4(raw.nbytes)
+            raw = memoryview(encoded)
+
+        blobs.append(raw)
+        buffer_views.append(view)
+        offset += raw.nbytes + _pad4(raw.nbytes)
+
+    # Texture, stored as-is
+    blobs.append(memoryview(texture))
+    buffer_views.append({"buffer": 0, "byteOffset": offset, "byteLength": len(texture)})
+    offset += len(texture) + _pad4(len(texture))
+    bin_length = offset
+
+    # WebP needs EXT_texture_webp (no PNG/JPEG fallback is embedded)
+    texture_info = {"source": 0, "sampler": 0}
+    if texture_mime == "image/webp":
+        texture_info = {"sampler": 0, "extensions": {"EXT_texture_webp": {"source": 0}}}
+        extensions.append("EXT_texture_webp")
+
+    buffers = [{"byteLength": bin_length}]
+    if profile == "compressed":
+        buffers.append({
+            "byteLength": fallback_offset,
+            "extensions": {"EXT_meshopt_compression": {"fallback": True}}
+        })
+        extensions.append("EXT_meshopt_compression")
+
+    gltf = {
+        "asset": {"version": "2.0", "generator": "image-to-3d"},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [node],
+        "meshes": [{
+            "primitives": [{
+                "attributes": {"POSITION": 0, "TEXCOORD_0": 1},
+                "indices": 2,
+                "material": 0,
+                "mode": 4
+            }]
+        }],
+        "materials": [{
+            "pbrMetallicRoughness": {
+                "baseColorTexture": {"index": 0},
+                "metallicFactor": metallic,
+                "roughnessFactor": roughness
+            }
+        }],
+        "textures": [texture_info],
+        "samplers": [{"magFilter": 9729, "minFilter": 9987, "wrapS": 33071, "wrapT": 33071}],
+        "images": [{"bufferView": 3, "mimeType": texture_mime}],
+        "accessors": [
+            {"bufferView": 0, "count": len(positions), "type": "VEC3", **position_accessor},
+            {"bufferView": 1, "count": len(texcoords), "type": "VEC2", **texcoord_accessor},
+            {
+                "bufferView": 2,
+                "componentType": GLTF_UNSIGNED_SHORT if index_type is np.uint16 else GLTF_UNSIGNED_INT,
+                "count": indices.size,
+                "type": "SCALAR"
+            }
+        ],
+        "bufferViews": buffer_views,
+        "buffers": buffers
+    }
+    if extensions:
+        gltf["extensionsUsed"] = extensions
+        gltf["extensionsRequired"] = extensions
+
+    json_chunk = json.dumps(gltf, separators=(",", ":")).encode()
+    json_chunk += b" " * _pad4(len(json_chunk))
+    total = 12 + 8 + len(json_chunk) + 8 + bin_length
+
+    output.write(struct.pack("<III", GLB_MAGIC, 2, total))
+    output.write(struct.pack("<II", len(json_chunk), GLB_CHUNK_JSON))
+    output.write(json_chunk)
+    output.write(struct.pack("<II", bin_length, GLB_CHUNK_BIN))
+    for blob in blobs:
+        output.write(blob)
+        output.write(b"\0" * _pad4(blob.nbytes))
+    return total
+
+
+def _corner_residual(depth: np.ndarray, s: int) -> np.ndarray:
+    """
+    Error of approximating each s x s cell by its four corners.
+
+    Returns the max absolute difference between the depth map and the
+    bilinear interpolation of the cell corners, per cell.
+    """
+    corners = depth[::s, ::s]
+    t = np.arange(s, dtype=np.float32) / s
+
+    # Interpolate down the rows, then across the columns
+    rows = corners[:-1, None, :] * (1 - t[:, None]) + corners[1:, None, :] * t[:, None]
+    rows = np.vstack([rows.reshape(-1, corners.shape[1]), corners[-1:]])
+    interp = rows[:, :-1, None] * (1 - t) + rows[:, 1:, None] * t
+    interp = np.hstack([interp.reshape(rows.shape[0], -1), rows[:, -1:]])
+
+    residual = np.abs(depth - interp)
+    nr, nc = (depth.shape[0] - 1) // s, (depth.shape[1] - 1) // s
+    error = residual[:-1, :-1].reshape(nr, s, nc, s).max(axis=(1, 3))
+
+    # The last row and column of vertices belong to the last cells
+    error[-1] = np.maximum(error[-1], residual[-1, :-1].reshape(nc, s).max(axis=1))
+    error[:, -1] = np.maximum(error[:, -1], residual[:-1, -1].reshape(nr, s).max(axis=1))
+    return error
+
+
+def _ring_offsets(s: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Boundary of an s x s cell as (row, col) offsets from its top-left corner.
+
+    The ring runs down the left edge, right along the bottom, up the right
+    edge and back along the top, matching the winding of grid_topology.
+    """
+    k = np.arange(s)
+    zeros, full = np.zeros(s, dtype=int), np.full(s, s)
+    return (
+        np.concatenate([k, full, s - k, zeros]),
+        np.concatenate([zeros, k, full, s - k]),
+    )
+
+
+class QuadtreeTessellator:
+    """
+    Adaptive quadtree mesh over a depth grid.
+
+    The grid is tiled with root cells of ``root_size`` quads per side, and a
+    cell is split while the depth inside it deviates from its corners by
+    more than a threshold. The threshold is chosen as the lowest one (but
+    at least ``min_error``) whose mesh fits the face budget, so detail goes
+    where depth changes and flat areas stay coarse.
+
+    Leaves become two triangles, or a fan around their center when finer
+    neighbours put vertices on their edges, so the mesh has no cracks.
+    Work is vectorized per quadtree level.
+    """
+
+    def __init__(self, depth: np.ndarray, root_size: int):
+        self.shape = depth.shape
+        self.sizes = [root_size >> level for level in range(root_size.bit_length())]
+
+        # Split priority per level: a cell's own error, raised to its
+        # children's so that any threshold yields a valid tree
+        self.priority = [np.zeros(self._cells(1), dtype=np.float32)]
+        for s in reversed(self.sizes[:-1]):
+            nr, nc = self._cells(s)
+            children = self.priority[0].reshape(nr, 2, nc, 2).max(axis=(1, 3))
+            self.priority.insert(0, np.maximum(_corner_residual(depth, s), children))
+
+        # Candidate thresholds, shared by every threshold_for call
+        self._sorted_priorities = np.sort(np.concatenate([p.ravel() for p in self.priority[:-1]]))
+
+    @staticmethod
+    def grid_shape(h: int, w: int, root_size: int) -> Tuple[int, int]:
+        """Vertex grid size closest to (h, w) that root cells tile exactly."""
+        rows = max(1, round((h - 1) / root_size)) * root_size + 1
+        cols = max(1, round((w - 1) / root_size)) * root_size + 1
+        return rows, cols
+
+    def _cells(self, s: int) -> Tuple[int, int]:
+        return (self.shape[0] - 1) // s, (self.shape[1] - 1) // s
+
+    def _layout(self, threshold: float):
+        """
+        Leaves for a split threshold.
+
+        Returns:
+            the grid mask of leaf corners, and per level (size, top-left
+            rows, top-left cols, ring rows, ring cols, ring vertex active)
+        """
+        active = np.zeros(self.shape, dtype=bool)
+        levels = []
+        parent_split = np.ones(self._cells(self.sizes[0]), dtype=bool)
+
+        for level, s in enumerate(self.sizes):
+            split = parent_split & (self.priority[level] > threshold) if s > 1 else None
+            leaves = parent_split & ~split if split is not None else parent_split
+
+            rows, cols = np.nonzero(leaves)
+            rows, cols = rows * s, cols * s
+            for dr, dc in ((0, 0), (0, s), (s, 0), (s, s)):
+                active[rows + dr, cols + dc] = True
+            levels.append((s, rows, cols))
+
+            if split is not None:
+                parent_split = split.repeat(2, axis=0).repeat(2, axis=1)
+
+        rings = []
+        for s, rows, cols in levels:
+            dr, dc = _ring_offsets(s)
+            ring_rows = rows[:, None] + dr
+            ring_cols = cols[:, None] + dc
+            rings.append((s, rows, cols, ring_rows, ring_cols, active[ring_rows, ring_cols]))
+        return active, rings
+
+    def count_faces(self, threshold: float) -> int:
+        """Number of triangles the mesh has for a split threshold."""
+        faces = 0
+        for *_, ring_active in self._layout(threshold)[1]:
+            counts = ring_active.sum(axis=1)
+            faces += int(np.where(counts == 4, 2, counts).sum())
+        return faces
+
+    def threshold_for(self, max_faces: int, min_error: float) -> float:
+        """Lowest split threshold (at least min_error) within the face budget."""
+        priorities = self._sorted_priorities
+
+        # Every split adds three leaves of at least two triangles each,
+        # which rules out thresholds below the max_splits-th priority
+        max_splits = max(0, (max_faces // 2 - self.priority[0].size) // 3)
+        floor = min_error
+        if max_splits < priorities.size:
+            floor = max(floor, priorities[-(max_splits + 1)])
+        if self.count_faces(floor) <= max_faces:
+            return float(floor)
+
+        candidates = np.unique(priorities[priorities >= floor])[::-1]
+        candidates = np.concatenate([[np.inf], candidates, [floor]])
+
+        # Faces grow as the threshold drops: binary search the candidates
+        lo, hi = 0, len(candidates) - 1
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if self.count_faces(candidates[mid]) <= max_faces:
+                lo = mid
+            else:
+                hi = mid - 1
+        return float(candidates[lo])
+
+    def triangulate(self, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Build the mesh for a split threshold.
+
+        Returns:
+            vertex grid coordinates as int array (n, 2) of (row, col) and
+            faces as uint32 array (m, 3)
+        """
+        active, rings = self._layout(threshold)
+
+        # Fanned leaves get a center vertex
+        used = active.copy()
+        for s, rows, cols, _, _, ring_active in rings:
+            fanned = ring_active.sum(axis=1) > 4
+            used[rows[fanned] + s // 2, cols[fanned] + s // 2] = True
+
+        index = np.full(self.shape, -1, dtype=np.int64)
+        index[used] = np.arange(np.count_nonzero(used))
+        faces = []
+
+        for s, rows, cols, ring_rows, ring_cols, ring_active in rings:
+            fanned = ring_active.sum(axis=1) > 4
+
+            # Plain leaves: two triangles, wound like grid_topology
+            r, c = rows[~fanned], cols[~fanned]
+            tl, tr = index[r, c], index[r, c + s]
+            bl, br = index[r + s, c], index[r + s, c + s]
+            faces.append(np.stack([tl, bl, tr, tr, bl, br], axis=1).reshape(-1, 3))
+
+            if not fanned.any():
+                continue
+
+            # Fans: center to each pair of consecutive active ring vertices
+            leaf, k = np.nonzero(ring_active[fanned])
+            ring = index[ring_rows[fanned][leaf, k], ring_cols[fanned][leaf, k]]
+            first = np.flatnonzero(np.r_[True, leaf[1:] != leaf[:-1]])
+            last = np.r_[first[1:] - 1, leaf.size - 1]
+            nxt = np.roll(ring, -1)
+            nxt[last] = ring[first]
+
+            center = index[rows[fanned] + s // 2, cols[fanned] + s // 2][leaf]
+            faces.append(np.stack([center, ring, nxt], axis=1))
+
+        return np.argwhere(used), np.concatenate(faces).astype(np.uint32)
 
 
 class MeshGenerator:
     """Generate 3D mesh from depth map and texture."""
     
-    def __init__(self, depth_scale: float = 0.3, max_faces: int = 100000):
+    def __init__(
+        self,
+        depth_scale: float = 0.3,
+        max_faces: int = 100000,
+        tessellation: str = "adaptive",
+        profile: str = "standard",
+        texture: Optional[TextureOptions] = None,
+        lods: Optional[Dict[str, int]] = None,
+        mesh_size: int = MESH_MAX_SIZE
+    ):
         self.depth_scale = depth_scale
         self.max_faces = max_faces
+        self.tessellation = tessellation
+        self.profile = profile
+        self.texture = texture or TextureOptions()
+        # Reduced levels of detail: name -> max faces (0 = off)
+        self.lods = lods or {}
+        # Longest side of the mesh grid
+        self.mesh_size = mesh_size
+    
+    def lod_budgets(self) -> List[Tuple[str, int]]:
+        """Levels of detail to build, largest first (only budgets below max_faces)."""
+        levels = [(lod, faces) for lod, faces in self.lods.items() if 0 < faces < self.max_faces]
+        return sorted(levels, key=lambda level: -level[1])
     
     def generate(
         self,
         image_path: Path,
         depth_map: np.ndarray,
-        output_path: Path
+        output_path: Path,
+        depth_path: Optional[Path] = None,
+        texture: Optional[EncodedTexture] = None
     ) -> Path:
         """
         Generate a GLB file from image and depth map.
+        
+        If depth_path is given, the normalized depth map at mesh resolution is
+        also saved there as float16 .npy so the job can be re-meshed later.
+        Reduced levels of detail are written next to output_path (see
+        lod_path); a level that would not be smaller is not written.
+        ``texture`` is the one from prepare_image; otherwise it is encoded
+        from image_path.
         """
-        image = Image.open(image_path).convert('RGB')
+        depth_map = np.asarray(depth_map, dtype=np.float32)
         
-        # Resize (limit to 512x512)
-        max_size = 512
+        # Resize (limit to mesh_size; maps from prepare_image already are)
         h, w = depth_map.shape
-        
-        if max(h, w) > max_size:
-            scale = max_size / max(h, w)
-            new_w = int(w * scale)
-            new_h = int(h * scale)
-            
-            image = image.resize((new_w, new_h), Image.LANCZOS)
+        new_w, new_h = fit_size((w, h), self.mesh_size)
+        if (new_w, new_h) != (w, h):
             depth_map = np.array(Image.fromarray(depth_map).resize((new_w, new_h), Image.BILINEAR))
             h, w = new_h, new_w
-        else:
-            image = image.resize((w, h), Image.LANCZOS)
+        
+        # Texture resolution is independent of the mesh resolution
+        if texture is None:
+            texture = encode_texture(Path(image_path), self.texture)
         
         print(f"Mesh resolution: {w}x{h}")
         
@@ -50,74 +547,223 @@ class MeshGenerator:
         else:
             depth_normalized = np.zeros_like(depth_map)
         
+        if depth_path is not None:
+            np.save(depth_path, depth_normalized.astype(np.float16))
+        
+        # All levels of detail share one topology build and one texture
+        budgets = [(None, self.max_faces)] + self.lod_budgets()
+        if self.tessellation == "adaptive" and min(h, w) > 2:
+            meshes = self._adaptive_meshes(depth_normalized, budgets)
+        else:
+            meshes = self._grid_meshes(depth_normalized, budgets)
+        
+        # Export to GLB
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        exported_faces = None
+        for lod, (vertices, faces, uv) in meshes:
+            path = lod_path(output_path, lod)
+            
+            # A level no smaller than the one above it is left out (the
+            # download falls back to the full model)
+            if exported_faces is not None and len(faces) >= exported_faces:
+                print(f"Skipped LOD {lod}: {len(faces)} faces, no smaller than the level above")
+                path.unlink(missing_ok=True)
+                continue
+            exported_faces = len(faces)
+            
+            start = time.perf_counter()
+            with open(path, "wb") as f:
+                size = write_glb(
+                    f, vertices, uv, faces, texture.data, texture.mime_type, profile=self.profile
+                )
+            encode_time = time.perf_counter() - start
+            GLB_EXPORT_SECONDS.observe(encode_time)
+            print(f"Exported GLB: {path} ({size} bytes, {self.profile}, {encode_time * 1000:.1f}ms)")
+        
+        return output_path
+    
+    def _grid_meshes(
+        self, depth: np.ndarray, budgets: List[Tuple[Optional[str], int]]
+    ) -> Iterator[Tuple[Optional[str], Tuple[np.ndarray, np.ndarray, np.ndarray]]]:
+        """Full grid, decimated to each budget in turn (each level from the previous one)."""
+        with MESH_BUILD_SECONDS.time():
+            vertices, faces, uv = self._grid_mesh(depth)
+        print(f"Created mesh with {len(vertices)} vertices and {len(faces)} faces")
+        
+        for lod, budget in budgets:
+            if len(faces) > budget:
+                with MESH_SIMPLIFY_SECONDS.time():
+                    vertices, faces, uv = self._decimate(vertices, faces, uv, budget)
+            yield lod, (vertices, faces, uv)
+    
+    def _decimate(
+        self, vertices: np.ndarray, faces: np.ndarray, uv: np.ndarray, max_faces: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Simplify a mesh to max_faces (unchanged if simplification fails)."""
+        import trimesh
+        
+        try:
+            print(f"Simplifying mesh from {len(faces)} to {max_faces} faces...")
+            mesh = trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
+            mesh = mesh.simplify_quadric_decimation(face_count=max_faces)
+            
+            # Decimation drops UVs; they follow from x, y in [-1, 1]
+            print(f"Simplified to {len(mesh.faces)} faces")
+            return mesh.vertices, mesh.faces, (mesh.vertices[:, :2] + 1) / 2
+        except Exception as e:
+            print(f"Simplification skipped: {e}")
+            return vertices, faces, uv
+    
+    def _grid_mesh(self, depth: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Full-resolution mesh: one vertex per depth pixel."""
+        h, w = depth.shape
+        
         # Create vertex grid
         x = np.linspace(-1, 1, w)
         y = np.linspace(-1, 1, h)
         xx, yy = np.meshgrid(x, y)
         
         # Z from depth (inverted so closer = higher)
-        zz = (1 - depth_normalized) * self.depth_scale
+        zz = (1 - depth) * self.depth_scale
         
         vertices = np.stack([xx.flatten(), -yy.flatten(), zz.flatten()], axis=1)
         
-        # Create faces (two triangles per quad)
-        faces = []
-        for i in range(h - 1):
-            for j in range(w - 1):
-                v0 = i * w + j
-                v1 = v0 + 1
-                v2 = v0 + w
-                v3 = v2 + 1
-                faces.append([v0, v2, v1])
-                faces.append([v1, v2, v3])
-        
-        faces = np.array(faces)
-        print(f"Created mesh with {len(vertices)} vertices and {len(faces)} faces")
-        
-        # UV coordinates
-        u = np.linspace(0, 1, w)
-        v = np.linspace(0, 1, h)
-        uu, vv = np.meshgrid(u, v)
-        uv = np.stack([uu.flatten(), 1 - vv.flatten()], axis=1)
-        
-        # texture material
-        texture_image = np.array(image)
-        
-        material = trimesh.visual.material.PBRMaterial(
-            baseColorTexture=Image.fromarray(texture_image),
-            metallicFactor=0.0,
-            roughnessFactor=0.8
-        )
-        
-        # textured visual
-        visuals = trimesh.visual.TextureVisuals(uv=uv, material=material)
-        
-        mesh = trimesh.Trimesh(
-            vertices=vertices,
-            faces=faces,
-            visual=visuals,
-            process=False
-        )
-        
-        # simplify mesh if we have too many faces
-        if len(faces) > self.max_faces:
-            try:
-                print(f"Simplifying mesh from {len(faces)} to {self.max_faces} faces...")
-                mesh = mesh.simplify_quadric_decimation(self.max_faces)
-                print(f"Simplified to {len(mesh.faces)} faces")
-            except Exception as e:
-                print(f"Simplification skipped: {e}")
-        
-        # Export to GLB
-        output_path = Path(output_path)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+        # Faces (two triangles per quad) and UVs, cached per resolution
+        faces, uv = grid_topology(h, w)
+        return vertices, faces, uv
+    
+    def _adaptive_meshes(
+        self, depth: np.ndarray, budgets: List[Tuple[Optional[str], int]]
+    ) -> Iterator[Tuple[Optional[str], Tuple[np.ndarray, np.ndarray, np.ndarray]]]:
+        """Quadtree meshes within each budget, dense only where depth varies."""
+        h, w = depth.shape
+        root_size = min(ADAPTIVE_ROOT_SIZE, 1 << ((min(h, w) - 1).bit_length() - 1))
         
-        mesh.export(str(output_path), file_type='glb')
-        print(f"Exported GLB: {output_path} ({output_path.stat().st_size} bytes)")
+        # The quadtree setup is the build; each level's threshold search and
+        # triangulation is its simplification (export time excluded)
+        with MESH_BUILD_SECONDS.time():
+            # Resample so root cells tile the grid exactly
+            grid_h, grid_w = QuadtreeTessellator.grid_shape(h, w, root_size)
+            if (grid_h, grid_w) != (h, w):
+                depth = np.array(Image.fromarray(depth).resize((grid_w, grid_h), Image.BILINEAR))
+            
+            # Residuals are computed once; each level only picks a threshold
+            tessellator = QuadtreeTessellator(depth, root_size)
         
-        return output_path
+        mesh, last_threshold = None, None
+        for lod, budget in budgets:
+            start = time.perf_counter()
+            threshold = tessellator.threshold_for(budget, ADAPTIVE_MIN_ERROR)
+            if threshold == last_threshold:
+                # Budget not binding (the mesh is already at ADAPTIVE_MIN_ERROR)
+                MESH_SIMPLIFY_SECONDS.observe(time.perf_counter() - start)
+                yield lod, mesh
+                continue
+            last_threshold = threshold
+            grid, faces = tessellator.triangulate(threshold)
+            
+            rows, cols = grid[:, 0], grid[:, 1]
+            u = cols / np.float32(grid_w - 1)
+            v = rows / np.float32(grid_h - 1)
+            
+            # Same layout as the full grid: x, y in [-1, 1], closer = higher z
+            vertices = np.stack([
+                2 * u - 1,
+                1 - 2 * v,
+                (1 - depth[rows, cols]) * self.depth_scale
+            ], axis=1).astype(np.float32)
+            uv = np.stack([u, 1 - v], axis=1).astype(np.float32)
+            MESH_SIMPLIFY_SECONDS.observe(time.perf_counter() - start)
+            
+            print(
+                f"Adaptive mesh ({lod or 'full'}): threshold {threshold:.4f} on {grid_w}x{grid_h} grid, "
+                f"{len(vertices)} vertices and {len(faces)} faces"
+            )
+            mesh = (vertices, faces, uv)
+            yield lod, mesh
+
+
+@dataclass(frozen=True)
+class PreparedImage:
+    """An upload decoded once, for both depth estimation and the texture."""
+    pixels: np.ndarray  # (h, w, 3) uint8 at mesh resolution: the depth model input
+    texture: EncodedTexture
+
+
+def prepare_image(
+    image_path: Path, options: TextureOptions, mesh_size: int = MESH_MAX_SIZE
+) -> PreparedImage:
+    """
+    Decode an upload once, at the larger of texture and mesh resolution, and
+    derive both the encoded texture and the mesh resolution pixels from it.
+    
+    Depth is then estimated at mesh resolution, so no full-size image or
+    depth map is ever materialized.
+    """
+    with Image.open(image_path) as source:
+        source_size = source.size
+    mesh_w, mesh_h = fit_size(source_size, mesh_size)
+    texture_w, texture_h = texture_size(source_size, options)
+    
+    image = decode_image(image_path, (max(mesh_w, texture_w), max(mesh_h, texture_h)))
+    texture = encode_texture(Path(image_path), options, image=image)
+    if image.size != (mesh_w, mesh_h):
+        image = image.resize((mesh_w, mesh_h), Image.LANCZOS)
+    
+    return PreparedImage(pixels=np.asarray(image), texture=texture)
+
+
+def lod_path(output_path: Path, lod: Optional[str]) -> Path:
+    """Where a level of detail of a GLB is written (the GLB itself for None)."""
+    return output_path if lod is None else output_path.with_suffix(f".{lod}.glb")
+
+
+def create_mesh_generator(
+    depth_scale: float = 0.3,
+    max_faces: int = 100000,
+    tessellation: Optional[str] = None,
+    profile: Optional[str] = None,
+    mesh_size: Optional[int] = None
+) -> MeshGenerator:
+    """Factory function to create a mesh generator (unset options come from settings)."""
+    return MeshGenerator(
+        depth_scale=depth_scale,
+        max_faces=max_faces,
+        tessellation=tessellation or settings.mesh_tessellation,
+        profile=profile or settings.glb_profile,
+        texture=texture_options(),
+        lods=mesh_lods(),
+        mesh_size=mesh_size or MESH_MAX_SIZE
+    )
+
+
+def detail_mesh_size(depth_detail: str) -> int:
+    """
+    Longest side of the mesh grid (and depth map) for a depth detail level.
+
+    High detail is capped by HIGH_DETAIL_MAX_SIZE, and lower if tiled depth
+    and meshing would not fit DEPTH_TILE_MEMORY_MB at that size.
+    """
+    if depth_detail != "high":
+        return MESH_MAX_SIZE
+    return working_size(settings.high_detail_max_size, settings.depth_tile_memory_mb)
+
+
+def texture_options() -> TextureOptions:
+    """Texture settings from the app config."""
+    return TextureOptions(
+        codec=settings.texture_codec,
+        quality=settings.texture_quality,
+        max_size=settings.texture_max_size,
+        power_of_two=settings.texture_power_of_two
+    )
 
 
-def create_mesh_generator(depth_scale: float = 0.3, max_faces: int = 100000) -> MeshGenerator:
-    """Factory function to create a mesh generator."""
-    return MeshGenerator(depth_scale=depth_scale, max_faces=max_faces)
+def mesh_lods() -> Dict[str, int]:
+    """Reduced levels of detail from the app config (name -> max faces)."""
+    return {
+        "low": settings.mesh_lod_low_faces,
+        "medium": settings.mesh_lod_medium_faces
+    }
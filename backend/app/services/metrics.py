@@ -0,0 +1,225 @@
+"""
+Metrics: pipeline counters, gauges and histograms for /metrics
+
+A small in-process registry rendered in the Prometheus text format
+(version 0.0.4), so the API needs no client library. Recording a value
+is a bisect and two additions under a lock; gauges are only set when
+/metrics is scraped, so nothing on the job path keeps them up to date.
+
+Inference worker processes (see inference_pool) can't update the API's
+registry directly. They buffer their observations instead
+(``forward_to_parent``), and the pool replays them in the API process
+with each task's result. Model load, depth and meshing times therefore
+show up whichever process ran them. Standalone job workers (app.worker)
+keep their own registry, which the API's /metrics does not include; each
+serves it on WORKER_METRICS_PORT instead.
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+PREFIX = "imageto3d_"
+
+# Bucket bounds in seconds: pipeline stages, and whole jobs or waits
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+JOB_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600)
+
+_registry: Dict[str, "Metric"] = {}
+
+# Observations waiting to be sent to the API process (worker processes only)
+_forwarded: Optional[List[Tuple[str, float]]] = None
+
+
+def _format(value: float) -> str:
+    """A sample value in the exposition format."""
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+def _label_text(names: Sequence[str], values: Sequence[str]) -> str:
+    """``{name="value",...}`` (empty without labels)."""
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Metric(ABC):
+    """A named metric in the registry."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = PREFIX + name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry[self.name] = self
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        """Label values in declaration order."""
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> Iterator[str]:
+        """Sample lines, without HELP / TYPE."""
+        pass
+
+    def render(self) -> str:
+        """HELP, TYPE and sample lines."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """A total that only goes up, per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_label_text(self.labelnames, key)} {_format(value)}"
+
+
+class Gauge(Metric):
+    """A value that is set, not accumulated (no labels)."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str):
+        super().__init__(name, documentation)
+        self._value = 0.0
+
+    def set(self, value: float):
+        self._value = value
+
+    def samples(self) -> Iterator[str]:
+        yield f"{self.name} {_format(self._value)}"
+
+
+class Histogram(Metric):
+    """Distribution of durations over fixed buckets (no labels)."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float] = STAGE_BUCKETS):
+        super().__init__(name, documentation)
+        self.buckets = tuple(float(bound) for bound in buckets)
+        # Per-bucket (not cumulative) counts; the last one is +Inf
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+
+    def observe(self, value: float):
+        """Record one value (buffered for the API process in inference workers)."""
+        if _forwarded is not None:
+            _forwarded.append((self.name, value))
+            return
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    @contextmanager
+    def time(self):
+        """Observe the duration of a block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            yield f'{self.name}_bucket{{le="{_format(bound)}"}} {cumulative}'
+        yield f"{self.name}_sum {_format(total)}"
+        yield f"{self.name}_count {cumulative}"
+
+
+def render() -> str:
+    """Every registered metric, in the text exposition format."""
+    return "\n".join(metric.render() for metric in _registry.values()) + "\n"
+
+
+def forward_to_parent():
+    """Buffer observations in this process until drained (inference workers)."""
+    global _forwarded
+    _forwarded = []
+
+
+def drain() -> List[Tuple[str, float]]:
+    """Take the buffered observations (none outside inference workers)."""
+    global _forwarded
+    if not _forwarded:
+        return []
+    observations, _forwarded = _forwarded, []
+    return observations
+
+
+def replay(observations: List[Tuple[str, float]]):
+    """Record observations drained in a worker process."""
+    for name, value in observations:
+        _registry[name].observe(value)
+
+
+# --- Pipeline metrics ---
+
+UPLOAD_SECONDS = Histogram(
+    "upload_seconds", "Time to store and validate an accepted upload (rejected ones are not counted)."
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "queue_wait_seconds", "Time jobs wait in the queue for a worker slot.", JOB_BUCKETS
+)
+MODEL_LOAD_SECONDS = Histogram(
+    "model_load_seconds", "Time to load the depth model.", JOB_BUCKETS
+)
+DEPTH_INFERENCE_SECONDS = Histogram(
+    "depth_inference_seconds", "Time per depth estimation call (a batch, or a tiled high detail image)."
+)
+MESH_BUILD_SECONDS = Histogram(
+    "mesh_build_seconds", "Time to build a job's mesh topology (full grid, or the adaptive quadtree)."
+)
+MESH_SIMPLIFY_SECONDS = Histogram(
+    "mesh_simplify_seconds", "Time to reduce a mesh to one face budget (grid decimation, or an adaptive quadtree level)."
+)
+GLB_EXPORT_SECONDS = Histogram(
+    "glb_export_seconds", "Time to encode and write one GLB file (each level of detail)."
+)
+JOB_SECONDS = Histogram(
+    "job_seconds", "Processing time of completed jobs, from worker slot to stored output.", JOB_BUCKETS
+)
+
+QUEUED_JOBS = Gauge("queued_jobs", "Jobs waiting for a worker slot.")
+RUNNING_JOBS = Gauge("running_jobs", "Jobs being processed.")
+MODEL_LOADED = Gauge("model_loaded", "1 if the depth model is loaded and ready, else 0.")
+
+JOBS_COMPLETED = Counter(
+    "jobs_completed_total", "Completed jobs, by mode and whether a cached result was reused.", ("mode", "cached")
+)
+JOBS_FAILED = Counter("jobs_failed_total", "Failed jobs, by mode.", ("mode",))
@@ -5,30 +5,44 @@ import asyncio
 import time
 from pathlib import Path
 
-from app.services.job_service import job_service
+from app.config import settings
+from app.services.job_service import async_job_service
+from app.services.metrics import JOB_SECONDS, JOBS_COMPLETED, JOBS_FAILED
 from app.services.storage import storage
 from app.models import JobStatus
 
 
 async def update_progress(job_id: str, progress: int, status: str = "processing"):
-    """Helper to update job progress"""
-    job_service.update_job_status(job_id, status=JobStatus(status), progress=progress)
-    await asyncio.sleep(0.01)
+    """Helper to update job progress (written to the DB in batches)"""
+    async_job_service.report_progress(job_id, progress, status=JobStatus(status))
 
 
-async def process_job(job_id: str, image_path: str, output_path: str, mode: str):
+async def process_job(
+    job_id: str,
+    image_path: str,
+    output_path: str,
+    mode: str,
+    output_profile: str = "standard",
+    depth_detail: str = "standard"
+):
     """
     Process an image-to-3D job using the real AI pipeline
     
+    Reports the same job metrics as the queue (stage timings are recorded
+    by the depth estimator and mesh generator themselves).
+    
     Args:
         job_id: Unique job identifier
         image_path: Path to uploaded image
         output_path: Where to save the GLB file
         mode: 'single' or 'multi' (affects depth scale)
+        output_profile: GLB encoding (standard, quantized, compressed)
+        depth_detail: Depth resolution (standard, or high for tiled depth)
     """
     # for avoid circular imports and delay model loading
-    from app.services.depth_estimator import get_depth_estimator
-    from app.services.mesh_generator import create_mesh_generator
+    from app.services.depth_estimator import get_depth_batcher
+    from app.services.inference_pool import get_inference_pool
+    from app.services.mesh_generator import detail_mesh_size
     
     start_time = time.time()
     
@@ -42,20 +56,23 @@ async def process_job(job_id: str, image_path: str, output_path: str, mode: str)
         # Ensure output directory exists
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
+        # Decode once, at mesh resolution for depth and texture size for the texture
+        mesh_size = detail_mesh_size(depth_detail)
+        prepared = await get_inference_pool().prepare_image(image_path, mesh_size)
+        
         await update_progress(job_id, 10)
         
         # Stage 2: Depth Estimation (10-50%)
         await update_progress(job_id, 15)
         
-        depth_estimator = get_depth_estimator()
-        
-        # Run depth estimation in thread pool (CPU-bound)
-        loop = asyncio.get_event_loop()
-        depth_map = await loop.run_in_executor(
-            None, 
-            depth_estimator.estimate, 
-            image_path
-        )
+        if depth_detail == "high":
+            # Tiled, within the memory budget (not batched with other jobs)
+            depth_map = await get_inference_pool().estimate_tiled(
+                prepared.pixels, settings.depth_tile_memory_mb
+            )
+        else:
+            # Run depth estimation (batched with concurrent jobs)
+            depth_map = await get_depth_batcher().estimate(prepared.pixels)
         
         await update_progress(job_id, 50)
         
@@ -64,15 +81,17 @@ async def process_job(job_id: str, image_path: str, output_path: str, mode: str)
         
         # Adjust depth scale based on mode
         depth_scale = 0.2 if mode == "single" else 0.4
-        mesh_generator = create_mesh_generator(depth_scale=depth_scale)
         
-        # Run mesh generation in thread pool
-        await loop.run_in_executor(
-            None,
-            mesh_generator.generate,
+        # Run mesh generation off the event loop
+        await get_inference_pool().generate_mesh(
             image_path,
             depth_map,
-            output_path
+            output_path,
+            depth_scale=depth_scale,
+            depth_path=storage.get_depth_path(job_id),
+            profile=output_profile,
+            texture=prepared.texture,
+            mesh_size=mesh_size
         )
         
         await update_progress(job_id, 80)
@@ -88,14 +107,21 @@ async def process_job(job_id: str, image_path: str, output_path: str, mode: str)
         if file_size < 100:
             raise RuntimeError("GLB file is too small, generation may have failed")
         
+        # Fingerprint and precompress for download
+        loop = asyncio.get_running_loop()
+        etag = await loop.run_in_executor(None, storage.finalize_outputs, job_id)
+        
         processing_time = time.time() - start_time
         
         # Mark as complete
-        job_service.complete_job(
+        await async_job_service.complete_job(
             job_id=job_id,
             output_file=str(output_path),
-            processing_time=processing_time
+            processing_time=processing_time,
+            etag=etag
         )
+        JOB_SECONDS.observe(processing_time)
+        JOBS_COMPLETED.inc(mode=mode, cached="false")
         
         print(f"✓ Job {job_id} completed in {processing_time:.2f}s (output: {file_size} bytes)")
         
@@ -103,10 +129,11 @@ async def process_job(job_id: str, image_path: str, output_path: str, mode: str)
         processing_time = time.time() - start_time
         error_message = str(e)
         
-        job_service.fail_job(
+        await async_job_service.fail_job(
             job_id=job_id,
             error_message=error_message
         )
+        JOBS_FAILED.inc(mode=mode)
         
         print(f"✗ Job {job_id} failed after {processing_time:.2f}s: {error_message}")
         raise
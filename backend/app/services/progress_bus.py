@@ -0,0 +1,43 @@
+import asyncio
+from typing import Dict, List, Tuple
+
+from app.models import Job, JobResponse
+
+
+def job_event(job: Job) -> dict:
+    """Serialize a job the same way GET /api/jobs/{id} does."""
+    return JobResponse.model_validate(job).model_dump(mode="json")
+
+
+class ProgressBus:
+    """In-process publish/subscribe of job updates."""
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        """Start receiving updates for a job (call from the event loop)."""
+        queue = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+        self._subscribers.setdefault(job_id, []).append((loop, queue))
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue):
+        """Stop receiving updates for a job."""
+        subscribers = self._subscribers.get(job_id, [])
+        self._subscribers[job_id] = [s for s in subscribers if s[1] is not queue]
+        if not self._subscribers[job_id]:
+            del self._subscribers[job_id]
+
+    def publish(self, job_id: str, event: dict):
+        """Send an update to every subscriber (safe from any thread)."""
+        for loop, queue in self._subscribers.get(job_id, []):
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+    def publish_job(self, job: Job):
+        """Publish a job's current state."""
+        if job.id in self._subscribers:
+            self.publish(job.id, job_event(job))
+
+
+progress_bus = ProgressBus()
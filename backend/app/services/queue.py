@@ -1,24 +1,139 @@
 import asyncio
+import math
 import time
-from typing import Optional
-from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
 
-from app.models import JobStatus
-from app.services.job_service import job_service
+from app.config import settings
+from app.models import DepthDetail, Job, JobPriority, JobStatus, OutputProfile, ProcessingMode
+from app.services.job_service import async_job_service
+from app.services.metrics import JOB_SECONDS, JOBS_COMPLETED, JOBS_FAILED, QUEUE_WAIT_SECONDS
 from app.services.storage import storage
+from app.services.result_cache import result_cache
 from app.processors import get_processor
 
+# Every BULK_SHARE-th free slot goes to the bulk lane first, so bulk jobs
+# make progress under sustained interactive load
+BULK_SHARE = 4
+
+# Assumed job duration before any job has completed
+DEFAULT_PROCESSING_TIME = 30.0
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue has no room left."""
+    
+    def __init__(self, retry_after: int):
+        super().__init__(f"Job queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
 
 class JobQueue:
-    """Background job processing queue."""
+    """
+    Background job processing queue.
+    
+    Jobs wait in one FIFO lane per priority and run on a fixed number of
+    worker slots. At most ``max_queued`` jobs may wait at once.
+    """
     
-    def __init__(self):
-        self.executor = ThreadPoolExecutor(max_workers=2)
+    def __init__(self, workers: int = 2, max_queued: int = 50, run_locally: bool = True):
         self.processor = get_processor()
+        self.run_locally = run_locally
+        self.workers = max(1, workers)
+        self.max_queued = max_queued
+        
+        # (job_id, cache_key, monotonic time queued) per priority
+        self._lanes: Dict[JobPriority, Deque[Tuple[str, Optional[str], float]]] = {
+            priority: deque() for priority in JobPriority
+        }
+        self._available: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._picks = 0
+        self.running = 0
+        
+        # Recent processing times, for Retry-After estimates
+        self._durations: Deque[float] = deque(maxlen=50)
+    
+    @property
+    def queued(self) -> int:
+        """Number of jobs waiting for a slot."""
+        return sum(len(lane) for lane in self._lanes.values())
+    
+    @property
+    def full(self) -> bool:
+        """Whether a new job would be refused (identical running jobs aside)."""
+        return self.run_locally and self.queued >= self.max_queued
+    
+    def _start(self):
+        """Start worker slots on the running event loop (once per loop)."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        
+        self._loop = loop
+        self._available = asyncio.Semaphore(self.queued)
+        for _ in range(self.workers):
+            asyncio.create_task(self._worker())
+    
+    def _pick(self) -> Tuple[str, Optional[str], float]:
+        """Take the next job: interactive first, FIFO within each lane."""
+        self._picks += 1
+        order = [JobPriority.INTERACTIVE, JobPriority.BULK]
+        if self._picks % BULK_SHARE == 0:
+            order.reverse()
+        
+        for priority in order:
+            if self._lanes[priority]:
+                return self._lanes[priority].popleft()
+        raise RuntimeError("No queued job to pick")
+    
+    async def _worker(self):
+        """Worker slot: run queued jobs one at a time."""
+        while True:
+            await self._available.acquire()
+            job_id, cache_key, queued_at = self._pick()
+            QUEUE_WAIT_SECONDS.observe(time.monotonic() - queued_at)
+            
+            self.running += 1
+            try:
+                if cache_key:
+                    await self._run_leader(job_id, cache_key)
+                else:
+                    await self.process_job(job_id)
+            except Exception as e:
+                print(f"✗ Job {job_id} worker error: {e}")
+            finally:
+                self.running -= 1
+    
+    def _submit(self, job_id: str, cache_key: Optional[str], priority: JobPriority):
+        """Put a job in its lane and wake a worker."""
+        self._start()
+        self._lanes[priority].append((job_id, cache_key, time.monotonic()))
+        self._available.release()
+    
+    async def retry_after(self) -> int:
+        """Seconds until a queue slot is likely to free up."""
+        if self._durations:
+            mean_time = sum(self._durations) / len(self._durations)
+        else:
+            mean_time = await async_job_service.get_mean_processing_time() or DEFAULT_PROCESSING_TIME
+            self._durations.append(mean_time)
+        
+        return max(1, math.ceil(mean_time / self.workers))
+    
+    def stats(self) -> dict:
+        """Queue depth per lane and running jobs."""
+        return {
+            "running": self.running,
+            "workers": self.workers,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "lanes": {priority.value: len(lane) for priority, lane in self._lanes.items()},
+        }
     
     async def process_job(self, job_id: str) -> bool:
         """Process a single job."""
-        job = job_service.get_job(job_id)
+        job = await async_job_service.get_job(job_id)
         
         if not job:
             print(f"Job {job_id} not found")
@@ -28,47 +143,153 @@ class JobQueue:
         
         try:
             # Update status to processing
-            job_service.update_job_status(job_id, JobStatus.PROCESSING, progress=0)
+            async_job_service.report_progress(job_id, 0)
             
-            input_path = job.input_file
+            input_path = str(storage.resolve_upload(job.input_file))
             output_path = str(storage.get_output_path(job_id))
             
             def update_progress(progress: int):
-                job_service.update_job_status(job_id, JobStatus.PROCESSING, progress=progress)
+                async_job_service.report_progress(job_id, progress)
             
             # Run processor
             success = await self.processor.process(
                 input_path=input_path,
                 output_path=output_path,
-                progress_callback=update_progress
+                progress_callback=update_progress,
+                output_profile=job.output_profile.value,
+                depth_detail=job.depth_detail.value
             )
             
-            processing_time = time.time() - start_time
-            
             if success:
-                job_service.complete_job(job_id, output_path, processing_time)
+                # Fingerprint and precompress once, off the event loop
+                loop = asyncio.get_running_loop()
+                etag = await loop.run_in_executor(None, storage.finalize_outputs, job_id)
+                
+                processing_time = time.time() - start_time
+                self._durations.append(processing_time)
+                await async_job_service.complete_job(job_id, output_path, processing_time, etag)
+                JOB_SECONDS.observe(processing_time)
+                JOBS_COMPLETED.inc(mode=job.mode.value, cached="false")
                 print(f"✓ Job {job_id} completed in {processing_time:.2f}s")
                 return True
             else:
-                job_service.fail_job(job_id, "Processing failed")
+                await async_job_service.fail_job(job_id, "Processing failed")
+                JOBS_FAILED.inc(mode=job.mode.value)
                 print(f"✗ Job {job_id} failed")
                 return False
                 
         except Exception as e:
             processing_time = time.time() - start_time
             error_msg = str(e)
-            job_service.fail_job(job_id, error_msg)
+            await async_job_service.fail_job(job_id, error_msg)
+            JOBS_FAILED.inc(mode=job.mode.value)
             print(f"✗ Job {job_id} error: {error_msg}")
             return False
     
-    def enqueue(self, job_id: str):
-        """Add job to background processing queue."""
+    def cache_key(
+        self,
+        content_hash: str,
+        mode: ProcessingMode,
+        output_profile: OutputProfile = OutputProfile.STANDARD,
+        depth_detail: DepthDetail = DepthDetail.STANDARD
+    ) -> str:
+        """Result cache key for an upload processed by the current processor."""
+        params = {
+            "processor": self.processor.name,
+            "output_profile": output_profile.value,
+            "depth_detail": depth_detail.value,
+            **self.processor.params
+        }
+        return result_cache.make_key(content_hash, mode.value, params)
+    
+    async def complete_from_cache(self, job_id: str, source_job_id: str) -> Optional[Job]:
+        """Complete a job by linking another job's outputs."""
+        start_time = time.time()
+        output_path = storage.link_outputs(source_job_id, job_id)
+        processing_time = time.time() - start_time
+        
+        # Same files, same fingerprint
+        source = await async_job_service.get_job(source_job_id)
+        etag = source.etag if source else None
+        
+        job = await async_job_service.complete_job(job_id, str(output_path), processing_time, etag)
+        if job is not None:
+            JOBS_COMPLETED.inc(mode=job.mode.value, cached="true")
+        print(f"✓ Job {job_id} completed from cache")
+        return job
+    
+    async def _run_leader(self, job_id: str, cache_key: str):
+        """Process a job and publish its result to identical jobs."""
+        success = False
+        try:
+            success = await self.process_job(job_id)
+        finally:
+            result_cache.finish(cache_key, job_id if success else None)
+    
+    async def _run_follower(self, job_id: str, leader: asyncio.Future, priority: JobPriority):
+        """Wait for an identical job, then reuse its result (or queue on failure)."""
+        source_job_id = await asyncio.shield(leader)
+        
+        if source_job_id and storage.output_exists(source_job_id):
+            await self.complete_from_cache(job_id, source_job_id)
+        else:
+            self._submit(job_id, None, priority)
+    
+    async def enqueue(
+        self,
+        job_id: str,
+        cache_key: Optional[str] = None,
+        priority: JobPriority = JobPriority.INTERACTIVE
+    ) -> Optional[Job]:
+        """
+        Add job to background processing queue.
+        
+        With a cache key, a cached result completes the job immediately and
+        an identical job already running is awaited instead of rerun; neither
+        takes a queue slot.
+        
+        Returns:
+            The updated job
+            
+        Raises:
+            QueueFullError: if max_queued jobs are already waiting
+        """
+        if cache_key:
+            cached = result_cache.get(cache_key)
+            if cached is not None:
+                return await self.complete_from_cache(job_id, cached)
+        
+        # Standalone workers claim queued jobs from the database
+        if not self.run_locally:
+            job = await async_job_service.update_job_status(job_id, JobStatus.QUEUED)
+            print(f"Job {job_id} queued for workers")
+            return job
+        
+        leader = result_cache.get_inflight(cache_key) if cache_key else None
+        
+        if leader is None and self.full:
+            raise QueueFullError(await self.retry_after())
+        
         # to queued
-        job_service.update_job_status(job_id, JobStatus.QUEUED)
+        async_job_service.report_progress(job_id, 0, JobStatus.QUEUED)
+        job = await async_job_service.get_job(job_id)
         
         # background
-        asyncio.create_task(self.process_job(job_id))
-        print(f"Job {job_id} enqueued")
+        if leader is not None:
+            asyncio.create_task(self._run_follower(job_id, leader, priority))
+            print(f"Job {job_id} attached to an identical running job")
+            return job
+        
+        if cache_key:
+            result_cache.begin(cache_key)
+        self._submit(job_id, cache_key, priority)
+        
+        print(f"Job {job_id} enqueued ({priority.value}, {self.queued} waiting)")
+        return job
 
 
-job_queue = JobQueue()
+job_queue = JobQueue(
+    workers=settings.job_workers,
+    max_queued=settings.max_queued_jobs,
+    run_locally=settings.run_jobs_in_api
+)
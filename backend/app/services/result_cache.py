@@ -0,0 +1,100 @@
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from app.config import settings
+from app.services.storage import storage
+
+
+class ResultCache:
+    """Content-addressed cache of finished jobs plus in-flight runs."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.inflight_hits = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(content_hash: str, mode: str, params: dict) -> str:
+        """Build a cache key from the upload hash, mode and mesh parameters."""
+        payload = json.dumps(
+            {"sha256": content_hash, "mode": mode, **params},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Get the ID of a finished job for a key, or None on a miss."""
+        job_id = self._entries.get(key)
+
+        # The source job may have been deleted since
+        if job_id is not None and not storage.output_exists(job_id):
+            del self._entries[key]
+            job_id = None
+
+        if job_id is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return job_id
+
+    def put(self, key: str, job_id: str):
+        """Remember the job whose outputs belong to a key."""
+        self._entries[key] = job_id
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def discard_job(self, job_id: str):
+        """Drop entries pointing at a job whose outputs have changed."""
+        for key in [k for k, v in self._entries.items() if v == job_id]:
+            del self._entries[key]
+
+    def get_inflight(self, key: str) -> Optional[asyncio.Future]:
+        """Get the pending result of a run with the same key, if any."""
+        future = self._inflight.get(key)
+        if future is not None:
+            self.inflight_hits += 1
+        return future
+
+    def begin(self, key: str) -> asyncio.Future:
+        """Register a run for a key; identical jobs can await its future."""
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        return future
+
+    def finish(self, key: str, job_id: Optional[str]):
+        """Resolve a run with its job ID (None if it failed)."""
+        future = self._inflight.pop(key, None)
+
+        if job_id is not None:
+            self.put(key, job_id)
+
+        if future is not None and not future.done():
+            future.set_result(job_id)
+
+    def stats(self) -> dict:
+        """Cache counters."""
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "inflight_hits": self.inflight_hits,
+            "evictions": self.evictions,
+        }
+
+
+result_cache = ResultCache(max_entries=settings.result_cache_size)
@@ -1,11 +1,45 @@
+import gzip
+import hashlib
 import os
+import shutil
 import uuid
 import aiofiles
 from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Tuple
 from fastapi import UploadFile
 
 from app.config import settings
 
+if TYPE_CHECKING:
+    from app.api.dependencies import ImageValidator
+
+try:
+    import brotli
+except ImportError:  # optional: gzip variants only
+    brotli = None
+
+# Upload read size
+CHUNK_SIZE = 1024 * 1024
+
+# Reduced levels of detail stored next to each GLB ("high" is the GLB itself)
+MESH_LODS = ("low", "medium")
+
+# Precompressed download variants: Content-Encoding -> file suffix, best first
+DOWNLOAD_ENCODINGS = {"br": ".br", "gzip": ".gz"}
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 9  # 11 takes seconds per model for about 2% less
+# A variant is only kept below this fraction of the original size
+PRECOMPRESS_MAX_RATIO = 0.95
+
+
+def _compress(data: bytes, encoding: str) -> Optional[bytes]:
+    """Compress data with a download encoding (None if unavailable)."""
+    if encoding == "gzip":
+        return gzip.compress(data, GZIP_LEVEL, mtime=0)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return None
+
 
 class StorageService:
     """Handle file storage operations."""
@@ -22,29 +56,149 @@ class StorageService:
         """Generate a unique job ID."""
         return str(uuid.uuid4())[:8].upper()
     
-    async def save_upload(self, file: UploadFile, job_id: str) -> str:
-        """Save uploaded file and return the file path."""
-        # Get file extension
-        ext = Path(file.filename).suffix.lower() if file.filename else ".jpg"
+    async def save_upload(
+        self, file: UploadFile, job_id: str, validator: Optional["ImageValidator"] = None
+    ) -> Tuple[str, str]:
+        """
+        Save uploaded file and return the file path and its SHA-256.
+        
+        The body is read once, in chunks: each chunk is hashed, written and
+        passed to ``validator.feed`` (if given), and ``validator.finish`` runs
+        at the end. If validation fails the partial file is removed.
+        """
+        chunk = await file.read(CHUNK_SIZE)
+        
+        # Get file extension (from the sniffed type when validating)
+        if validator is not None:
+            validator.feed(chunk)
+            ext = validator.extension
+        else:
+            ext = Path(file.filename).suffix.lower() if file.filename else ".jpg"
         
         # Create filename
         filename = f"{job_id}_input{ext}"
         filepath = self.uploads_dir / filename
         
-        # Save file
-        async with aiofiles.open(filepath, "wb") as f:
-            content = await file.read()
-            await f.write(content)
+        # Save file, hashing it as it streams in
+        hasher = hashlib.sha256()
+        try:
+            async with aiofiles.open(filepath, "wb") as f:
+                while chunk:
+                    hasher.update(chunk)
+                    await f.write(chunk)
+                    chunk = await file.read(CHUNK_SIZE)
+                    if validator is not None:
+                        validator.feed(chunk)
+            
+            if validator is not None:
+                validator.finish()
+        except Exception:
+            filepath.unlink(missing_ok=True)
+            raise
         
-        return str(filepath)
+        return str(filepath), hasher.hexdigest()
+    
+    def resolve_upload(self, input_file: str) -> Path:
+        """
+        Locate a stored upload on this machine.
+        
+        Jobs record the path seen by the API node that received the upload;
+        workers may mount the same storage elsewhere, so only the file name
+        is kept.
+        """
+        return self.uploads_dir / Path(input_file).name
     
     def get_upload_path(self, job_id: str, ext: str = ".jpg") -> Path:
         """Get the path for an uploaded file."""
         return self.uploads_dir / f"{job_id}_input{ext}"
     
-    def get_output_path(self, job_id: str) -> Path:
-        """Get the path for an output GLB file."""
-        return self.outputs_dir / f"{job_id}_output.glb"
+    def get_output_path(self, job_id: str, lod: Optional[str] = None) -> Path:
+        """Get the path for an output GLB file (or one of its reduced levels of detail)."""
+        if lod is None:
+            return self.outputs_dir / f"{job_id}_output.glb"
+        return self.outputs_dir / f"{job_id}_output.{lod}.glb"
+    
+    def get_model_paths(self, job_id: str) -> List[Path]:
+        """Paths of a job's GLB and its levels of detail (existing or not)."""
+        return [self.get_output_path(job_id)] + [self.get_output_path(job_id, lod) for lod in MESH_LODS]
+    
+    def get_encoded_path(self, path: Path, encoding: str) -> Path:
+        """Path of a precompressed variant of a model file."""
+        return path.with_name(path.name + DOWNLOAD_ENCODINGS[encoding])
+    
+    def _model_files(self, job_id: str) -> List[Path]:
+        """A job's model paths and all their precompressed variants."""
+        paths = self.get_model_paths(job_id)
+        return paths + [self.get_encoded_path(path, encoding) for path in paths for encoding in DOWNLOAD_ENCODINGS]
+    
+    def finalize_outputs(self, job_id: str) -> Optional[str]:
+        """
+        Fingerprint a finished job's models and precompress them for download.
+        
+        Returns:
+            The job's ETag: a SHA-256 prefix over all its model files, so
+            it changes whenever any level does (None without a model)
+        """
+        if not self.output_exists(job_id):
+            return None
+        
+        hasher = hashlib.sha256()
+        for path in self.get_model_paths(job_id):
+            if not path.exists():
+                for encoding in DOWNLOAD_ENCODINGS:
+                    self.get_encoded_path(path, encoding).unlink(missing_ok=True)
+                continue
+            
+            data = path.read_bytes()
+            hasher.update(f"{path.name}:{len(data)}:".encode())
+            hasher.update(data)
+            
+            if settings.precompress_downloads:
+                self._precompress(path, data)
+        
+        return hasher.hexdigest()[:32]
+    
+    def _precompress(self, path: Path, data: bytes):
+        """Write (or drop) each precompressed variant of a model file."""
+        for encoding in DOWNLOAD_ENCODINGS:
+            target = self.get_encoded_path(path, encoding)
+            compressed = _compress(data, encoding)
+            
+            if compressed is None or len(compressed) > len(data) * PRECOMPRESS_MAX_RATIO:
+                target.unlink(missing_ok=True)
+                continue
+            
+            # Swap in a new file: cached jobs may hard link the old one (the
+            # temp name is unique, concurrent re-meshes finalize the same job)
+            tmp_path = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+            tmp_path.write_bytes(compressed)
+            os.replace(tmp_path, target)
+    
+    def get_depth_path(self, job_id: str) -> Path:
+        """Get the path for a job's stored depth map (next to its GLB)."""
+        return self.get_output_path(job_id).with_suffix(".npy")
+    
+    def link_outputs(self, source_job_id: str, job_id: str) -> Path:
+        """
+        Reuse another job's outputs (hard link, copy as fallback).
+        
+        Returns:
+            Path of the job's GLB
+        """
+        pairs = list(zip(self._model_files(source_job_id), self._model_files(job_id)))
+        pairs.append((self.get_depth_path(source_job_id), self.get_depth_path(job_id)))
+        
+        for source, target in pairs:
+            if target.exists():
+                target.unlink()
+            if not source.exists():
+                continue
+            try:
+                os.link(source, target)
+            except OSError:
+                shutil.copyfile(source, target)
+        
+        return self.get_output_path(job_id)
     
     def output_exists(self, job_id: str) -> bool:
         """Check if output file exists."""
@@ -62,10 +216,10 @@ class StorageService:
             if path.exists():
                 path.unlink()
         
-        # Delete output
-        output = self.get_output_path(job_id)
-        if output.exists():
-            output.unlink()
+        # Delete outputs
+        for output in self._model_files(job_id) + [self.get_depth_path(job_id)]:
+            if output.exists():
+                output.unlink()
 
 
 storage = StorageService()
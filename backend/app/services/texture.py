@@ -0,0 +1,108 @@
+"""
+Texture Encoder: prepare the base color texture embedded in GLB models
+
+The texture is sized independently of the mesh (up to ``max_size`` per
+side, optionally snapped to powers of two) and encoded once as JPEG, WebP
+(EXT_texture_webp) or PNG. An upload that already has the target format
+and size is embedded byte for byte instead of being re-encoded.
+"""
+import io
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Tuple
+
+from PIL import Image
+
+from app.services.image_decode import decode_image
+
+# codec -> (PIL format, MIME type)
+TEXTURE_CODECS = {
+    "jpeg": ("JPEG", "image/jpeg"),
+    "webp": ("WEBP", "image/webp"),
+    "png": ("PNG", "image/png"),
+}
+
+
+@dataclass(frozen=True)
+class TextureOptions:
+    """How to size and encode a texture."""
+    codec: str = "jpeg"
+    quality: int = 85
+    max_size: int = 512
+    power_of_two: bool = False
+
+    def __post_init__(self):
+        if self.codec not in TEXTURE_CODECS:
+            raise ValueError(f"Unknown texture codec: {self.codec}")
+
+
+@dataclass(frozen=True)
+class EncodedTexture:
+    """An encoded texture ready to embed."""
+    data: bytes
+    mime_type: str
+    size: Tuple[int, int]
+    encode_time: float
+
+
+def _power_of_two(length: int) -> int:
+    """Nearest power of two (in log scale)."""
+    lower = 1 << (max(1, length).bit_length() - 1)
+    return lower * 2 if length > lower * 1.5 else lower
+
+
+def texture_size(size: Tuple[int, int], options: TextureOptions) -> Tuple[int, int]:
+    """Texture dimensions for an image of the given size."""
+    w, h = size
+    scale = min(1.0, options.max_size / max(w, h))
+    w, h = max(1, round(w * scale)), max(1, round(h * scale))
+
+    if options.power_of_two:
+        limit = _power_of_two(options.max_size)
+        if limit > options.max_size:
+            limit //= 2
+        w, h = min(_power_of_two(w), limit), min(_power_of_two(h), limit)
+    return w, h
+
+
+def encode_texture(
+    image_path: Path,
+    options: TextureOptions,
+    image: Optional[Image.Image] = None
+) -> EncodedTexture:
+    """
+    Load, resize and encode an image as a GLB texture.
+
+    ``image`` is the upload already decoded as RGB at texture size or larger
+    (see prepare_image); without it the file is decoded at a reduced size.
+    """
+    start = time.perf_counter()
+    pil_format, mime_type = TEXTURE_CODECS[options.codec]
+
+    with Image.open(image_path) as source:
+        size = texture_size(source.size, options)
+        # Already in the right format and size: embed as-is
+        passthrough = source.format == pil_format and source.mode == "RGB" and source.size == size
+
+    if passthrough:
+        data = Path(image_path).read_bytes()
+    else:
+        if image is None:
+            image = decode_image(image_path, size)
+        if image.size != size:
+            image = image.resize(size, Image.LANCZOS)
+
+        buffer = io.BytesIO()
+        if pil_format == "PNG":
+            image.save(buffer, format=pil_format, optimize=False)
+        else:
+            image.save(buffer, format=pil_format, quality=options.quality)
+        data = buffer.getvalue()
+
+    encode_time = time.perf_counter() - start
+    print(
+        f"Texture: {size[0]}x{size[1]} {options.codec}, "
+        f"{len(data)} bytes in {encode_time * 1000:.1f}ms"
+    )
+    return EncodedTexture(data=data, mime_type=mime_type, size=size, encode_time=encode_time)
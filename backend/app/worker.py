@@ -0,0 +1,216 @@
+"""
+Standalone job worker
+
+Runs jobs outside the API process so processing can scale across machines
+that share the database and storage. Start the API with
+``RUN_JOBS_IN_API=false`` and run any number of workers:
+
+    python -m app.worker
+
+Each worker claims jobs through a lease in the database. The lease is
+renewed while the job runs; if a worker dies, its lease expires and another
+worker picks the job up again, up to ``worker_max_attempts`` times.
+
+With ``WORKER_METRICS_PORT`` set, a worker serves its own /metrics there:
+the stage timings and job counters of the jobs it ran.
+"""
+import asyncio
+import os
+import signal
+import socket
+import uuid
+from datetime import datetime
+
+from app.config import settings
+from app.db import init_db
+from app.models import Job, JobStatus
+from app.services import metrics
+from app.services.job_service import async_job_service
+from app.services.queue import job_queue
+
+
+class Worker:
+    """Claims queued jobs from the database and runs them."""
+
+    def __init__(
+        self,
+        slots: int = 2,
+        lease_seconds: int = 60,
+        heartbeat_seconds: int = 15,
+        poll_interval: float = 1.0,
+        max_attempts: int = 3
+    ):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.slots = max(1, slots)
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.running = 0
+        self._stopping = asyncio.Event()
+
+    def stop(self):
+        """Stop claiming new jobs; running jobs are allowed to finish."""
+        if not self._stopping.is_set():
+            print(f"Worker {self.worker_id} stopping...")
+            self._stopping.set()
+
+    async def run(self):
+        """Run claim loops until stopped."""
+        print(f"✓ Worker {self.worker_id} started ({self.slots} slots)")
+        await asyncio.gather(*(self._claim_loop() for _ in range(self.slots)))
+        await async_job_service.flush_progress()
+        print(f"✓ Worker {self.worker_id} stopped")
+
+    async def _claim_loop(self):
+        """One job slot: claim, run, repeat."""
+        while not self._stopping.is_set():
+            try:
+                job = await async_job_service.claim_next_job(self.worker_id, self.lease_seconds)
+            except Exception as e:
+                print(f"✗ Worker {self.worker_id} claim error: {e}")
+                job = None
+
+            if job is None:
+                # Nothing to do, wait for the next poll (or shutdown)
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run_job(job)
+
+    async def _run_job(self, job: Job):
+        """Run a claimed job while keeping its lease alive."""
+        if job.attempts > self.max_attempts:
+            await async_job_service.fail_job(
+                job.id, f"Gave up after {self.max_attempts} attempts"
+            )
+            print(f"✗ Job {job.id} exceeded {self.max_attempts} attempts")
+            return
+
+        print(f"Job {job.id} claimed by {self.worker_id} (attempt {job.attempts})")
+        if job.attempts == 1:
+            # Wait from upload to first claim (retries would count lease expiry)
+            metrics.QUEUE_WAIT_SECONDS.observe((datetime.utcnow() - job.created_at).total_seconds())
+        self.running += 1
+        try:
+            await self._watch_job(job)
+        finally:
+            self.running -= 1
+
+    async def _watch_job(self, job: Job):
+        """Process a job, renewing its lease until it ends (or is lost)."""
+        task = asyncio.create_task(job_queue.process_job(job.id))
+
+        while not task.done():
+            done, _ = await asyncio.wait({task}, timeout=self.heartbeat_seconds)
+            if done:
+                break
+
+            try:
+                renewed = await async_job_service.renew_lease(job.id, self.worker_id, self.lease_seconds)
+            except Exception as e:
+                # Keep going; the lease is still valid until it expires
+                print(f"✗ Job {job.id} lease renewal error: {e}")
+                continue
+
+            if not renewed:
+                # Another worker took over (or the job was deleted)
+                print(f"✗ Job {job.id} lease lost, abandoning")
+                task.cancel()
+                break
+
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+
+async def render_metrics(worker: Worker) -> str:
+    """This worker's metrics; the queue gauge is the shared queue in the database."""
+    from app.services.inference_pool import MODEL_READY, get_inference_pool
+
+    metrics.QUEUED_JOBS.set(await async_job_service.count_jobs(JobStatus.QUEUED))
+    metrics.RUNNING_JOBS.set(worker.running)
+    model_loaded = settings.processor_type != "dummy" and get_inference_pool().state == MODEL_READY
+    metrics.MODEL_LOADED.set(1 if model_loaded else 0)
+    return metrics.render()
+
+
+async def serve_metrics(worker: Worker, port: int) -> asyncio.AbstractServer:
+    """Answer ``GET /metrics`` on ``port`` (HTTP/1.0, one request per connection)."""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = (await reader.readline()).split()
+            # Skip the headers
+            while (await reader.readline()).strip():
+                pass
+
+            path = request[1].split(b"?")[0] if len(request) > 1 else b""
+            if request[:1] == [b"GET"] and path == b"/metrics":
+                status, content_type = "200 OK", metrics.CONTENT_TYPE
+                body = (await render_metrics(worker)).encode()
+            else:
+                status, content_type, body = "404 Not Found", "text/plain", b"Not found\n"
+
+            writer.write(
+                f"HTTP/1.0 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except Exception as e:
+            print(f"✗ Worker metrics request error: {e}")
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, port=port)
+    print(f"✓ Worker metrics on port {port}")
+    return server
+
+
+async def main():
+    init_db()
+
+    worker = Worker(
+        slots=settings.job_workers,
+        lease_seconds=settings.worker_lease_seconds,
+        heartbeat_seconds=settings.worker_heartbeat_seconds,
+        poll_interval=settings.worker_poll_interval,
+        max_attempts=settings.worker_max_attempts
+    )
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+
+    from app.services.inference_pool import get_inference_pool
+    pool = get_inference_pool()
+    model_tasks = []
+    if settings.processor_type != "dummy":
+        # Raises (and stops startup) if the tile memory budget is too small
+        from app.services.mesh_generator import detail_mesh_size
+        print(f"✓ High detail depth up to {detail_mesh_size('high')}px per side")
+        if settings.depth_preload:
+            model_tasks.append(asyncio.create_task(pool.warm_up()))
+        if settings.depth_idle_unload_seconds > 0:
+            model_tasks.append(asyncio.create_task(pool.run_idle_unloader(settings.depth_idle_unload_seconds)))
+
+    metrics_server = None
+    if settings.worker_metrics_port:
+        metrics_server = await serve_metrics(worker, settings.worker_metrics_port)
+
+    try:
+        await worker.run()
+    finally:
+        if metrics_server is not None:
+            metrics_server.close()
+        for task in model_tasks:
+            task.cancel()
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,5 +1,5 @@
 import { useState, useCallback, useRef, useEffect } from 'react';
-import { createJob, getJob } from '../services/api';
+import { createJob, getJob, subscribeToJob } from '../services/api';
 import { JOB_STATUS, POLL_INTERVAL } from '../utils/constants';
 
 export default function useJob() {
@@ -7,12 +7,16 @@ export default function useJob() {
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState(null);
   const pollIntervalRef = useRef(null);
+  const unsubscribeRef = useRef(null);
 
   useEffect(() => {
     return () => {
       if (pollIntervalRef.current) {
         clearInterval(pollIntervalRef.current);
       }
+      if (unsubscribeRef.current) {
+        unsubscribeRef.current();
+      }
     };
   }, []);
 
@@ -21,6 +25,10 @@ export default function useJob() {
       clearInterval(pollIntervalRef.current);
       pollIntervalRef.current = null;
     }
+    if (unsubscribeRef.current) {
+      unsubscribeRef.current();
+      unsubscribeRef.current = null;
+    }
   }, []);
 
   const pollJobStatus = useCallback((jobId) => {
@@ -45,6 +53,36 @@ export default function useJob() {
     }, POLL_INTERVAL);
   }, [stopPolling]);
 
+  const watchJob = useCallback((jobId) => {
+    stopPolling();
+
+    // Fall back to polling where EventSource is unavailable
+    if (typeof EventSource === 'undefined') {
+      pollJobStatus(jobId);
+      return;
+    }
+
+    unsubscribeRef.current = subscribeToJob(
+      jobId,
+      (updatedJob) => {
+        setJob(updatedJob);
+
+        // Close the stream when job is done
+        if (
+          updatedJob.status === JOB_STATUS.COMPLETED ||
+          updatedJob.status === JOB_STATUS.FAILED
+        ) {
+          stopPolling();
+        }
+      },
+      (err) => {
+        console.error('Event stream error, falling back to polling:', err);
+        unsubscribeRef.current = null;
+        pollJobStatus(jobId);
+      }
+    );
+  }, [stopPolling, pollJobStatus]);
+
   const submitJob = useCallback(async (file, mode) => {
     setIsLoading(true);
     setError(null);
@@ -53,8 +91,13 @@ export default function useJob() {
       const newJob = await createJob(file, mode);
       setJob(newJob);
 
-      // Start polling for status updates
-      pollJobStatus(newJob.id);
+      // Listen for status updates (unless already finished, e.g. cached)
+      if (
+        newJob.status !== JOB_STATUS.COMPLETED &&
+        newJob.status !== JOB_STATUS.FAILED
+      ) {
+        watchJob(newJob.id);
+      }
 
       return newJob;
     } catch (err) {
@@ -63,7 +106,7 @@ export default function useJob() {
     } finally {
       setIsLoading(false);
     }
-  }, [pollJobStatus]);
+  }, [watchJob]);
 
   const resetJob = useCallback(() => {
     stopPolling();
@@ -47,6 +47,28 @@ export async function getJob(jobId) {
   return response.json();
 }
 
+/**
+ * Subscribe to job updates via Server-Sent Events
+ * @param {string} jobId - Job ID
+ * @param {function} onUpdate - Called with each job object
+ * @param {function} onError - Called if the stream fails
+ * @returns {function} Unsubscribe function
+ */
+export function subscribeToJob(jobId, onUpdate, onError) {
+  const source = new EventSource(`${API_URL}/api/jobs/${jobId}/events`);
+
+  source.onmessage = (event) => {
+    onUpdate(JSON.parse(event.data));
+  };
+
+  source.onerror = (err) => {
+    source.close();
+    onError(err);
+  };
+
+  return () => source.close();
+}
+
 /**
  * Get all jobs
  * @param {number} limit - Maximum number of jobs to return
@@ -66,14 +88,16 @@ export async function getJobs(limit = 20) {
 /**
  * Get model download URL
  * @param {string} jobId - Job ID
+ * @param {string} [etag] - Job ETag; pins the URL to this version so it can be cached for good
  * @returns {string} Download URL
  */
-export function getModelUrl(jobId) {
-  return `${API_URL}/api/jobs/${jobId}/model.glb`;
+export function getModelUrl(jobId, etag) {
+  const url = `${API_URL}/api/jobs/${jobId}/model.glb`;
+  return etag ? `${url}?v=${encodeURIComponent(etag)}` : url;
 }
 
-export async function downloadModel(jobId) {
-  const url = getModelUrl(jobId);
+export async function downloadModel(jobId, etag) {
+  const url = getModelUrl(jobId, etag);
   
   // Create temporary link and trigger download
   const link = document.createElement('a');
@@ -6,10 +6,10 @@ import { formatFileSize, formatTime, formatJobId } from '../utils/formatters';
 
 export default function ResultView({ job, onReset }) {
   const handleDownload = () => {
-    downloadModel(job.id);
+    downloadModel(job.id, job.etag);
   };
 
-  const modelUrl = getModelUrl(job.id);
+  const modelUrl = getModelUrl(job.id, job.etag);
 
   return (
     <motion.div 
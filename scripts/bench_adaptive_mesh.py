@@ -0,0 +1,96 @@
+"""
+Benchmark: adaptive quadtree meshing vs full grid + quadric decimation.
+
+Meshes a synthetic depth map (a tilted background plane with a few smooth
+objects in front) or, given an image path, a blurred luminance stand-in
+for its depth, with both tessellation modes at the same face budget.
+Reports meshing time, face count, GLB size and the mean depth error of
+the mesh against the depth map.
+
+Usage (from the project root):
+    python scripts/bench_adaptive_mesh.py [image] [max_faces]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from app.services.mesh_generator import MeshGenerator  # noqa: E402
+
+SIZE = (512, 384)
+
+
+def synthetic_depth(width: int, height: int) -> np.ndarray:
+    """Background plane with a sphere-like blob and a box in front."""
+    yy, xx = np.mgrid[0:height, 0:width] / np.float32(max(width, height))
+    depth = 0.8 - 0.2 * yy
+    blob = np.clip(0.04 - (xx - 0.35) ** 2 - (yy - 0.35) ** 2, 0, None)
+    depth -= 8 * blob
+    box = (np.abs(xx - 0.75) < 0.1) & (np.abs(yy - 0.5) < 0.15)
+    depth[box] = 0.3
+    return depth.astype(np.float32)
+
+
+def mesh_error(path: Path, depth: np.ndarray, depth_scale: float) -> float:
+    """Mean |depth - mesh| sampled at the depth pixels, in normalized depth."""
+    import trimesh
+
+    mesh = trimesh.load(str(path), force="mesh")
+    h, w = depth.shape
+    depth = (depth - depth.min()) / (depth.max() - depth.min())
+
+    # Barycentric interpolation of mesh height at each pixel
+    from scipy.interpolate import LinearNDInterpolator
+
+    interp = LinearNDInterpolator(mesh.vertices[:, :2], mesh.vertices[:, 2])
+    xx, yy = np.meshgrid(np.linspace(-1, 1, w), np.linspace(1, -1, h))
+    z = interp(xx, yy)
+    predicted = 1 - z / depth_scale
+    return float(np.nanmean(np.abs(predicted - depth)))
+
+
+def main():
+    max_faces = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        if len(sys.argv) > 1:
+            image = Image.open(sys.argv[1]).convert("RGB")
+            image.thumbnail(SIZE)
+            gray = image.convert("L").filter(ImageFilter.GaussianBlur(4))
+            depth = np.asarray(gray, dtype=np.float32) / 255
+        else:
+            depth = synthetic_depth(*SIZE)
+            image = Image.fromarray((depth * 255).astype(np.uint8)).convert("RGB")
+
+        image_path = tmp / "image.png"
+        image.save(image_path)
+
+        print(f"{'mode':>10} {'time':>9} {'faces':>8} {'GLB':>10} {'error':>8}")
+        for mode in ("grid", "adaptive"):
+            generator = MeshGenerator(depth_scale=0.3, max_faces=max_faces, tessellation=mode)
+            output = tmp / f"{mode}.glb"
+
+            start = time.perf_counter()
+            generator.generate(image_path, depth, output)
+            elapsed = time.perf_counter() - start
+
+            import trimesh
+            faces = len(trimesh.load(str(output), force="mesh").faces)
+            try:
+                error = f"{mesh_error(output, depth, 0.3):8.4f}"
+            except ImportError:
+                error = f"{'n/a':>8}"
+            print(
+                f"{mode:>10} {elapsed * 1000:7.0f}ms {faces:>8} "
+                f"{output.stat().st_size / 1024:8.0f}KB {error}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark: peak memory of decoding, depth upsampling and meshing per job.
+
+Compares, on a large synthetic photo (6000x4000 JPEG by default):
+
+- full:     the previous path. The upload is decoded at full size, the depth
+            prediction is upsampled to full size and normalized, then the
+            mesh generator shrinks it to mesh resolution and decodes the
+            upload a second time for the texture.
+- prepared: prepare_image. The upload is decoded once at a reduced size
+            (JPEG DCT scaling), the texture and the mesh resolution pixels
+            come from that, and depth is upsampled to mesh resolution only.
+
+The depth model itself is left out (its memory does not depend on the
+upload size): a random 384x384 prediction stands in for its output. Each
+path runs in a fresh process; the reported peak is the process's peak RSS
+(VmHWM, reset after imports) above its RSS at that point. Linux only.
+
+Usage (from the project root):
+    python scripts/bench_decode_memory.py [width height]
+"""
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND))
+
+from app.services.depth_estimator import DepthEstimator  # noqa: E402
+from app.services.mesh_generator import create_mesh_generator, prepare_image, texture_options  # noqa: E402
+from app.services.texture import encode_texture  # noqa: E402
+
+PREDICTION_SIZE = 384
+
+
+def rss_mb(field: str) -> float:
+    """A memory field of /proc/self/status (VmRSS, VmHWM), in MB."""
+    for line in Path("/proc/self/status").read_text().splitlines():
+        if line.startswith(field + ":"):
+            return int(line.split()[1]) / 1024
+    raise RuntimeError(f"{field} not reported")
+
+
+def reset_peak_rss():
+    """Reset VmHWM to the current RSS."""
+    Path("/proc/self/clear_refs").write_text("5")
+
+
+def synthetic_photo(path: Path, size):
+    """A noisy gradient photo, so JPEG decoding does real work."""
+    w, h = size
+    rng = np.random.default_rng(0)
+    row = np.linspace(40, 220, w, dtype=np.float32)
+    rgb = np.empty((h, w, 3), dtype=np.uint8)
+    for y in range(0, h, 500):
+        band = row[None, :, None] * np.float32(0.6 + 0.4 * y / h) + rng.normal(0, 12, (min(500, h - y), w, 3))
+        rgb[y:y + 500] = band.clip(0, 255)
+    Image.fromarray(rgb).save(path, quality=90)
+
+
+def run_full(image_path: Path, output_path: Path):
+    image = Image.open(image_path).convert("RGB")
+    prediction = Image.fromarray(np.random.default_rng(0).random((PREDICTION_SIZE, PREDICTION_SIZE), dtype=np.float32))
+    depth_map = DepthEstimator._normalize(np.asarray(prediction.resize(image.size, Image.BICUBIC)))
+    del image
+
+    # The texture was decoded from the file again, at full size
+    options = texture_options()
+    with Image.open(image_path) as source:
+        texture = encode_texture(image_path, options, image=source.convert("RGB"))
+    create_mesh_generator().generate(image_path, depth_map, output_path, texture=texture)
+
+
+def run_prepared(image_path: Path, output_path: Path):
+    prepared = prepare_image(image_path, texture_options())
+    h, w = prepared.pixels.shape[:2]
+    prediction = Image.fromarray(np.random.default_rng(0).random((PREDICTION_SIZE, PREDICTION_SIZE), dtype=np.float32))
+    depth_map = DepthEstimator._normalize(np.asarray(prediction.resize((w, h), Image.BICUBIC)))
+    create_mesh_generator().generate(image_path, depth_map, output_path, texture=prepared.texture)
+
+
+def measure(name: str, image_path: str, output_path: str, results):
+    run = {"full": run_full, "prepared": run_prepared}[name]
+    reset_peak_rss()
+    baseline = rss_mb("VmRSS")
+    start = time.perf_counter()
+    run(Path(image_path), Path(output_path))
+    results.put((name, rss_mb("VmHWM") - baseline, time.perf_counter() - start))
+
+
+def main():
+    size = (int(sys.argv[1]), int(sys.argv[2])) if len(sys.argv) > 2 else (6000, 4000)
+    context = multiprocessing.get_context("spawn")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        image_path = Path(tmp) / "photo.jpg"
+        synthetic_photo(image_path, size)
+        print(f"{size[0]}x{size[1]} JPEG, {image_path.stat().st_size / 1e6:.1f}MB")
+
+        rows = []
+        for name in ("full", "prepared"):
+            results = context.Queue()
+            process = context.Process(
+                target=measure, args=(name, str(image_path), str(Path(tmp) / f"{name}.glb"), results)
+            )
+            process.start()
+            rows.append(results.get())
+            process.join()
+
+        print(f"\n{'path':>10} {'peak RSS':>10} {'time':>8}")
+        for name, peak, elapsed in rows:
+            print(f"{name:>10} {peak:8.0f}MB {elapsed * 1000:6.0f}ms")
+        print(f"\npeak memory {rows[0][1] / max(rows[1][1], 1):.1f}x lower")
+
+
+if __name__ == "__main__":
+    main()
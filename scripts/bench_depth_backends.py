@@ -0,0 +1,112 @@
+"""
+Benchmark: depth backend latency, and accuracy against torch fp32.
+
+Loads each depth backend (torch, torch-int8, onnxruntime) with the same
+thread count and times the forward pass on batches of 1 and 4 images,
+median of RUNS after a warm-up. Backends whose runtime or exported model
+is missing are skipped. Each backend's normalized depth maps are then
+compared with torch fp32 on the same images: mean absolute error and the
+share of pixels off by more than 0.05. Exits with status 1 if a backend's
+mean error is above MAX_MEAN_ERROR.
+
+Usage (from the project root):
+    python scripts/bench_depth_backends.py [image ...]
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND))
+
+from app.config import settings  # noqa: E402
+from app.services.depth_backends import DEPTH_BACKENDS  # noqa: E402
+from app.services.depth_estimator import DepthEstimator  # noqa: E402
+
+RUNS = 5
+BATCH_SIZES = (1, 4)
+MAX_MEAN_ERROR = 0.02
+
+
+def synthetic_scenes(directory: Path, count: int = 4):
+    """Textured photos of a floor plane and a few blobs, at different sizes."""
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(count):
+        h, w = 480 + 120 * i, 640 + 80 * i
+        yy, xx = np.mgrid[0:h, 0:w] / np.float32(w)
+        shade = 0.3 + 0.6 * yy / yy.max()
+        for _ in range(3):
+            cx, cy, r = rng.uniform(0.2, 0.8), rng.uniform(0.1, 0.6), rng.uniform(0.05, 0.15)
+            shade = np.where((xx - cx) ** 2 + (yy - cy) ** 2 < r ** 2, rng.uniform(0.2, 1.0), shade)
+        rgb = shade[..., None] * rng.uniform(0.5, 1.0, 3) * 255 + rng.normal(0, 8, (h, w, 3))
+        path = directory / f"scene{i}.jpg"
+        Image.fromarray(rgb.clip(0, 255).astype(np.uint8)).save(path, quality=90)
+        paths.append(path)
+    return paths
+
+
+def time_forward(estimator: DepthEstimator, pixel_values: np.ndarray) -> float:
+    """Median seconds per forward pass."""
+    estimator.backend.predict(pixel_values)
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        estimator.backend.predict(pixel_values)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def main():
+    threads = settings.inference_threads or os.cpu_count() or 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [Path(p) for p in sys.argv[1:]] or synthetic_scenes(Path(tmp))
+        reference = None
+        failed = False
+
+        print(f"{threads} threads, {len(paths)} images")
+        print(f"{'backend':>12} {'batch':>6} {'forward':>10} {'per image':>10} {'MAE':>8} {'>0.05':>7}")
+
+        for name in DEPTH_BACKENDS:
+            estimator = DepthEstimator(backend=name, onnx_path=BACKEND / settings.depth_onnx_path)
+            try:
+                estimator.load_model(threads)
+            except (ImportError, FileNotFoundError) as e:
+                print(f"{name:>12}  skipped: {e}")
+                continue
+
+            images = [Image.open(path).convert("RGB") for path in paths]
+            for batch_size in BATCH_SIZES:
+                batch = (images * batch_size)[:batch_size]
+                pixel_values = estimator.preprocessor(batch)
+                elapsed = time_forward(estimator, pixel_values)
+                print(
+                    f"{name:>12} {batch_size:>6} {elapsed * 1000:8.0f}ms "
+                    f"{elapsed * 1000 / batch_size:8.0f}ms"
+                )
+
+            depth_maps = estimator.estimate_batch(paths)
+            if reference is None:
+                reference = depth_maps
+                continue
+
+            errors = np.concatenate([np.abs(a - b).ravel() for a, b in zip(depth_maps, reference)])
+            mae, off = errors.mean(), (errors > 0.05).mean()
+            print(f"{name:>12} {'':>6} {'':>10} {'':>10} {mae:8.4f} {off * 100:6.1f}%")
+            failed |= mae > MAX_MEAN_ERROR
+
+        if reference is None:
+            sys.exit("torch fp32 reference could not be loaded")
+        if failed:
+            print(f"FAIL: mean error above {MAX_MEAN_ERROR}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Benchmark: GLB size and encode time per output profile.
+
+Writes the same mesh (a full 512x384 grid and an adaptive mesh of the
+same depth map) with the standard, quantized and compressed profiles and
+reports file size and write time against the standard GLB. Geometry only:
+the texture is a fixed placeholder, identical in every profile.
+
+The compressed output is decoded again with a straightforward reference
+decoder for the meshopt bitstreams and must match the quantized buffers
+byte for byte; quantized positions must round-trip within 1e-4.
+
+Usage (from the project root):
+    python scripts/bench_glb_profiles.py
+"""
+import io
+import json
+import struct
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from app.services.mesh_generator import (  # noqa: E402
+    ADAPTIVE_MIN_ERROR, GLB_PROFILES, QuadtreeTessellator, grid_topology, write_glb
+)
+from app.services.meshopt import vertex_block_size  # noqa: E402
+
+W, H = 512, 384
+TEXTURE = b"\x89PNG\r\n\x1a\n" + bytes(1024)
+
+
+# --- Reference decoders (one value at a time, straight from the spec) ---
+
+def decode_vertex_buffer(data: bytes, count: int, stride: int) -> bytes:
+    assert data[0] == 0xA0, "bad vertex header"
+    pos, last = 1, bytearray(data[-stride:])
+    out = bytearray(count * stride)
+    block_size = vertex_block_size(stride)
+
+    for start in range(0, count, block_size):
+        n = min(block_size, count - start)
+        groups = (n + 15) // 16
+        for k in range(stride):
+            header = data[pos:pos + (groups + 3) // 4]
+            pos += len(header)
+            values = []
+            for g in range(groups):
+                mode = (header[g // 4] >> (g % 4 * 2)) & 3
+                if mode == 0:
+                    values += [0] * 16
+                elif mode == 3:
+                    values += data[pos:pos + 16]
+                    pos += 16
+                else:
+                    bits = 2 if mode == 1 else 4
+                    sentinel = (1 << bits) - 1
+                    extra = pos + 2 * bits
+                    for i in range(16):
+                        v = (data[pos + i * bits // 8] >> (8 - bits - i * bits % 8)) & sentinel
+                        if v == sentinel:
+                            v, extra = data[extra], extra + 1
+                        values.append(v)
+                    pos = extra
+            p = last[k]
+            for i in range(n):
+                p = (p + ((values[i] >> 1) ^ -(values[i] & 1))) & 0xFF
+                out[(start + i) * stride + k] = p
+        last = out[(start + n - 1) * stride:(start + n) * stride]
+
+    assert len(data) - pos == max(32, stride), "bad vertex tail"
+    return bytes(out)
+
+
+def decode_index_sequence(data: bytes, count: int, stride: int) -> bytes:
+    assert data[0] & 0xF0 == 0xD0, "bad index header"
+    pos, baselines, out = 1, [0, 0], []
+    for _ in range(count):
+        value, shift = 0, 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            value |= (byte & 0x7F) << shift
+            shift += 7
+            if byte < 0x80:
+                break
+        baseline, value = value & 1, value >> 1
+        index = (baselines[baseline] + ((value >> 1) ^ -(value & 1))) & 0xFFFFFFFF
+        baselines[baseline] = index
+        out.append(index)
+    assert pos == len(data) - 4, "bad index tail"
+    return np.array(out, dtype=np.uint16 if stride == 2 else np.uint32).tobytes()
+
+
+def parse(data: bytes):
+    json_length = struct.unpack_from("<I", data, 12)[0]
+    gltf = json.loads(data[20:20 + json_length])
+    return gltf, data[28 + json_length:]
+
+
+def view_bytes(gltf: dict, binary: bytes, index: int) -> bytes:
+    view = gltf["bufferViews"][index]
+    meshopt = view.get("extensions", {}).get("EXT_meshopt_compression")
+    if meshopt is None:
+        return binary[view["byteOffset"]:view["byteOffset"] + view["byteLength"]]
+
+    encoded = binary[meshopt["byteOffset"]:meshopt["byteOffset"] + meshopt["byteLength"]]
+    if meshopt["mode"] == "ATTRIBUTES":
+        return decode_vertex_buffer(encoded, meshopt["count"], meshopt["byteStride"])
+    return decode_index_sequence(encoded, meshopt["count"], meshopt["byteStride"])
+
+
+# --- Benchmark ---
+
+def meshes():
+    yy, xx = np.mgrid[0:H, 0:W] / np.float32(W)
+    depth = (0.5 + 0.2 * np.sin(xx * 9) * np.cos(yy * 7)).astype(np.float32)
+    depth[(xx - 0.5) ** 2 + (yy - 0.35) ** 2 < 0.02] = 0.1
+
+    xs, ys = np.meshgrid(np.linspace(-1, 1, W), np.linspace(-1, 1, H))
+    positions = np.stack([xs.ravel(), -ys.ravel(), 0.3 * (1 - depth.ravel())], axis=1)
+    faces, uv = grid_topology(H, W)
+    yield "grid", positions.astype(np.float32), uv, faces
+
+    rows, cols = QuadtreeTessellator.grid_shape(H, W, 32)
+    grid_depth = np.pad(depth, ((0, rows - H), (0, cols - W)), mode="edge")
+    tessellator = QuadtreeTessellator(grid_depth, 32)
+    vertices, faces = tessellator.triangulate(tessellator.threshold_for(100000, ADAPTIVE_MIN_ERROR))
+    u, v = vertices[:, 1] / (cols - 1), vertices[:, 0] / (rows - 1)
+    positions = np.stack([2 * u - 1, 1 - 2 * v, 0.3 * (1 - grid_depth[vertices[:, 0], vertices[:, 1]])], axis=1)
+    yield "adaptive", positions.astype(np.float32), np.stack([u, 1 - v], axis=1), faces
+
+
+def main():
+    print(f"{'mesh':>9} {'profile':>11} {'size':>10} {'vs std':>7} {'encode':>9}")
+
+    for name, positions, uv, faces in meshes():
+        outputs = {}
+        for profile in GLB_PROFILES:
+            buffer = io.BytesIO()
+            start = time.perf_counter()
+            write_glb(buffer, positions, uv, faces, TEXTURE, "image/png", profile=profile)
+            elapsed = time.perf_counter() - start
+            outputs[profile] = buffer.getvalue()
+
+            size = len(outputs[profile])
+            ratio = size / len(outputs["standard"])
+            print(f"{name:>9} {profile:>11} {size / 1024:8.0f}KB {ratio:6.2f}x {elapsed * 1000:7.1f}ms")
+
+        quantized, quantized_bin = parse(outputs["quantized"])
+        compressed, compressed_bin = parse(outputs["compressed"])
+        for index in range(3):
+            assert view_bytes(compressed, compressed_bin, index) == view_bytes(quantized, quantized_bin, index), \
+                f"{name}: decoded view {index} differs"
+
+        node = quantized["nodes"][0]
+        q = np.frombuffer(view_bytes(quantized, quantized_bin, 0), dtype=np.int16).reshape(-1, 4)[:, :3]
+        restored = q * np.array(node["scale"]) + np.array(node["translation"])
+        error = np.abs(restored - positions).max()
+        assert error < 1e-4, f"{name}: quantization error {error}"
+        print(f"{'':>9} max position error {error:.2e}, meshopt streams decode to the quantized buffers")
+
+
+if __name__ == "__main__":
+    main()
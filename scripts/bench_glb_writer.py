@@ -0,0 +1,119 @@
+"""
+Benchmark: write_glb vs trimesh GLB export.
+
+Exports the same textured grid mesh with trimesh (the old path:
+TextureVisuals + PBRMaterial + export) and with write_glb, then reports
+wall time, peak Python memory and file size. The write_glb output is
+parsed back, both with a minimal GLB reader (header, chunk and view
+bounds, alignment) and with trimesh, and must round-trip exactly.
+
+Usage (from the project root):
+    python scripts/bench_glb_writer.py
+"""
+import io
+import json
+import struct
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import trimesh
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from app.services.mesh_generator import grid_topology, write_glb  # noqa: E402
+
+SIZES = ((128, 96), (512, 384))
+
+
+def grid_mesh(w: int, h: int):
+    xx, yy = np.meshgrid(np.linspace(-1, 1, w), np.linspace(-1, 1, h))
+    zz = 0.3 * np.sin(xx * 3) * np.cos(yy * 2)
+    vertices = np.stack([xx.ravel(), -yy.ravel(), zz.ravel()], axis=1).astype(np.float32)
+    faces, uv = grid_topology(h, w)
+    return vertices, faces, uv
+
+
+def export_trimesh(path: Path, vertices, faces, uv, image: Image.Image):
+    material = trimesh.visual.material.PBRMaterial(
+        baseColorTexture=image, metallicFactor=0.0, roughnessFactor=0.8
+    )
+    visuals = trimesh.visual.TextureVisuals(uv=uv, material=material)
+    mesh = trimesh.Trimesh(vertices=vertices, faces=faces, visual=visuals, process=False)
+    mesh.export(str(path), file_type="glb")
+
+
+def export_direct(path: Path, vertices, faces, uv, image: Image.Image):
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    with open(path, "wb") as f:
+        write_glb(f, vertices, uv, faces, buffer.getvalue(), "image/png")
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def validate(path: Path) -> dict:
+    """Structural GLB checks; returns the glTF JSON."""
+    data = path.read_bytes()
+    magic, version, length = struct.unpack_from("<III", data, 0)
+    assert magic == 0x46546C67 and version == 2 and length == len(data), "bad header"
+
+    json_length, json_type = struct.unpack_from("<II", data, 12)
+    assert json_type == 0x4E4F534A and json_length % 4 == 0, "bad JSON chunk"
+    gltf = json.loads(data[20:20 + json_length])
+
+    bin_offset = 20 + json_length
+    bin_length, bin_type = struct.unpack_from("<II", data, bin_offset)
+    assert bin_type == 0x004E4942 and bin_offset + 8 + bin_length == len(data), "bad BIN chunk"
+    assert gltf["buffers"][0]["byteLength"] == bin_length
+
+    for view in gltf["bufferViews"]:
+        assert view["byteOffset"] % 4 == 0, "unaligned view"
+        assert view["byteOffset"] + view["byteLength"] <= bin_length, "view out of bounds"
+    return gltf
+
+
+def main():
+    print(f"{'size':>9} {'path':>8} {'time':>9} {'peak mem':>10} {'file':>10}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for w, h in SIZES:
+            vertices, faces, uv = grid_mesh(w, h)
+            rng = np.random.default_rng(0)
+            image = Image.fromarray(rng.integers(0, 255, (h, w, 3), dtype=np.uint8))
+
+            for name, fn in (("trimesh", export_trimesh), ("direct", export_direct)):
+                path = tmp / f"{name}.glb"
+                elapsed, peak = measure(fn, path, vertices, faces, uv, image)
+                print(
+                    f"{w}x{h:<5} {name:>8} {elapsed * 1000:7.1f}ms "
+                    f"{peak / 2**20:8.1f}MB {path.stat().st_size / 1024:8.0f}KB"
+                )
+
+            # Round trip the direct output
+            path = tmp / "direct.glb"
+            validate(path)
+            mesh = trimesh.load(str(path), force="mesh", process=False)
+            assert np.array_equal(mesh.vertices.astype(np.float32), vertices), "positions differ"
+            assert np.array_equal(mesh.faces, faces), "faces differ"
+            assert np.allclose(mesh.visual.uv, uv), "UVs differ"
+            assert mesh.visual.material.baseColorTexture.size == (w, h), "texture differs"
+
+    print("✓ GLB output parses back with identical geometry")
+
+
+if __name__ == "__main__":
+    main()
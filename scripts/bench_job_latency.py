@@ -0,0 +1,98 @@
+"""
+Latency check: GET /api/jobs/{id} while jobs commit progress in parallel.
+
+Measures p50/p99 of the job status route on its own, then again while
+writer tasks keep committing job updates. Reads run on their own DB threads,
+so they never queue behind a commit; what is left is CPU contention with the
+writers. Exits with status 1 if the p99 under writers is more than
+MAX_P99_RATIO times the idle p99.
+
+Usage (from the project root):
+    python scripts/bench_job_latency.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Throwaway database and storage
+_tmp = tempfile.mkdtemp(prefix="bench_latency_")
+os.environ.setdefault("STORAGE_PATH", _tmp)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/jobs.db")
+os.environ.setdefault("PROCESSOR_TYPE", "dummy")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import httpx  # noqa: E402
+
+from app.db import init_db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import JobStatus, ProcessingMode  # noqa: E402
+from app.services import async_job_service  # noqa: E402
+
+REQUESTS = 1000
+WRITERS = 4
+# Allowed p99 slowdown under writers (they share the CPU with the reads)
+MAX_P99_RATIO = 4
+
+
+def percentile(samples, pct: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+async def measure(client: httpx.AsyncClient, job_id: str):
+    """Issue status requests one after another and time each one."""
+    latencies = []
+    for _ in range(REQUESTS):
+        start = time.perf_counter()
+        response = await client.get(f"/api/jobs/{job_id}")
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200
+    return latencies
+
+
+async def writer(job_id: str, stop: asyncio.Event):
+    """Commit progress updates in a tight loop."""
+    progress = 0
+    while not stop.is_set():
+        progress = (progress + 1) % 100
+        await async_job_service.update_job_status(job_id, JobStatus.PROCESSING, progress=progress)
+
+
+def report(label: str, latencies):
+    print(
+        f"{label:>14}: p50 {percentile(latencies, 50) * 1000:6.2f}ms  "
+        f"p99 {percentile(latencies, 99) * 1000:6.2f}ms"
+    )
+    return percentile(latencies, 99)
+
+
+async def main():
+    init_db()
+
+    jobs = []
+    for i in range(WRITERS + 1):
+        job = await async_job_service.create_job(f"BENCH{i:03d}", ProcessingMode.SINGLE, "", 0)
+        jobs.append(job.id)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        idle = report("idle", await measure(client, jobs[0]))
+
+        stop = asyncio.Event()
+        writers = [asyncio.create_task(writer(job_id, stop)) for job_id in jobs[1:]]
+        loaded = report("with writers", await measure(client, jobs[0]))
+        stop.set()
+        await asyncio.gather(*writers)
+
+    ratio = loaded / idle
+    ok = ratio <= MAX_P99_RATIO
+    print(f"p99 ratio {ratio:.1f}x (max {MAX_P99_RATIO}x) {'ok' if ok else 'FAIL'}")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,92 @@
+"""
+Benchmark: cost of the extra levels of detail.
+
+Meshes one synthetic depth map (the same scene as bench_adaptive_mesh.py)
+with each tessellation mode, once without and once with the low / medium
+levels, and reports the total generate time (texture encode included),
+so the difference is what the extra levels cost on top of the full model.
+Lists faces and GLB size per level (a level that would not be smaller
+than the one above is not written).
+
+Usage (from the project root):
+    python scripts/bench_lods.py [max_faces] [low_faces] [medium_faces]
+"""
+import json
+import struct
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from app.services.mesh_generator import MeshGenerator, lod_path  # noqa: E402
+
+SIZE = (512, 384)
+
+
+def synthetic_depth(width: int, height: int) -> np.ndarray:
+    """Background plane with a sphere-like blob and a box in front."""
+    yy, xx = np.mgrid[0:height, 0:width] / np.float32(max(width, height))
+    depth = 0.8 - 0.2 * yy
+    blob = np.clip(0.04 - (xx - 0.35) ** 2 - (yy - 0.35) ** 2, 0, None)
+    depth -= 8 * blob
+    box = (np.abs(xx - 0.75) < 0.1) & (np.abs(yy - 0.5) < 0.15)
+    depth[box] = 0.3
+    return depth.astype(np.float32)
+
+
+def face_count(path: Path) -> int:
+    """Triangle count from the GLB's index accessor."""
+    data = path.read_bytes()
+    json_length = struct.unpack_from("<I", data, 12)[0]
+    gltf = json.loads(data[20:20 + json_length])
+    return gltf["accessors"][gltf["meshes"][0]["primitives"][0]["indices"]]["count"] // 3
+
+
+def main():
+    max_faces = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    lods = {
+        "low": int(sys.argv[2]) if len(sys.argv) > 2 else 10000,
+        "medium": int(sys.argv[3]) if len(sys.argv) > 3 else 50000,
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        depth = synthetic_depth(*SIZE)
+        image_path = tmp / "image.jpg"
+        Image.fromarray((depth * 255).astype(np.uint8)).convert("RGB").save(image_path)
+
+        print(f"{'mode':>9} {'levels':>8} {'time':>9} {'level':>7} {'faces':>8} {'GLB':>9}")
+        for mode in ("adaptive", "grid"):
+            baseline = None
+            for levels in ({}, lods):
+                generator = MeshGenerator(
+                    depth_scale=0.3, max_faces=max_faces, tessellation=mode, lods=levels
+                )
+                output = tmp / f"{mode}_{len(levels)}.glb"
+
+                start = time.perf_counter()
+                generator.generate(image_path, depth, output)
+                elapsed = time.perf_counter() - start
+                baseline = baseline or elapsed
+
+                label = "full only" if not levels else f"+{len(levels)}"
+                extra = "" if not levels else f" (+{(elapsed - baseline) * 1000:.0f}ms)"
+                print(f"{mode:>9} {label:>8} {elapsed * 1000:7.0f}ms{extra}")
+                for lod in [None] + [lod for lod, _ in generator.lod_budgets()]:
+                    path = lod_path(output, lod)
+                    if not path.exists():
+                        print(f"{'':>28} {lod:>7} {'(full model)':>18}")
+                        continue
+                    print(
+                        f"{'':>28} {lod or 'high':>7} {face_count(path):>8} "
+                        f"{path.stat().st_size / 1024:7.0f}KB"
+                    )
+
+
+if __name__ == "__main__":
+    main()
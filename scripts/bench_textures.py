@@ -0,0 +1,92 @@
+"""
+Benchmark: GLB texture size and encode time per texture setting.
+
+Encodes one photo with the old behaviour (PNG at mesh resolution, at most
+512 px), with the app's texture settings, and with a few other codec /
+quality / size settings, reporting bytes, encode time and PSNR against the
+source resized to the same dimensions. The default photo is 4000x3000, so
+the larger size caps really apply.
+
+Usage (from the project root):
+    python scripts/bench_textures.py [image]
+"""
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from app.services.mesh_generator import texture_options  # noqa: E402
+from app.services.texture import TextureOptions, encode_texture  # noqa: E402
+
+SETTINGS = [
+    TextureOptions(codec="png", max_size=512),
+    TextureOptions(codec="jpeg", quality=85, max_size=512),
+    TextureOptions(codec="webp", quality=80, max_size=512),
+    TextureOptions(codec="jpeg", quality=85, max_size=1024),
+    TextureOptions(codec="jpeg", quality=85, max_size=1024, power_of_two=True),
+    TextureOptions(codec="jpeg", quality=85, max_size=2048),
+    TextureOptions(codec="webp", quality=80, max_size=2048),
+]
+
+
+def synthetic_photo(path: Path):
+    """Smooth gradients plus noise, roughly photo-like to the encoders."""
+    rng = np.random.default_rng(0)
+    yy, xx = np.mgrid[0:3000, 0:4000] / 4000
+    base = np.stack([np.sin(xx * 7), np.cos(yy * 5), np.sin((xx + yy) * 3)], axis=-1)
+    pixels = (base * 60 + 128 + rng.normal(0, 12, base.shape)).clip(0, 255)
+    Image.fromarray(pixels.astype(np.uint8)).save(path, quality=95)
+
+
+def psnr(data: bytes, source: Image.Image) -> float:
+    decoded = np.asarray(Image.open(io.BytesIO(data)).convert("RGB"), dtype=np.float32)
+    reference = np.asarray(source.resize(decoded.shape[1::-1], Image.LANCZOS), dtype=np.float32)
+    mse = np.mean((decoded - reference) ** 2)
+    return float("inf") if mse == 0 else 10 * np.log10(255 ** 2 / mse)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        if len(sys.argv) > 1:
+            image_path = Path(sys.argv[1])
+        else:
+            image_path = Path(tmp) / "photo.jpg"
+            synthetic_photo(image_path)
+
+        source = Image.open(image_path).convert("RGB")
+        print(f"source: {source.size[0]}x{source.size[1]}, {image_path.stat().st_size / 1024:.0f}KB")
+
+        # Old path: PNG at the (max 512 px) mesh resolution
+        start = time.perf_counter()
+        mesh_size = source.copy()
+        mesh_size.thumbnail((512, 512))
+        buffer = io.BytesIO()
+        mesh_size.save(buffer, format="PNG")
+        elapsed = time.perf_counter() - start
+        print(f"\n{'setting':>28} {'size':>10} {'bytes':>9} {'encode':>9} {'PSNR':>7}")
+        print(
+            f"{'old: png @ mesh res':>28} {'%dx%d' % mesh_size.size:>10} "
+            f"{len(buffer.getvalue()) / 1024:7.0f}KB {elapsed * 1000:7.1f}ms {'-':>7}"
+        )
+
+        for index, options in enumerate([texture_options()] + SETTINGS):
+            texture = encode_texture(image_path, options)
+            label = f"{options.codec} q{options.quality} max{options.max_size}"
+            if options.power_of_two:
+                label += " pot"
+            if index == 0:
+                label = "app default: " + label
+            print(
+                f"{label:>28} {'%dx%d' % texture.size:>10} {len(texture.data) / 1024:7.0f}KB "
+                f"{texture.encode_time * 1000:7.1f}ms {psnr(texture.data, source):6.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark: tiled high detail depth, peak memory against the budget.
+
+Runs DepthEstimator.estimate_tiled on a photo at the high detail working
+size (settings.high_detail_max_size, lowered to fit each budget as jobs do)
+under several memory budgets, each in a fresh process, and reports tiles per pass, time and peak RSS growth
+(VmHWM, reset after the model is loaded and warmed up). Exits with status
+1 if the peak goes over a budget. Also reports how far the tiled map is
+from the standard single pass, as a rough measure of the added detail.
+
+Usage (from the project root):
+    python scripts/bench_tiled_depth.py [image] [budget_mb ...]
+"""
+import multiprocessing
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND))
+
+from app.config import settings  # noqa: E402
+from app.services.depth_estimator import get_depth_estimator  # noqa: E402
+from app.services.depth_tiling import plan_tiles, working_size  # noqa: E402
+from app.services.image_decode import decode_image, fit_size  # noqa: E402
+
+DEFAULT_BUDGETS = (512, 1024, 2048)
+
+
+def rss_mb(field: str) -> float:
+    """A memory field of /proc/self/status (VmRSS, VmHWM), in MB."""
+    for line in Path("/proc/self/status").read_text().splitlines():
+        if line.startswith(field + ":"):
+            return int(line.split()[1]) / 1024
+    raise RuntimeError(f"{field} not reported")
+
+
+def working_image(path: str, max_size: int) -> np.ndarray:
+    """The image at a high detail working size, or a synthetic scene."""
+    if path:
+        with Image.open(path) as source:
+            size = fit_size(source.size, max_size)
+        return np.asarray(decode_image(path, size).resize(size, Image.LANCZOS))
+
+    w, h = fit_size((1536, 1024), max_size)
+    yy, xx = np.mgrid[0:h, 0:w] / np.float32(w)
+    shade = 0.3 + 0.5 * yy + 0.1 * np.sin(xx * 120) * np.cos(yy * 90)
+    rgb = shade[..., None] * np.float32([0.9, 0.8, 0.7]) * 255
+    return rgb.clip(0, 255).astype(np.uint8)
+
+
+def measure(path: str, budget: float, results):
+    estimator = get_depth_estimator()
+    image = working_image(path, working_size(settings.high_detail_max_size, budget))
+    estimator.warm_up()
+    standard = estimator.estimate_images([image])[0]
+
+    Path("/proc/self/clear_refs").write_text("5")
+    baseline = rss_mb("VmRSS")
+    start = time.perf_counter()
+    tiled = estimator.estimate_tiled(image, budget)
+    elapsed = time.perf_counter() - start
+    peak = rss_mb("VmHWM") - baseline
+
+    difference = float(np.abs(tiled - standard).mean())
+    results.put((budget, peak, elapsed, difference))
+
+
+def main():
+    args = sys.argv[1:]
+    path = args.pop(0) if args and not args[0].isdigit() else ""
+    budgets = [float(arg) for arg in args] or DEFAULT_BUDGETS
+    context = multiprocessing.get_context("spawn")
+
+    print(f"{'budget':>8} {'size':>10} {'tiles':>6} {'per pass':>9} {'time':>8} {'peak':>8} {'vs standard':>12}")
+
+    failed = False
+    for budget in budgets:
+        image = working_image(path, working_size(settings.high_detail_max_size, budget))
+        plan = plan_tiles((image.shape[1], image.shape[0]), (384, 384), budget)
+        results = context.Queue()
+        process = context.Process(target=measure, args=(path, budget, results))
+        process.start()
+        _, peak, elapsed, difference = results.get()
+        process.join()
+
+        over = peak > budget
+        failed |= over
+        print(
+            f"{budget:6.0f}MB {'%dx%d' % plan.size:>10} {len(plan.origins):>6} {plan.batch_size:>9} {elapsed:7.1f}s "
+            f"{peak:6.0f}MB {difference:12.4f}{'  OVER BUDGET' if over else ''}"
+        )
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Check: DptPreprocessor builds the same model input as the HF DPT image processor.
+
+Runs both on random RGB images of several sizes and aspect ratios, for
+the depth model's own processor config (if it is in the local Hugging Face
+cache) or the default DPT config, and for a keep-aspect-ratio config
+(multiple of 32, as used by the larger DPT models). Reports the largest
+and mean absolute difference per config and the time per batch of
+BATCH_SIZE images.
+
+Both HF backends are compared. The PIL backend is the one DptPreprocessor
+reproduces: any difference above TOLERANCE fails. The torchvision backend
+(the default when torchvision is installed; skipped otherwise) resizes
+with torch's bicubic kernel, so single pixels differ by several levels;
+it fails if the mean difference is above TORCHVISION_MEAN_TOLERANCE. A
+shape mismatch fails for either. Exits with status 1 on any failure.
+
+Usage (from the project root):
+    python scripts/check_depth_preprocess.py
+"""
+import importlib.util
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND))
+
+from app.services.depth_estimator import DEPTH_MODEL  # noqa: E402
+from app.services.depth_preprocess import DptInputSpec, DptPreprocessor  # noqa: E402
+
+SIZES = [(512, 341), (341, 512), (384, 384), (640, 480), (97, 203)]
+BATCH_SIZE = 4
+RUNS = 10
+TOLERANCE = 1e-5
+# Mean difference allowed against the torchvision backend: well under one
+# intensity level (2 / 255 after the default normalization)
+TORCHVISION_MEAN_TOLERANCE = 0.005
+
+
+def backends():
+    """(backend, HF processor class) pairs, PIL first; torchvision only if installed."""
+    import transformers
+
+    if hasattr(transformers, "DPTImageProcessorPil"):
+        # transformers 5: DPTImageProcessor is the torchvision backend
+        pil, torchvision = transformers.DPTImageProcessorPil, transformers.DPTImageProcessor
+    else:
+        pil, torchvision = transformers.DPTImageProcessor, getattr(transformers, "DPTImageProcessorFast", None)
+
+    yield "PIL", pil
+    if torchvision is None or importlib.util.find_spec("torchvision") is None:
+        print("torchvision backend: skipped (torchvision not installed)")
+    else:
+        yield "torchvision", torchvision
+
+
+def processors(processor_class):
+    """(name, HF processor) pairs to compare against."""
+    try:
+        yield DEPTH_MODEL, processor_class.from_pretrained(DEPTH_MODEL, local_files_only=True)
+    except OSError:
+        yield "default", processor_class()
+    yield "keep aspect, x32", processor_class(keep_aspect_ratio=True, ensure_multiple_of=32)
+
+
+def reference_input(processor, images, backend: str) -> np.ndarray:
+    """``pixel_values`` from the HF processor as a numpy array."""
+    if backend == "torchvision":
+        return processor(images=images, return_tensors="pt")["pixel_values"].numpy()
+    return processor(images=images, return_tensors="np")["pixel_values"]
+
+
+def median_time(fn) -> float:
+    """Median seconds per call."""
+    fn()
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def main():
+    rng = np.random.default_rng(0)
+    images = [Image.fromarray(rng.integers(0, 256, (h, w, 3), dtype=np.uint8)) for w, h in SIZES]
+    failed = False
+
+    for backend, processor_class in backends():
+        for name, processor in processors(processor_class):
+            preprocessor = DptPreprocessor(DptInputSpec.from_processor(processor))
+
+            # Image by image: sizes differ when the aspect ratio is kept
+            error, mean_errors = 0.0, []
+            for image in images:
+                expected = reference_input(processor, [image], backend)
+                actual = preprocessor([image])
+                if expected.shape != actual.shape:
+                    print(f"{backend}, {name}: shape {actual.shape} != {expected.shape} for {image.size}")
+                    failed = True
+                    continue
+                difference = np.abs(actual - expected)
+                error = max(error, float(difference.max()))
+                mean_errors.append(float(difference.mean()))
+            mean_error = max(mean_errors, default=0.0)
+
+            batch = [images[0]] * BATCH_SIZE
+            hf_time = median_time(lambda: reference_input(processor, batch, backend))
+            own_time = median_time(lambda: preprocessor(batch))
+
+            if backend == "torchvision":
+                over = mean_error > TORCHVISION_MEAN_TOLERANCE
+                status = f"FAIL: mean above {TORCHVISION_MEAN_TOLERANCE}" if over else "ok"
+            else:
+                over = error > TOLERANCE
+                status = f"FAIL: above {TOLERANCE}" if over else "ok"
+            failed |= over
+            print(
+                f"{backend}, {name}: max difference {error:.2e}, mean {mean_error:.2e} ({status}); "
+                f"batch of {BATCH_SIZE}: HF {hf_time * 1000:.1f}ms, vectorized {own_time * 1000:.1f}ms "
+                f"({hf_time / own_time:.1f}x)"
+            )
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
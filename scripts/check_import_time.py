@@ -0,0 +1,74 @@
+"""
+Check: the API and worker entry points import without the ML stack.
+
+Imports each entry module in a fresh interpreter under `-X importtime`
+and fails if any of HEAVY_MODULES was loaded, or if the import took
+longer than the budget. torch, transformers and trimesh are only meant
+to be imported on first use (model load, decimation), so API-only nodes
+and dummy-processor deployments start quickly and stay small.
+
+Prints the slowest top-level packages for each entry module.
+
+Usage (from the project root):
+    python scripts/check_import_time.py [budget_seconds]
+"""
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+
+ENTRY_MODULES = ("app.main", "app.worker")
+HEAVY_MODULES = ("torch", "transformers", "trimesh", "onnxruntime", "scipy")
+DEFAULT_BUDGET = 3.0
+
+
+def import_times(module: str) -> dict:
+    """Cumulative import time in seconds per module, from a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        sys.exit(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def main():
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BUDGET
+    failed = False
+
+    for module in ENTRY_MODULES:
+        times = import_times(module)
+        total = times.get(module, 0.0)
+
+        packages = defaultdict(float)
+        for name, seconds in times.items():
+            if "." not in name:
+                packages[name] = max(packages[name], seconds)
+        slowest = sorted(packages.items(), key=lambda item: -item[1])[:6]
+
+        heavy = sorted({name.split(".")[0] for name in times} & set(HEAVY_MODULES))
+        status = "ok"
+        if heavy:
+            status = f"FAIL: imports {', '.join(heavy)}"
+        elif total > budget:
+            status = f"FAIL: over the {budget:.1f}s budget"
+        failed |= status != "ok"
+
+        print(f"{module}: {total:.2f}s, {status}")
+        print("  " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in slowest))
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Check: the upload endpoint enforces the body size limit.
+
+Posts to /api/jobs through the ASGI app (dummy processor, throwaway
+storage and database):
+
+- a small valid image, which must be accepted
+- an oversized body with a Content-Length, and the same body sent chunked
+  with no Content-Length, which must both get 413
+- a malformed Content-Length, which must get 400
+
+Exits with status 1 if any response code is wrong.
+
+Usage (from the project root):
+    python scripts/check_upload_limits.py
+"""
+import io
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from PIL import Image
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+
+_tmp = tempfile.mkdtemp(prefix="check_uploads_")
+os.environ.update({
+    "STORAGE_PATH": _tmp,
+    "DATABASE_URL": f"sqlite:///{_tmp}/jobs.db",
+    "PROCESSOR_TYPE": "dummy",
+})
+sys.path.insert(0, str(BACKEND))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.api.dependencies import MAX_FILE_SIZE  # noqa: E402
+from app.main import app  # noqa: E402
+
+BOUNDARY = "checkuploadboundary"
+CHUNK_SIZE = 1024 * 1024
+
+
+def multipart(data: bytes) -> bytes:
+    """A multipart/form-data body with one ``file`` field."""
+    return (
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="upload.png"\r\n'
+        "Content-Type: image/png\r\n\r\n"
+    ).encode() + data + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+def chunks(body: bytes):
+    """Yield a body in pieces, so it is sent chunked without a Content-Length."""
+    for start in range(0, len(body), CHUNK_SIZE):
+        yield body[start:start + CHUNK_SIZE]
+
+
+def main():
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), (90, 120, 150)).save(buffer, "PNG")
+    small = multipart(buffer.getvalue())
+    oversized = multipart(b"\0" * (MAX_FILE_SIZE + 1024 * 1024))
+    content_type = {"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"}
+
+    cases = [
+        ("valid image", 200, small, content_type),
+        ("oversized, Content-Length", 413, oversized, content_type),
+        ("oversized, chunked", 413, chunks(oversized), content_type),
+        ("malformed Content-Length", 400, small, {**content_type, "Content-Length": "abc"}),
+    ]
+
+    failed = False
+    with TestClient(app) as client:
+        for name, expected, body, headers in cases:
+            response = client.post("/api/jobs", content=body, headers=headers)
+            ok = response.status_code == expected
+            failed |= not ok
+            print(
+                f"{name}: {response.status_code} (expected {expected}) "
+                f"{'ok' if ok else 'FAIL: ' + response.text[:200]}"
+            )
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
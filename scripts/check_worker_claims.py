@@ -0,0 +1,125 @@
+"""
+Check: several standalone workers share one queue without double-claiming.
+
+Starts WORKERS `python -m app.worker` processes against a throwaway SQLite
+database (dummy processor), queues JOBS jobs and waits for all of them.
+Every job must complete exactly once (attempts == 1). Then one worker is
+killed mid-job and the job must be picked up again once its lease expires.
+
+Usage (from the project root):
+    python scripts/check_worker_claims.py
+"""
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+
+# Throwaway database and storage, short leases so the kill test is quick
+_tmp = tempfile.mkdtemp(prefix="check_workers_")
+os.environ.update({
+    "STORAGE_PATH": _tmp,
+    "DATABASE_URL": f"sqlite:///{_tmp}/jobs.db",
+    "PROCESSOR_TYPE": "dummy",
+    "RUN_JOBS_IN_API": "false",
+    "JOB_WORKERS": "2",
+    "WORKER_LEASE_SECONDS": "3",
+    "WORKER_HEARTBEAT_SECONDS": "1",
+    "WORKER_POLL_INTERVAL": "0.2",
+})
+
+sys.path.insert(0, str(BACKEND))
+
+from sqlmodel import Session, select  # noqa: E402
+
+from app.db import engine, init_db  # noqa: E402
+from app.models import Job, JobStatus, ProcessingMode  # noqa: E402
+from app.services import job_service  # noqa: E402
+
+WORKERS = 4
+JOBS = 24
+TIMEOUT = 120
+
+
+def start_worker() -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "app.worker"],
+        cwd=BACKEND,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+def queue_jobs(prefix: str, count: int):
+    for i in range(count):
+        job_id = f"{prefix}{i:03d}"
+        job_service.create_job(job_id, ProcessingMode.SINGLE, f"{job_id}.jpg", 0)
+        job_service.update_job_status(job_id, JobStatus.QUEUED)
+
+
+def wait_finished(prefix: str):
+    """Wait for all jobs with the prefix to finish and return them."""
+    deadline = time.time() + TIMEOUT
+    while time.time() < deadline:
+        with Session(engine) as session:
+            jobs = session.exec(select(Job).where(Job.id.startswith(prefix))).all()
+        if all(job.status in (JobStatus.COMPLETED, JobStatus.FAILED) for job in jobs):
+            return jobs
+        time.sleep(0.5)
+    raise TimeoutError(f"jobs {prefix}* did not finish in {TIMEOUT}s")
+
+
+def stop(workers):
+    for worker in workers:
+        if worker.poll() is None:
+            worker.send_signal(signal.SIGTERM)
+    for worker in workers:
+        worker.wait(timeout=30)
+
+
+def main():
+    init_db()
+
+    # Many workers, one queue
+    workers = [start_worker() for _ in range(WORKERS)]
+    try:
+        queue_jobs("CLAIM", JOBS)
+        jobs = wait_finished("CLAIM")
+
+        # Wall time from the first job starting to the last one finishing
+        # (excludes worker start-up)
+        elapsed = max(job.completed_at for job in jobs) - min(
+            job.completed_at - timedelta(seconds=job.processing_time) for job in jobs
+        )
+
+        owners = {job.lease_owner for job in jobs}
+        assert all(job.status == JobStatus.COMPLETED for job in jobs), "some jobs failed"
+        assert all(job.attempts == 1 for job in jobs), "a job was claimed twice"
+        print(f"✓ {JOBS} jobs on {len(owners)} workers in {elapsed.total_seconds():.1f}s, each claimed once")
+    finally:
+        stop(workers)
+
+    # A worker dies mid-job; another one takes over after the lease expires
+    victim = start_worker()
+    queue_jobs("CRASH", 1)
+    while job_service.get_job("CRASH000").status != JobStatus.PROCESSING:
+        time.sleep(0.1)
+    victim.send_signal(signal.SIGKILL)
+    victim.wait()
+
+    rescuer = start_worker()
+    try:
+        job = wait_finished("CRASH")[0]
+        assert job.status == JobStatus.COMPLETED, job.error_message
+        assert job.attempts == 2, f"expected 2 attempts, got {job.attempts}"
+        print("✓ Job from a killed worker was reclaimed after its lease expired")
+    finally:
+        stop([rescuer])
+
+
+if __name__ == "__main__":
+    main()
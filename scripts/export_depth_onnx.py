@@ -0,0 +1,106 @@
+"""
+Export the DPT depth model to ONNX for the onnxruntime depth backend.
+
+Traces the model at the processor's 384x384 input with a dynamic batch
+axis, optionally quantizes the MatMul / Gemm weights to int8 (dynamic
+quantization, so no calibration images are needed), then runs the graph
+once in ONNX Runtime against PyTorch fp32 on a random batch.
+
+Exporting needs torch, onnx and onnxruntime; inference nodes that use the
+exported file only need onnxruntime. Run once per model version, then set
+DEPTH_BACKEND=onnxruntime (and DEPTH_ONNX_PATH if --output was given).
+
+Usage (from the project root):
+    python scripts/export_depth_onnx.py [--output PATH] [--int8]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND))
+
+from app.config import settings  # noqa: E402
+from app.services.depth_backends import ONNX_INPUT, ONNX_OUTPUT, OnnxRuntimeBackend  # noqa: E402
+from app.services.depth_estimator import DEPTH_MODEL  # noqa: E402
+
+INPUT_SIZE = 384
+OPSET = 17
+
+
+def export(output: Path):
+    import torch
+    from transformers import DPTForDepthEstimation
+
+    class DepthOnly(torch.nn.Module):
+        """The model with a plain tensor output."""
+
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, pixel_values):
+            return self.model(pixel_values=pixel_values).predicted_depth
+
+    model = DPTForDepthEstimation.from_pretrained(DEPTH_MODEL).eval()
+    dummy = torch.randn(1, 3, INPUT_SIZE, INPUT_SIZE)
+
+    start = time.perf_counter()
+    torch.onnx.export(
+        DepthOnly(model),
+        (dummy,),
+        str(output),
+        input_names=[ONNX_INPUT],
+        output_names=[ONNX_OUTPUT],
+        dynamic_axes={ONNX_INPUT: {0: "batch"}, ONNX_OUTPUT: {0: "batch"}},
+        opset_version=OPSET,
+        dynamo=False,
+    )
+    print(f"exported {output} ({output.stat().st_size / 1e6:.0f}MB) in {time.perf_counter() - start:.1f}s")
+    return model
+
+
+def quantize(path: Path):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    fp32_path = path.with_suffix(".fp32.onnx")
+    path.replace(fp32_path)
+    quantize_dynamic(str(fp32_path), str(path), weight_type=QuantType.QInt8)
+    fp32_path.unlink()
+    print(f"quantized to int8 ({path.stat().st_size / 1e6:.0f}MB)")
+
+
+def verify(model, path: Path):
+    import torch
+
+    pixel_values = np.random.default_rng(0).standard_normal((2, 3, INPUT_SIZE, INPUT_SIZE), dtype=np.float32)
+    with torch.inference_mode():
+        expected = model(pixel_values=torch.from_numpy(pixel_values)).predicted_depth.numpy()
+
+    backend = OnnxRuntimeBackend(path)
+    backend.load()
+    actual = backend.predict(pixel_values)
+
+    error = np.abs(actual - expected).mean() / np.abs(expected).mean()
+    print(f"onnxruntime vs torch fp32: relative mean error {error:.2e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    # Relative settings paths are relative to the backend directory
+    parser.add_argument("--output", type=Path, default=BACKEND / settings.depth_onnx_path)
+    parser.add_argument("--int8", action="store_true", help="quantize weights to int8")
+    args = parser.parse_args()
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    model = export(args.output)
+    if args.int8:
+        quantize(args.output)
+    verify(model, args.output)
+
+
+if __name__ == "__main__":
+    main()